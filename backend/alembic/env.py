@@ -1,8 +1,10 @@
+import re
 from logging.config import fileConfig
 
 from alembic import context
 from sqlalchemy import engine_from_config, pool
 from src.api.models import *
+from src.audit.models import *
 from src.auth.models import *
 from src.config import settings
 from src.database import Base, metadata
@@ -25,6 +27,16 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = [metadata, Base.metadata]
 
+# Секции `salaries` создаются миграцией и `after_create`, в моделях их
+# нет: autogenerate не должен предлагать их удалить.
+SALARY_PARTITION = re.compile(r"salaries_p\d+")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    table = object if type_ == "table" else getattr(object, "table", None)
+    return table is None or not SALARY_PARTITION.fullmatch(table.name)
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,6 +59,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -70,7 +83,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
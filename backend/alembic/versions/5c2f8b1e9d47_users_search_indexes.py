@@ -0,0 +1,26 @@
+"""Users search indexes
+
+Revision ID: 5c2f8b1e9d47
+Revises: 8ee0f913b880
+Create Date: 2026-10-19 16:02:11.519304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2f8b1e9d47'
+down_revision = '8ee0f913b880'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_username_pattern', 'users', [sa.text('lower(username) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_email_pattern', 'users', [sa.text('lower(email) text_pattern_ops')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_email_pattern', table_name='users')
+    op.drop_index('ix_users_username_pattern', table_name='users')
@@ -0,0 +1,31 @@
+"""Change sequence on users and salaries
+
+Revision ID: a41d6c0b7e52
+Revises: 5c2f8b1e9d47
+Create Date: 2026-10-19 17:10:44.208613
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41d6c0b7e52'
+down_revision = '5c2f8b1e9d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE SEQUENCE change_seq')
+    # Существующие строки получают номера при добавлении колонки.
+    for table in ('users', 'salaries'):
+        op.add_column(table, sa.Column('change_seq', sa.BigInteger(), server_default=sa.text("nextval('change_seq')"), nullable=False))
+        op.create_index(op.f(f'ix_{table}_change_seq'), table, ['change_seq'], unique=False)
+
+
+def downgrade() -> None:
+    for table in ('salaries', 'users'):
+        op.drop_index(op.f(f'ix_{table}_change_seq'), table_name=table)
+        op.drop_column(table, 'change_seq')
+    op.execute('DROP SEQUENCE change_seq')
@@ -0,0 +1,105 @@
+"""Partition salaries by employee
+
+Revision ID: b7d41c9e2a63
+Revises: 35f0af40ecdf
+Create Date: 2026-10-19 12:40:05.113902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41c9e2a63'
+down_revision = '35f0af40ecdf'
+branch_labels = None
+depends_on = None
+
+SALARY_PARTITIONS = 8
+
+
+def upgrade() -> None:
+    op.drop_index('ix_salaries_id', table_name='salaries')
+    op.rename_table('salaries', 'salaries_old')
+    op.execute('ALTER TABLE salaries_old DROP CONSTRAINT salaries_pkey')
+    op.execute(
+        'ALTER TABLE salaries_old '
+        'DROP CONSTRAINT salaries_employee_id_fkey'
+    )
+    op.create_table('salaries',
+    sa.Column('id', sa.Integer(), sa.Identity(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('current_rate', sa.Float(), nullable=True),
+    sa.Column('rate_increase_period', sa.Integer(), nullable=True),
+    sa.Column('last_promotion_date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id', 'employee_id'),
+    postgresql_partition_by='HASH (employee_id)'
+    )
+    for remainder in range(SALARY_PARTITIONS):
+        op.execute(
+            f'CREATE TABLE salaries_p{remainder} PARTITION OF salaries '
+            f'FOR VALUES WITH (MODULUS {SALARY_PARTITIONS}, '
+            f'REMAINDER {remainder})'
+        )
+    op.create_index(op.f('ix_salaries_id'), 'salaries', ['id'], unique=False)
+    op.create_index(
+        'ix_salaries_employee_id_id', 'salaries', ['employee_id', 'id'],
+        unique=False
+    )
+    op.execute(
+        'INSERT INTO salaries (id, employee_id, current_rate, '
+        'rate_increase_period, last_promotion_date) '
+        'OVERRIDING SYSTEM VALUE '
+        'SELECT id, employee_id, current_rate, rate_increase_period, '
+        'last_promotion_date FROM salaries_old'
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('salaries', 'id'), "
+        "COALESCE(MAX(id), 0) + 1, false) FROM salaries"
+    )
+    op.drop_table('salaries_old')
+
+    op.create_table('salaries_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=True),
+    sa.Column('current_rate', sa.Float(), nullable=True),
+    sa.Column('rate_increase_period', sa.Integer(), nullable=True),
+    sa.Column('last_promotion_date', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_salaries_archive_employee_id'), 'salaries_archive', ['employee_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_salaries_archive_employee_id'), table_name='salaries_archive')
+    op.drop_table('salaries_archive')
+
+    op.drop_index('ix_salaries_employee_id_id', table_name='salaries')
+    op.drop_index(op.f('ix_salaries_id'), table_name='salaries')
+    op.rename_table('salaries', 'salaries_partitioned')
+    op.execute(
+        'ALTER TABLE salaries_partitioned '
+        'RENAME CONSTRAINT salaries_pkey TO salaries_partitioned_pkey'
+    )
+    op.create_table('salaries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=True),
+    sa.Column('current_rate', sa.Float(), nullable=True),
+    sa.Column('rate_increase_period', sa.Integer(), nullable=True),
+    sa.Column('last_promotion_date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['users.id'], name='salaries_employee_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='salaries_pkey')
+    )
+    op.execute(
+        'INSERT INTO salaries (id, employee_id, current_rate, '
+        'rate_increase_period, last_promotion_date) '
+        'SELECT id, employee_id, current_rate, rate_increase_period, '
+        'last_promotion_date FROM salaries_partitioned'
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('salaries', 'id'), "
+        "COALESCE(MAX(id), 0) + 1, false) FROM salaries"
+    )
+    op.drop_table('salaries_partitioned')
+    op.create_index(op.f('ix_salaries_id'), 'salaries', ['id'], unique=False)
@@ -0,0 +1,24 @@
+"""Audit event details
+
+Revision ID: c5e2a8f4b913
+Revises: a41d6c0b7e52
+Create Date: 2026-10-20 10:05:12.381470
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e2a8f4b913'
+down_revision = 'a41d6c0b7e52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('audit_events', sa.Column('details', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('audit_events', 'details')
@@ -0,0 +1,31 @@
+"""Change transaction on users and salaries
+
+Revision ID: d7b3e6f19a20
+Revises: c5e2a8f4b913
+Create Date: 2026-10-20 12:41:37.520914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7b3e6f19a20'
+down_revision = 'c5e2a8f4b913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Существующие строки получают идентификатор транзакции миграции.
+    for table in ('users', 'salaries'):
+        op.add_column(table, sa.Column('change_xid', sa.BigInteger(), server_default=sa.text('pg_current_xact_id()::text::bigint'), nullable=False))
+        op.drop_index(op.f(f'ix_{table}_change_seq'), table_name=table)
+        op.create_index(op.f(f'ix_{table}_change_xid_change_seq'), table, ['change_xid', 'change_seq'], unique=False)
+
+
+def downgrade() -> None:
+    for table in ('salaries', 'users'):
+        op.drop_index(op.f(f'ix_{table}_change_xid_change_seq'), table_name=table)
+        op.create_index(op.f(f'ix_{table}_change_seq'), table, ['change_seq'], unique=False)
+        op.drop_column(table, 'change_xid')
@@ -0,0 +1,38 @@
+"""Salary change notify trigger
+
+Revision ID: e3a9f1d7c284
+Revises: b7d41c9e2a63
+Create Date: 2026-10-19 14:05:52.730116
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9f1d7c284'
+down_revision = 'b7d41c9e2a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+CREATE OR REPLACE FUNCTION notify_salary_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'salary_changes', COALESCE(NEW.employee_id, OLD.employee_id)::text
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""")
+    op.execute(
+        'CREATE TRIGGER salaries_notify '
+        'AFTER INSERT OR UPDATE OR DELETE ON salaries '
+        'FOR EACH ROW EXECUTE FUNCTION notify_salary_change()'
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER salaries_notify ON salaries')
+    op.execute('DROP FUNCTION notify_salary_change()')
@@ -1,10 +1,40 @@
-from sqlalchemy import select
+from sqlalchemy import and_, exists, func, literal_column, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from ..auth.crud import get_user_by_username
+from ..auth import models as user_models
+from ..cache import response_cache
 from . import models, schemas
 
 
+def is_current_salary():
+    """
+    Условие отбора текущей (последней) записи о зарплате сотрудника.
+
+    Returns:
+    - Выражение `NOT EXISTS` для более новой записи того же сотрудника.
+    """
+    newer = aliased(models.Salary)
+    return ~exists().where(
+        newer.employee_id == models.Salary.employee_id,
+        newer.id > models.Salary.id
+    )
+
+
+def next_raise_date():
+    """
+    Дата следующего повышения, вычисляемая на стороне базы данных.
+
+    Returns:
+    - Выражение `last_promotion_date + rate_increase_period дней`.
+    """
+    return (
+        models.Salary.last_promotion_date
+        + models.Salary.rate_increase_period
+        * literal_column("interval '1 day'")
+    )
+
+
 async def create_an_employee_salary(
     session: AsyncSession,
     salary: schemas.SalaryCreate
@@ -12,6 +42,7 @@ async def create_an_employee_salary(
     db_salary = models.Salary(**salary.dict())
     session.add(db_salary)
     await session.commit()
+    await response_cache.invalidate(db_salary.employee_id)
     await session.refresh(db_salary)
     return db_salary
 
@@ -20,9 +51,107 @@ async def get_salaries_by_username(
     session: AsyncSession,
     username: str
 ):
-    user = await get_user_by_username(session, username)
     query = (
-        select(models.Salary).where(models.Salary.employee.has(id=user.id))
+        select(models.Salary)
+        .join(
+            user_models.User,
+            user_models.User.id == models.Salary.employee_id
+        )
+        .where(user_models.User.username == username)
+        .order_by(models.Salary.id)
     )
     result = await session.execute(query)
     return result.scalars().all()
+
+
+async def stream_current_salaries(
+    session: AsyncSession,
+    employee_ids: list[int],
+    usernames: list[str]
+):
+    """
+    Получает текущие зарплаты группы сотрудников одним запросом.
+
+    Notes:
+    - Пользователи соединяются с текущей записью о зарплате через
+    `LEFT JOIN`, строки читаются потоком.
+
+    Args:
+    - `session`: Сеанс базы данных.
+    - `employee_ids`: Идентификаторы сотрудников.
+    - `usernames`: Имена пользователей.
+
+    Returns:
+    - Асинхронный результат со строками `employee_id`, `username`,
+    `current_rate`, `rate_increase_period`, `last_promotion_date`.
+    """
+    query = (
+        select(
+            user_models.User.id.label("employee_id"),
+            user_models.User.username,
+            models.Salary.current_rate,
+            models.Salary.rate_increase_period,
+            models.Salary.last_promotion_date,
+        )
+        .outerjoin(
+            models.Salary,
+            and_(
+                models.Salary.employee_id == user_models.User.id,
+                is_current_salary()
+            )
+        )
+        .where(or_(
+            user_models.User.id.in_(employee_ids),
+            user_models.User.username.in_(usernames)
+        ))
+        .order_by(user_models.User.id)
+    )
+    return await session.stream(query)
+
+
+async def adjust_rates(
+    session: AsyncSession,
+    adjustment: schemas.RateAdjustment
+) -> list[int]:
+    """
+    Изменяет текущие ставки отобранных сотрудников одним запросом `UPDATE`.
+
+    Notes:
+    - Обработчик `Salary.__declare_last__` на массовый запрос не
+    срабатывает, поэтому `last_promotion_date` обновляется в том же запросе.
+
+    Args:
+    - `session`: Сеанс базы данных.
+    - `adjustment`: Схема массового изменения ставок.
+
+    Returns:
+    - Идентификаторы сотрудников, чьи ставки изменены.
+    """
+    if adjustment.percent is not None:
+        new_rate = models.Salary.current_rate * (1 + adjustment.percent / 100)
+    else:
+        new_rate = models.Salary.current_rate + adjustment.amount
+
+    query = update(models.Salary).where(is_current_salary())
+    if adjustment.employee_ids is not None:
+        query = query.where(
+            models.Salary.employee_id.in_(adjustment.employee_ids)
+        )
+    if adjustment.min_rate is not None:
+        query = query.where(models.Salary.current_rate >= adjustment.min_rate)
+    if adjustment.max_rate is not None:
+        query = query.where(models.Salary.current_rate <= adjustment.max_rate)
+    if adjustment.raise_due_before is not None:
+        query = query.where(next_raise_date() < adjustment.raise_due_before)
+
+    result = await session.execute(
+        query.values(
+            current_rate=new_rate,
+            last_promotion_date=func.localtimestamp()
+        )
+        .returning(models.Salary.employee_id)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    await response_cache.invalidate()
+    return list(result.scalars())
@@ -0,0 +1,210 @@
+import asyncio
+import functools
+import io
+from datetime import date
+from typing import AsyncIterator
+
+from sqlalchemy import select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..auth import models as user_models
+from . import models
+
+# Колонки выгрузки: выражение и тип Arrow.
+EXPORT_COLUMNS = {
+    "employee_id": (user_models.User.id, "int64"),
+    "username": (user_models.User.username, "string"),
+    "email": (user_models.User.email, "string"),
+    "is_active": (user_models.User.is_active, "bool"),
+    "is_staff": (user_models.User.is_staff, "bool"),
+    "salary_id": (models.Salary.id, "int64"),
+    "current_rate": (models.Salary.current_rate, "double"),
+    "rate_increase_period": (models.Salary.rate_increase_period, "int64"),
+    "last_promotion_date": (
+        models.Salary.last_promotion_date, "timestamp[us]"
+    ),
+}
+# Общие колонки `salaries` и `salaries_archive`.
+HISTORY_COLUMNS = (
+    "id", "employee_id", "current_rate", "rate_increase_period",
+    "last_promotion_date",
+)
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def load_pyarrow():
+    """
+    Импортирует pyarrow при первой выгрузке, а не при старте приложения.
+
+    Returns:
+    - Модуль pyarrow или None, если он не установлен.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+class ChunkSink(io.RawIOBase):
+    """
+    Файл, который накапливает записанные байты до вызова `take()`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def take(self) -> bytes:
+        chunks, self.chunks = self.chunks, []
+        return b"".join(chunks)
+
+
+def salary_history(include_archive: bool = True):
+    """
+    Формирует подзапрос записей о зарплате с колонками модели `Salary`.
+
+    Args:
+    - `include_archive`: Добавить записи из `salaries_archive`.
+
+    Returns:
+    - Подзапрос текущих (и архивных) записей.
+    """
+    tables = [models.Salary]
+    if include_archive:
+        tables.append(models.SalaryArchive)
+    queries = [
+        select(*(getattr(table, column) for column in HISTORY_COLUMNS))
+        for table in tables
+    ]
+    return union_all(*queries).subquery("history")
+
+
+def export_statement(
+    columns: list[str],
+    promoted_from: date = None,
+    promoted_to: date = None,
+    include_archive: bool = True
+):
+    """
+    Формирует запрос истории зарплат, соединённой с пользователями.
+
+    Notes:
+    - По умолчанию история включает записи, перенесённые в
+    `salaries_archive` (`UNION ALL`), иначе выгрузка теряла бы всё, что
+    старше последнего архивирования.
+
+    Args:
+    - `columns`: Имена колонок из `EXPORT_COLUMNS`.
+    - `promoted_from`: Нижняя граница `last_promotion_date` (включительно).
+    - `promoted_to`: Верхняя граница `last_promotion_date` (не включая).
+    - `include_archive`: Добавить архивные записи.
+
+    Returns:
+    - Запрос, упорядоченный по сотруднику и записи о зарплате.
+    """
+    history = salary_history(include_archive)
+
+    def resolve(column):
+        expression = EXPORT_COLUMNS[column][0]
+        if expression.class_ is models.Salary:
+            return history.c[expression.key]
+        return expression
+
+    query = (
+        select(*(resolve(c).label(c) for c in columns))
+        .select_from(history)
+        .join(
+            user_models.User,
+            user_models.User.id == history.c.employee_id
+        )
+    )
+    if promoted_from is not None:
+        query = query.where(history.c.last_promotion_date >= promoted_from)
+    if promoted_to is not None:
+        query = query.where(history.c.last_promotion_date < promoted_to)
+    return query.order_by(history.c.employee_id, history.c.id)
+
+
+def write_batch(writer, schema, rows: list):
+    pyarrow = load_pyarrow()
+    arrays = [
+        pyarrow.array(values, type=field.type)
+        for values, field in zip(zip(*rows), schema)
+    ]
+    writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+
+
+async def export_salaries(
+    session: AsyncSession,
+    columns: list[str],
+    format: str = "parquet",
+    promoted_from: date = None,
+    promoted_to: date = None,
+    include_archive: bool = True,
+    batch_size: int = 10000
+) -> AsyncIterator[bytes]:
+    """
+    Выгружает историю зарплат в формате Arrow IPC или Parquet.
+
+    Notes:
+    - Строки читаются серверным курсором пачками по `batch_size`, каждая
+    пачка превращается в `RecordBatch` (в Parquet - группу строк) в
+    отдельном потоке и сразу отдаётся клиенту, поэтому память ограничена
+    одной пачкой.
+
+    Args:
+    - `session`: Сеанс базы данных.
+    - `columns`: Имена колонок из `EXPORT_COLUMNS`.
+    - `format`: `arrow` или `parquet`.
+    - `promoted_from`: Нижняя граница `last_promotion_date` (включительно).
+    - `promoted_to`: Верхняя граница `last_promotion_date` (не включая).
+    - `include_archive`: Добавить записи из `salaries_archive`.
+    - `batch_size`: Количество строк в пачке.
+
+    Yields:
+    - Очередные байты файла.
+    """
+    pyarrow = load_pyarrow()
+    schema = pyarrow.schema([
+        (column, pyarrow.type_for_alias(EXPORT_COLUMNS[column][1]))
+        for column in columns
+    ])
+    sink = ChunkSink()
+    if format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+
+    result = await session.stream(
+        export_statement(
+            columns, promoted_from, promoted_to, include_archive
+        ),
+        execution_options={"yield_per": batch_size}
+    )
+    try:
+        async for rows in result.partitions(batch_size):
+            await asyncio.to_thread(write_batch, writer, schema, rows)
+            yield sink.take()
+    finally:
+        await result.close()
+    writer.close()
+    yield sink.take()
@@ -1,9 +1,30 @@
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, Column, Float, ForeignKey, Integer, event
+from sqlalchemy import (TIMESTAMP, BigInteger, Column, Float, ForeignKey,
+                        Identity, Index, Integer, PrimaryKeyConstraint, event,
+                        text)
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
 
-from ..database import Base
+from ..database import Base, CurrentTransaction, NextChange
+
+SALARY_PARTITIONS = 8
+
+SALARY_NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION notify_salary_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'salary_changes', COALESCE(NEW.employee_id, OLD.employee_id)::text
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+SALARY_NOTIFY_TRIGGER = (
+    "CREATE TRIGGER salaries_notify "
+    "AFTER INSERT OR UPDATE OR DELETE ON salaries "
+    "FOR EACH ROW EXECUTE FUNCTION notify_salary_change()"
+)
 
 
 class Salary(Base):
@@ -16,20 +37,50 @@ class Salary(Base):
     - `current_rate`: Текущая ставка зарплаты.
     - `rate_increase_period`: Период повышения ставки зарплаты (в днях).
     - `last_promotion_date`: Дата последнего повышения зарплаты.
+    - `change_seq`: Номер последнего изменения строки.
+    - `change_xid`: Транзакция последнего изменения строки.
 
     Relationships:
     - `employee`: Связь с моделью `User`, обратное отношение "один к одному".
+    Загружается только явно (`lazy="raise"`).
+
+    Notes:
+    - В PostgreSQL таблица секционирована по хэшу `employee_id` на
+    `SALARY_PARTITIONS` секций, поэтому запросы по сотруднику читают одну
+    секцию. Первичный ключ секционированной таблицы обязан включать ключ
+    секционирования.
+    - В SQLite первичный ключ - только `id` (см.
+    `sqlite_identity_primary_key()`).
     """
 
     __tablename__ = "salaries"
+    __table_args__ = (
+        Index("ix_salaries_employee_id_id", "employee_id", "id"),
+        Index(
+            "ix_salaries_change_xid_change_seq", "change_xid", "change_seq"
+        ),
+        {"postgresql_partition_by": "HASH (employee_id)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    employee_id = Column(Integer, ForeignKey("users.id"))
+    id = Column(Integer, Identity(), primary_key=True, index=True)
+    employee_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
     current_rate = Column(Float)
     rate_increase_period = Column(Integer)
     last_promotion_date = Column(TIMESTAMP)
+    change_seq = Column(
+        BigInteger,
+        default=NextChange(),
+        onupdate=NextChange(),
+        nullable=False
+    )
+    change_xid = Column(
+        BigInteger,
+        server_default=CurrentTransaction(),
+        onupdate=CurrentTransaction(),
+        nullable=False
+    )
 
-    employee = relationship("User", back_populates="salaries")
+    employee = relationship("User", back_populates="salaries", lazy="raise")
 
     @classmethod
     def __declare_last__(cls):
@@ -54,3 +105,56 @@ class Salary(Base):
         @event.listens_for(cls.current_rate, "set")
         def receive_set(target, *args, **kwargs):
             target.last_promotion_date = datetime.now()
+
+
+@compiles(PrimaryKeyConstraint, "sqlite")
+def sqlite_identity_primary_key(constraint, compiler, **kwargs):
+    """
+    Оставляет в составном первичном ключе SQLite только колонку `Identity`.
+
+    Notes:
+    - SQLite нумерует автоматически только первичный ключ из одной колонки
+    INTEGER, поэтому составной ключ `salaries` в тестах с SQLite
+    сужается до `id`. Уникальность `id` от этого только строже.
+    """
+    identity = [
+        column for column in constraint.columns if column.identity is not None
+    ]
+    if len(constraint.columns) > 1 and identity:
+        return f"PRIMARY KEY ({compiler.preparer.quote(identity[0].name)})"
+    return compiler.visit_primary_key_constraint(constraint, **kwargs)
+
+
+@event.listens_for(Salary.__table__, "after_create")
+def create_salary_partitions(target, connection, **kwargs):
+    """
+    Создаёт секции таблицы `salaries` и триггер уведомлений об изменениях
+    при `create_all` в PostgreSQL.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    for remainder in range(SALARY_PARTITIONS):
+        connection.execute(text(
+            f"CREATE TABLE salaries_p{remainder} PARTITION OF salaries "
+            f"FOR VALUES WITH (MODULUS {SALARY_PARTITIONS}, "
+            f"REMAINDER {remainder})"
+        ))
+    connection.execute(text(SALARY_NOTIFY_FUNCTION))
+    connection.execute(text(SALARY_NOTIFY_TRIGGER))
+
+
+class SalaryArchive(Base):
+    """
+    Архив устаревших записей о зарплате.
+
+    Повторяет колонки модели `Salary`. Заполняется командой
+    `python -m src.api.partitions archive`.
+    """
+
+    __tablename__ = "salaries_archive"
+
+    id = Column(Integer, primary_key=True)
+    employee_id = Column(Integer, index=True)
+    current_rate = Column(Float)
+    rate_increase_period = Column(Integer)
+    last_promotion_date = Column(TIMESTAMP)
@@ -0,0 +1,244 @@
+import asyncio
+import heapq
+import json
+import math
+import time
+from datetime import timedelta
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import async_session_maker
+from . import models
+from .snapshot import current_salaries, follow_changes
+
+PING = ": ping\n\n"
+
+
+class RaiseNotifier:
+    """
+    Рассылка событий о повышении зарплаты подписчикам SSE.
+
+    Даты ближайших повышений подписанных сотрудников лежат в одной куче
+    `heap`, которую разбирает единственный таймер `run_timer()`. Изменения
+    зарплат приходят через `LISTEN salary_changes`. Каждое соединение
+    держит только ограниченную очередь готовых сообщений.
+
+    Notes:
+    - Устаревшие элементы кучи не удаляются, а пропускаются: актуальный
+    срок сотрудника хранится в `deadlines`.
+
+    Attributes:
+    - `subscribers`: Очереди соединений по `employee_id`.
+    - `salaries`: Ставка, период и дата последнего повышения подписчиков.
+    - `deadlines`: Ожидаемое время следующего повышения (timestamp).
+    - `pending`: Сотрудники, чьи записи изменились и ждут обновления.
+    - `dropped`: Количество сообщений, не поместившихся в очереди.
+    """
+
+    def __init__(self, queue_size: int, keepalive: float):
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self.subscribers = {}
+        self.salaries = {}
+        self.deadlines = {}
+        self.heap = []
+        self.pending = set()
+        self.dropped = 0
+        self._wakeup = asyncio.Event()
+
+    async def subscribe(
+        self, session: AsyncSession, employee_id: int
+    ) -> asyncio.Queue:
+        """
+        Регистрирует соединение и кладет в его очередь текущее состояние.
+
+        Args:
+        - `session`: Сеанс базы данных.
+        - `employee_id`: Идентификатор сотрудника.
+
+        Returns:
+        - Очередь сообщений соединения.
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.setdefault(employee_id, set()).add(queue)
+        if employee_id not in self.salaries:
+            await self.refresh(session, [employee_id], publish=False)
+        queue.put_nowait(self.message("state", employee_id))
+        return queue
+
+    def unsubscribe(self, employee_id: int, queue: asyncio.Queue):
+        queues = self.subscribers.get(employee_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[employee_id]
+            self.salaries.pop(employee_id, None)
+            self.deadlines.pop(employee_id, None)
+
+    async def refresh(
+        self,
+        session: AsyncSession,
+        employee_ids: Iterable,
+        publish: bool = True
+    ):
+        """
+        Перечитывает зарплаты подписанных сотрудников и переносит сроки.
+
+        Args:
+        - `session`: Сеанс базы данных.
+        - `employee_ids`: Идентификаторы сотрудников.
+        - `publish`: Отправить подписчикам событие `change`.
+        """
+        employee_ids = {
+            employee_id for employee_id in employee_ids
+            if employee_id in self.subscribers
+        }
+        if not employee_ids:
+            return
+        result = await session.execute(
+            current_salaries().where(
+                models.Salary.employee_id.in_(employee_ids)
+            )
+        )
+        found = {
+            employee_id: (rate, period, promoted)
+            for employee_id, rate, period, promoted in result
+        }
+        for employee_id in employee_ids:
+            salary = found.get(employee_id)
+            if salary == self.salaries.get(employee_id):
+                continue
+            if salary is None:
+                self.salaries.pop(employee_id, None)
+            else:
+                self.salaries[employee_id] = salary
+            self.schedule(employee_id)
+            if publish:
+                self.publish(employee_id, "change")
+
+    def schedule(self, employee_id: int):
+        """
+        Ставит в кучу дату следующего повышения сотрудника.
+        """
+        self.deadlines.pop(employee_id, None)
+        salary = self.salaries.get(employee_id)
+        if salary is None or salary[2] is None:
+            return
+        _, period, promoted = salary
+        deadline = (promoted + timedelta(days=period or 0)).timestamp()
+        if deadline <= time.time():
+            return
+        self.deadlines[employee_id] = deadline
+        heapq.heappush(self.heap, (deadline, employee_id))
+        if len(self.heap) > 2 * len(self.deadlines) + 64:
+            self.heap = [(d, e) for e, d in self.deadlines.items()]
+            heapq.heapify(self.heap)
+        self._wakeup.set()
+
+    def fire_due(self, now: float) -> int:
+        """
+        Рассылает события `raise` для наступивших сроков.
+
+        Returns:
+        - Количество сотрудников, получивших событие.
+        """
+        fired = 0
+        while self.heap and self.heap[0][0] <= now:
+            deadline, employee_id = heapq.heappop(self.heap)
+            if self.deadlines.get(employee_id) != deadline:
+                continue
+            del self.deadlines[employee_id]
+            self.publish(employee_id, "raise")
+            fired += 1
+        return fired
+
+    def message(self, event: str, employee_id: int) -> str:
+        salary = self.salaries.get(employee_id)
+        data = None
+        if salary is not None:
+            rate, period, promoted = salary
+            data = {"current rate": rate, "next raise date": None}
+            if promoted is not None:
+                data["next raise date"] = (
+                    promoted + timedelta(days=period or 0)
+                ).strftime("%d.%m.%Y")
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def publish(self, employee_id: int, event: str):
+        message = self.message(event, employee_id)
+        for queue in self.subscribers.get(employee_id, ()):
+            self.put(queue, message)
+
+    def put(self, queue: asyncio.Queue, message: str):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def ping(self):
+        for queues in self.subscribers.values():
+            for queue in queues:
+                if not queue.full():
+                    queue.put_nowait(PING)
+
+    def on_notify(self, connection, pid, channel, payload):
+        employee_id = int(payload)
+        if employee_id in self.subscribers:
+            self.pending.add(employee_id)
+
+    async def refresh_pending(self):
+        if not self.pending:
+            return
+        employee_ids, self.pending = self.pending, set()
+        async with async_session_maker() as session:
+            await self.refresh(session, employee_ids)
+
+    async def run_timer(self):
+        """
+        Рассылает события о наступивших повышениях и keepalive-пинги.
+        """
+        next_ping = time.time() + self.keepalive
+        while True:
+            now = time.time()
+            self.fire_due(now)
+            if now >= next_ping:
+                self.ping()
+                next_ping = now + self.keepalive
+            wake_at = min(
+                next_ping, self.heap[0][0] if self.heap else math.inf
+            )
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wake_at - now)
+            except asyncio.TimeoutError:
+                pass
+
+    async def listen(self):
+        """
+        Следит за изменениями зарплат подписчиков.
+
+        Notes:
+        - После переподключения перечитываются все подписчики, чтобы не
+        пропустить изменения.
+        """
+        async def resync():
+            self.pending.update(self.subscribers)
+            await self.refresh_pending()
+
+        await follow_changes(self.on_notify, resync, self.refresh_pending)
+
+    def stats(self) -> dict:
+        return {
+            "employees": len(self.subscribers),
+            "connections": sum(map(len, self.subscribers.values())),
+            "scheduled": len(self.deadlines),
+            "dropped": self.dropped,
+        }
+
+
+raise_notifier = RaiseNotifier(
+    settings.raise_events_queue_size, settings.raise_events_keepalive
+)
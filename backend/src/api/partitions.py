@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import async_session_maker
+from . import models
+from .crud import is_current_salary
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLUMNS = (
+    "id", "employee_id", "current_rate", "rate_increase_period",
+    "last_promotion_date",
+)
+
+
+async def partition_stats(session: AsyncSession) -> list[dict]:
+    """
+    Возвращает размер и оценку числа строк секций таблицы `salaries`.
+
+    Args:
+    - `session`: Сеанс базы данных.
+
+    Returns:
+    - Список словарей `partition`, `rows`, `bytes`.
+    """
+    result = await session.execute(text(
+        "SELECT c.relname AS partition, c.reltuples::bigint AS rows, "
+        "pg_total_relation_size(c.oid) AS bytes "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'salaries'::regclass ORDER BY c.relname"
+    ))
+    return [dict(row) for row in result.mappings()]
+
+
+def archive_statement(before: datetime, chunk_size: int):
+    """
+    Формирует запрос переноса пачки устаревших записей в архив.
+
+    Notes:
+    - Текущие записи сотрудников не переносятся.
+
+    Args:
+    - `before`: Переносятся записи с `last_promotion_date` раньше даты.
+    - `chunk_size`: Максимальное количество строк в пачке.
+
+    Returns:
+    - Запрос `WITH moved AS (DELETE ... RETURNING) INSERT ... SELECT`.
+    """
+    chunk = (
+        select(models.Salary.id, models.Salary.employee_id)
+        .where(
+            ~is_current_salary(),
+            models.Salary.last_promotion_date < before
+        )
+        .limit(chunk_size)
+        .with_for_update(skip_locked=True)
+    )
+    moved = (
+        delete(models.Salary)
+        .where(
+            tuple_(models.Salary.id, models.Salary.employee_id).in_(chunk)
+        )
+        .returning(*(models.Salary.__table__.c[c] for c in ARCHIVE_COLUMNS))
+        .cte("moved")
+    )
+    return insert(models.SalaryArchive).from_select(
+        ARCHIVE_COLUMNS, select(*(moved.c[c] for c in ARCHIVE_COLUMNS))
+    )
+
+
+async def archive_salaries(
+    session: AsyncSession,
+    before: datetime,
+    chunk_size: int = 1000
+) -> int:
+    """
+    Переносит устаревшие записи о зарплате в `salaries_archive` пачками.
+
+    Args:
+    - `session`: Сеанс базы данных.
+    - `before`: Граница даты последнего повышения.
+    - `chunk_size`: Размер пачки.
+
+    Returns:
+    - Количество перенесённых записей.
+    """
+    total = 0
+    started = time.monotonic()
+    while True:
+        result = await session.execute(archive_statement(before, chunk_size))
+        await session.commit()
+        if not result.rowcount:
+            break
+        total += result.rowcount
+        elapsed = time.monotonic() - started
+        logger.info(
+            "Salaries archived: chunk %d, total %d, %.0f rows/s",
+            result.rowcount, total, total / elapsed if elapsed else 0
+        )
+    return total
+
+
+async def run(args):
+    async with async_session_maker() as session:
+        if args.command == "status":
+            for row in await partition_stats(session):
+                print(f"{row['partition']}\t{row['rows']}\t{row['bytes']}")
+        else:
+            await archive_salaries(session, args.before, args.chunk_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Обслуживание секций таблицы salaries."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="размер секций")
+    archive = commands.add_parser(
+        "archive", help="перенос устаревших записей в salaries_archive"
+    )
+    archive.add_argument(
+        "--before", type=datetime.fromisoformat, required=True
+    )
+    archive.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import logging
+import time
+from typing import Callable
+
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..cache import response_cache
+from ..config import settings
+from ..database import async_session_maker
+from . import models
+from .crud import is_current_salary, next_raise_date
+
+logger = logging.getLogger(__name__)
+
+
+def is_raise_due():
+    """
+    Условие наступления даты повышения зарплаты.
+
+    Returns:
+    - Выражение `last_promotion_date + rate_increase_period <= now`.
+    """
+    return and_(
+        models.Salary.rate_increase_period > 0,
+        next_raise_date() <= func.localtimestamp(),
+    )
+
+
+def due_raises_statement(percent: float, chunk_size: int):
+    """
+    Формирует запрос повышения ставок для очередной пачки сотрудников.
+
+    Notes:
+    - Строки выбираются через `FOR UPDATE SKIP LOCKED`, поэтому несколько
+    экземпляров задачи не мешают друг другу.
+    - `last_promotion_date` выставляется на стороне сервера: обработчик
+    `Salary.__declare_last__` на массовые запросы не срабатывает.
+
+    Args:
+    - `percent`: Размер повышения в процентах.
+    - `chunk_size`: Максимальное количество строк в пачке.
+
+    Returns:
+    - Запрос `UPDATE ... RETURNING` с идентификаторами изменённых строк.
+    """
+    chunk = (
+        select(models.Salary.id)
+        .where(is_current_salary(), is_raise_due())
+        .order_by(models.Salary.id)
+        .limit(chunk_size)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(models.Salary)
+        .where(models.Salary.id.in_(chunk.scalar_subquery()))
+        .values(
+            current_rate=models.Salary.current_rate * (1 + percent / 100),
+            last_promotion_date=func.localtimestamp(),
+        )
+        .returning(models.Salary.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def apply_due_raises(
+    session: AsyncSession,
+    percent: float = None,
+    chunk_size: int = None,
+    on_chunk: Callable[[int], None] = None
+) -> int:
+    """
+    Применяет повышение ко всем ставкам, у которых наступила дата повышения.
+
+    Args:
+    - `session`: Сеанс базы данных.
+    - `percent`: Размер повышения в процентах (по умолчанию из настроек).
+    - `chunk_size`: Размер пачки (по умолчанию из настроек).
+    - `on_chunk`: Вызывается после каждой пачки с числом повышенных ставок.
+
+    Returns:
+    - Количество повышенных ставок.
+    """
+    if percent is None:
+        percent = settings.raise_percent
+    if chunk_size is None:
+        chunk_size = settings.raise_chunk_size
+
+    total = 0
+    started = time.monotonic()
+    while True:
+        result = await session.execute(
+            due_raises_statement(percent, chunk_size)
+        )
+        updated = len(result.scalars().all())
+        await session.commit()
+        if not updated:
+            break
+        await response_cache.invalidate()
+        total += updated
+        if on_chunk is not None:
+            on_chunk(total)
+        elapsed = time.monotonic() - started
+        logger.info(
+            "Raises applied: chunk %d, total %d, %.0f rows/s",
+            updated, total, total / elapsed if elapsed else 0
+        )
+    logger.info(
+        "Raises job finished: %d rows in %.2f s",
+        total, time.monotonic() - started
+    )
+    return total
+
+
+async def run_due_raises(
+    percent: float = None,
+    chunk_size: int = None
+) -> int:
+    """
+    Запускает задачу повышения ставок в отдельной сессии.
+
+    Returns:
+    - Количество повышенных ставок.
+    """
+    async with async_session_maker() as session:
+        return await apply_due_raises(session, percent, chunk_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Применяет наступившие повышения зарплаты."
+    )
+    parser.add_argument("--percent", type=float, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_due_raises(args.percent, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,34 @@
-from datetime import timedelta
+from datetime import date, timedelta
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..audit.log import audit_log
 from ..auth import crud as user_crud
 from ..auth.middleware import get_current_user, get_current_user_if_staff
-from ..database import get_async_session
-from . import crud, schemas
+from ..cache import response_cache
+from ..config import settings
+from ..database import SessionRoute, get_async_session, keep_session
+from ..ops.access_log import access_log_sampled
+from ..ops.queries import query_budget
+from . import crud, export, schemas
+from .notifications import raise_notifier
+from .snapshot import salary_snapshot
 
-router = APIRouter()
+router = APIRouter(route_class=SessionRoute)
 
 
 @router.post(
     "/set-rate/",
-    status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(get_current_user_if_staff)]
+    status_code=status.HTTP_201_CREATED
 )
+@query_budget(4)
 async def create_salary(
     salary: schemas.SalaryCreate,
     session: AsyncSession = Depends(get_async_session),
+    current_user: dict = Depends(get_current_user_if_staff)
 ):
     """
     Устанавливает ставку зарплаты для сотрудника.
@@ -26,6 +36,11 @@ async def create_salary(
     Args:
     - `salary`: Схема создания зарплаты сотрудника.
     - `session`: Сеанс базы данных.
+    - `current_user`: Текущий сотрудник staff.
+
+    Notes:
+    - Событие аудита с новой ставкой и периодом записывается после
+    фиксации записи о зарплате.
 
     Returns:
     - Созданный объект модели зарплаты.
@@ -35,13 +50,166 @@ async def create_salary(
         raise HTTPException(
             status_code=404, detail="No such user"
         )
-    return await crud.create_an_employee_salary(session, salary=salary)
+    db_salary = await crud.create_an_employee_salary(session, salary=salary)
+    audit_log.record(
+        current_user.get("username"),
+        "salary.set_rate",
+        db_salary.employee_id,
+        salary.audit_details()
+    )
+    return db_salary
+
+
+@router.patch(
+    "/adjust-rates/",
+    status_code=status.HTTP_200_OK
+)
+@query_budget(2)
+async def adjust_rates(
+    adjustment: schemas.RateAdjustment,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: dict = Depends(get_current_user_if_staff)
+):
+    """
+    Массово изменяет текущие ставки отобранных сотрудников.
+
+    Args:
+    - `adjustment`: Схема массового изменения ставок.
+    - `session`: Сеанс базы данных.
+    - `current_user`: Текущий сотрудник staff.
+
+    Notes:
+    - В журнал аудита после фиксации изменений записывается событие на
+    каждого затронутого сотрудника с параметрами изменения.
+
+    Returns:
+    - Количество изменённых ставок.
+    """
+    employee_ids = await crud.adjust_rates(session, adjustment)
+    details = adjustment.audit_details()
+    for employee_id in employee_ids:
+        audit_log.record(
+            current_user.get("username"),
+            "salary.adjust_rates",
+            employee_id,
+            details
+        )
+    return {"updated": len(employee_ids)}
+
+
+@router.post(
+    "/batch/",
+    status_code=status.HTTP_200_OK,
+    response_model=list[schemas.SalaryBatchItem]
+)
+@query_budget(2)
+@keep_session
+async def read_salaries_batch(
+    batch: schemas.SalaryBatchRequest,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: dict = Depends(get_current_user_if_staff)
+):
+    """
+    Возвращает текущие зарплаты группы сотрудников потоком JSON.
+
+    Args:
+    - `batch`: Идентификаторы и имена пользователей сотрудников.
+    - `session`: Сеанс базы данных.
+    - `current_user`: Текущий сотрудник staff.
+
+    Returns:
+    - Массив текущих зарплат, по одному элементу на найденного
+    пользователя.
+    """
+    audit_log.record(current_user.get("username"), "salary.batch_read")
+    result = await crud.stream_current_salaries(
+        session, batch.employee_ids, batch.usernames
+    )
+
+    async def content():
+        separator = "["
+        async for row in result.mappings():
+            yield separator + schemas.SalaryBatchItem(**row).json()
+            separator = ","
+        yield "[]" if separator == "[" else "]"
+
+    return StreamingResponse(content(), media_type="application/json")
+
+
+@router.get(
+    "/export/",
+    status_code=status.HTTP_200_OK
+)
+@query_budget(2)
+@keep_session
+async def export_salaries(
+    format: Literal["parquet", "arrow"] = "parquet",
+    columns: Optional[list[str]] = Query(None),
+    promoted_from: Optional[date] = None,
+    promoted_to: Optional[date] = None,
+    include_archive: bool = True,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: dict = Depends(get_current_user_if_staff)
+):
+    """
+    Выгружает историю зарплат с данными сотрудников в колоночном формате.
+
+    Args:
+    - `format`: `parquet` (по умолчанию) или `arrow` (Arrow IPC stream).
+    - `columns`: Выгружаемые колонки (по умолчанию все): `employee_id`,
+    `username`, `email`, `is_active`, `is_staff`, `salary_id`,
+    `current_rate`, `rate_increase_period`, `last_promotion_date`.
+    - `promoted_from`: Записи с `last_promotion_date` не раньше даты.
+    - `promoted_to`: Записи с `last_promotion_date` раньше даты.
+    - `include_archive`: Включать записи из `salaries_archive`
+    (по умолчанию да - полная история; `false` - записи, которые ещё
+    хранятся в `salaries`, включая заменённые, без `salaries_archive`).
+    - `session`: Сеанс базы данных.
+    - `current_user`: Текущий сотрудник staff.
+
+    Returns:
+    - Файл выгрузки, передаваемый потоком.
+
+    Raises:
+    - `HTTPException` с кодом состояния 422 при неизвестной колонке.
+    - `HTTPException` с кодом состояния 501, если не установлен pyarrow.
+    """
+    if export.load_pyarrow() is None:
+        raise HTTPException(
+            status_code=501, detail="Export requires pyarrow"
+        )
+    columns = columns or list(export.EXPORT_COLUMNS)
+    unknown = set(columns) - set(export.EXPORT_COLUMNS)
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown columns: {', '.join(sorted(unknown))}"
+        )
+    audit_log.record(current_user.get("username"), "salary.export")
+    return StreamingResponse(
+        export.export_salaries(
+            session,
+            columns,
+            format,
+            promoted_from,
+            promoted_to,
+            include_archive,
+            settings.export_batch_size
+        ),
+        media_type=export.MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="salaries.{format}"'
+        }
+    )
 
 
 @router.get(
     "/next-pay-raise/",
     status_code=status.HTTP_200_OK
 )
+@query_budget(1)
+@access_log_sampled
 async def get_next_pay_raise(
     session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(get_current_user)
@@ -49,6 +217,12 @@ async def get_next_pay_raise(
     """
     Получает ставку и дату следующего повышения зарплаты.
 
+    Notes:
+    - При включённом `SALARY_SNAPSHOT` данные берутся из снимка в памяти
+    без обращения к базе данных.
+    - При включённом `RESPONSE_CACHE` ответ кэшируется до даты следующего
+    повышения или изменения зарплаты.
+
     Args:
     - `session`: Сеанс базы данных.
     - `current_user`: Текущий аутентифицированный пользователь.
@@ -56,19 +230,88 @@ async def get_next_pay_raise(
     Returns:
     - Словарь с текущей ставкой и датой следующего повышения зарплаты.
     """
-    salaries = await crud.get_salaries_by_username(
-        session, username=current_user.get('username')
-    )
-    if len(salaries) == 0:
+    audit_log.record(current_user.get('username'), "salary.read")
+    user_id = current_user.get("id")
+    cached = await response_cache.slot("next_pay_raise", user_id)
+    if cached.hit is not None:
+        return cached.hit
+    if salary_snapshot.loaded and user_id is not None:
+        salary = salary_snapshot.get(user_id)
+    else:
+        salaries = await crud.get_salaries_by_username(
+            session, username=current_user.get('username')
+        )
+        salary = None
+        if salaries:
+            salary = (
+                salaries[-1].current_rate,
+                salaries[-1].rate_increase_period,
+                salaries[-1].last_promotion_date
+            )
+    if salary is None:
         raise HTTPException(
             status_code=404,
             detail="You are not yet registered as an employee."
         )
 
-    return {
-        "current rate": salaries[-1].current_rate,
-        "next raise date": (
-            salaries[-1].last_promotion_date + timedelta(
-                days=salaries[-1].rate_increase_period)
-        ).strftime("%d.%m.%Y")
-    }
+    current_rate, rate_increase_period, last_promotion_date = salary
+    next_raise = last_promotion_date + timedelta(days=rate_increase_period)
+    return await cached.store(
+        {
+            "current rate": current_rate,
+            "next raise date": next_raise.strftime("%d.%m.%Y")
+        },
+        expires=next_raise
+    )
+
+
+@router.get(
+    "/raise-events/",
+    status_code=status.HTTP_200_OK
+)
+@query_budget(1)
+async def get_raise_events(
+    session: AsyncSession = Depends(get_async_session),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Поток Server-Sent Events об изменениях зарплаты текущего сотрудника.
+
+    Notes:
+    - Первым приходит событие `state` с текущей ставкой и датой следующего
+    повышения, затем `change` при изменении записи о зарплате и `raise` при
+    наступлении даты повышения. Данные событий совпадают с ответом
+    `/next-pay-raise/`.
+    - Соединение не держит сеанс базы данных: он закрывается сразу после
+    подписки.
+    - Каждые `RAISE_EVENTS_KEEPALIVE` секунд приходит комментарий-пинг,
+    чтобы прокси не закрывали молчащий поток. При отключении клиента
+    `StreamingResponse` прерывает генератор, и подписка снимается.
+
+    Args:
+    - `session`: Сеанс базы данных.
+    - `current_user`: Текущий аутентифицированный пользователь.
+
+    Returns:
+    - Поток `text/event-stream`.
+    """
+    if not settings.raise_events:
+        raise HTTPException(status_code=404, detail="Raise events disabled")
+    employee_id = current_user.get("id")
+    if employee_id is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    queue = await raise_notifier.subscribe(session, employee_id)
+    await session.close()
+
+    async def content():
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            raise_notifier.unsubscribe(employee_id, queue)
+
+    return StreamingResponse(
+        content(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,7 +1,9 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, conlist, root_validator
+
+from ..config import settings
 
 
 class SalaryBase(BaseModel):
@@ -26,7 +28,12 @@ class SalaryCreate(SalaryBase):
     Наследуется от базовой схемы `SalaryBase`.
 
     """
-    pass
+
+    def audit_details(self) -> str:
+        """
+        Новая ставка и период повышения для журнала аудита.
+        """
+        return self.json(include={"current_rate", "rate_increase_period"})
 
 
 class SalaryUpdate(SalaryBase):
@@ -66,3 +73,85 @@ class SalaryInDB(SalaryBase):
 
     class Config:
         orm_mode = True
+
+
+class RateAdjustment(BaseModel):
+    """
+    Схема массового изменения ставок.
+
+    Attributes:
+    - `percent`: Изменение ставки в процентах.
+    - `amount`: Абсолютное изменение ставки.
+    - `employee_ids`: Идентификаторы сотрудников (опционально).
+    - `min_rate`: Нижняя граница текущей ставки (опционально).
+    - `max_rate`: Верхняя граница текущей ставки (опционально).
+    - `raise_due_before`: Повышение положено до указанной даты (опционально).
+
+    Должно быть задано ровно одно из полей `percent` и `amount`.
+
+    """
+    percent: Optional[float] = None
+    amount: Optional[float] = None
+    employee_ids: Optional[list[int]] = None
+    min_rate: Optional[float] = None
+    max_rate: Optional[float] = None
+    raise_due_before: Optional[datetime] = None
+
+    def audit_details(self) -> str:
+        """
+        Параметры изменения для журнала аудита, без списка сотрудников.
+        """
+        return self.json(exclude={"employee_ids"}, exclude_none=True)
+
+    @root_validator
+    @classmethod
+    def check_change(cls, values):
+        if (values.get("percent") is None) == (values.get("amount") is None):
+            raise ValueError("Exactly one of percent and amount is required")
+        return values
+
+
+class SalaryBatchRequest(BaseModel):
+    """
+    Схема запроса текущих зарплат группы сотрудников.
+
+    Attributes:
+    - `employee_ids`: Идентификаторы сотрудников.
+    - `usernames`: Имена пользователей.
+
+    Суммарно не более `SALARY_BATCH_LIMIT` значений.
+
+    """
+    employee_ids: conlist(int, max_items=settings.salary_batch_limit) = []
+    usernames: conlist(str, max_items=settings.salary_batch_limit) = []
+
+    @root_validator
+    @classmethod
+    def check_limit(cls, values):
+        count = len(values.get("employee_ids", [])) + len(
+            values.get("usernames", [])
+        )
+        if count > settings.salary_batch_limit:
+            raise ValueError(
+                f"At most {settings.salary_batch_limit} employees per request"
+            )
+        return values
+
+
+class SalaryBatchItem(BaseModel):
+    """
+    Схема текущей зарплаты сотрудника в пакетном ответе.
+
+    Attributes:
+    - `employee_id`: Уникальный идентификатор сотрудника.
+    - `username`: Имя пользователя.
+    - `current_rate`: Текущая ставка зарплаты (нет записи - None).
+    - `rate_increase_period`: Период повышения зарплаты.
+    - `last_promotion_date`: Дата последнего повышения зарплаты.
+
+    """
+    employee_id: int
+    username: str
+    current_rate: Optional[float]
+    rate_increase_period: Optional[int]
+    last_promotion_date: Optional[datetime]
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import math
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, Optional
+
+import asyncpg
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..cache import response_cache
+from ..config import settings
+from ..database import async_session_maker, engine
+from . import models
+from .crud import is_current_salary
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "salary_changes"
+LOAD_CHUNK = 10000
+# Сотрудников в одном запросе обновления: массовые изменения присылают
+# уведомление на каждую строку, а asyncpg ограничивает число параметров.
+REFRESH_CHUNK = 5000
+
+
+class SalarySnapshot:
+    """
+    Снимок текущих зарплат в памяти процесса.
+
+    Данные хранятся в параллельных массивах, отсортированных по
+    `employee_id`: 32 байта на сотрудника, поиск двоичный. Дата последнего
+    повышения хранится как timestamp, `nan` - дата не задана.
+
+    Attributes:
+    - `loaded`: Снимок загружен и может использоваться вместо базы данных.
+    - `pending`: Сотрудники, чьи записи изменились и ждут обновления.
+    """
+
+    __slots__ = (
+        "employee_ids", "rates", "periods", "promoted", "loaded", "pending"
+    )
+
+    def __init__(self):
+        self.employee_ids = array("q")
+        self.rates = array("d")
+        self.periods = array("q")
+        self.promoted = array("d")
+        self.loaded = False
+        self.pending = set()
+
+    def __len__(self):
+        return len(self.employee_ids)
+
+    def get(
+        self, employee_id: int
+    ) -> Optional[tuple[float, int, Optional[datetime]]]:
+        """
+        Возвращает ставку, период повышения и дату последнего повышения.
+        """
+        index = bisect_left(self.employee_ids, employee_id)
+        if (
+            index == len(self.employee_ids)
+            or self.employee_ids[index] != employee_id
+        ):
+            return None
+        promoted = self.promoted[index]
+        return (
+            self.rates[index],
+            self.periods[index],
+            None if math.isnan(promoted) else datetime.fromtimestamp(promoted)
+        )
+
+    def put(
+        self,
+        employee_id: int,
+        rate: float,
+        period: int,
+        promoted: Optional[datetime]
+    ):
+        """
+        Добавляет или обновляет запись сотрудника.
+        """
+        timestamp = promoted.timestamp() if promoted else math.nan
+        index = bisect_left(self.employee_ids, employee_id)
+        if (
+            index < len(self.employee_ids)
+            and self.employee_ids[index] == employee_id
+        ):
+            self.rates[index] = rate or 0
+            self.periods[index] = period or 0
+            self.promoted[index] = timestamp
+            return
+        self.employee_ids.insert(index, employee_id)
+        self.rates.insert(index, rate or 0)
+        self.periods.insert(index, period or 0)
+        self.promoted.insert(index, timestamp)
+
+    def remove(self, employee_id: int):
+        index = bisect_left(self.employee_ids, employee_id)
+        if (
+            index < len(self.employee_ids)
+            and self.employee_ids[index] == employee_id
+        ):
+            for column in (
+                self.employee_ids, self.rates, self.periods, self.promoted
+            ):
+                del column[index]
+
+    async def load(self, session: AsyncSession):
+        """
+        Загружает все текущие зарплаты одним потоковым запросом.
+
+        Args:
+        - `session`: Сеанс базы данных.
+        """
+        fresh = SalarySnapshot()
+        result = await session.stream(
+            current_salaries().order_by(models.Salary.employee_id),
+            execution_options={"yield_per": LOAD_CHUNK}
+        )
+        async for employee_id, rate, period, promoted in result:
+            fresh.employee_ids.append(employee_id)
+            fresh.rates.append(rate or 0)
+            fresh.periods.append(period or 0)
+            fresh.promoted.append(
+                promoted.timestamp() if promoted else math.nan
+            )
+        self.employee_ids = fresh.employee_ids
+        self.rates = fresh.rates
+        self.periods = fresh.periods
+        self.promoted = fresh.promoted
+        self.loaded = True
+        logger.info("Salary snapshot loaded: %d employees", len(self))
+
+    async def refresh(self, session: AsyncSession, employee_ids: Iterable):
+        """
+        Перечитывает текущие зарплаты указанных сотрудников.
+
+        Notes:
+        - Сотрудники читаются пачками по `REFRESH_CHUNK`.
+        - После обновления сбрасывает кэш ответов этих сотрудников: ответ,
+        вычисленный по старому снимку уже после записи в базу данных, мог
+        сохраниться под новой версией кэша.
+
+        Args:
+        - `session`: Сеанс базы данных.
+        - `employee_ids`: Идентификаторы сотрудников.
+        """
+        employee_ids = sorted(set(employee_ids))
+        for start in range(0, len(employee_ids), REFRESH_CHUNK):
+            chunk = employee_ids[start:start + REFRESH_CHUNK]
+            removed = set(chunk)
+            result = await session.execute(
+                current_salaries().where(
+                    models.Salary.employee_id.in_(chunk)
+                )
+            )
+            for employee_id, rate, period, promoted in result:
+                self.put(employee_id, rate, period, promoted)
+                removed.discard(employee_id)
+            for employee_id in removed:
+                self.remove(employee_id)
+            await response_cache.invalidate(*chunk)
+
+    def on_notify(self, connection, pid, channel, payload):
+        self.pending.add(int(payload))
+
+    async def refresh_pending(self):
+        if not self.pending:
+            return
+        employee_ids, self.pending = self.pending, set()
+        try:
+            async with async_session_maker() as session:
+                await self.refresh(session, employee_ids)
+        except Exception:
+            # Повторить при следующем обновлении.
+            self.pending |= employee_ids
+            raise
+
+    async def run(self):
+        """
+        Загружает снимок и поддерживает его актуальным по `LISTEN`.
+
+        Notes:
+        - Триггер `salaries_notify` отправляет `employee_id` каждой
+        изменённой строки в канал `salary_changes`.
+        - После переподключения снимок загружается заново, чтобы не
+        пропустить изменения.
+        """
+        async def load():
+            async with async_session_maker() as session:
+                await self.load(session)
+
+        def unload():
+            self.loaded = False
+
+        await follow_changes(
+            self.on_notify, load, self.refresh_pending, unload
+        )
+
+
+async def follow_changes(
+    on_notify: Callable,
+    on_connect: Callable[[], Awaitable],
+    on_tick: Callable[[], Awaitable],
+    on_disconnect: Callable[[], None] = None
+):
+    """
+    Слушает канал `salary_changes`, переподключаясь после сбоев.
+
+    Args:
+    - `on_notify`: Обработчик уведомления asyncpg.
+    - `on_connect`: Вызывается после подписки, в том числе повторной.
+    - `on_tick`: Вызывается каждые `SALARY_SNAPSHOT_REFRESH` секунд.
+    - `on_disconnect`: Вызывается при потере соединения.
+    """
+    dsn = engine.url.set(drivername="postgresql").render_as_string(
+        hide_password=False
+    )
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(dsn)
+            await connection.add_listener(CHANNEL, on_notify)
+            await on_connect()
+            while not connection.is_closed():
+                await asyncio.sleep(settings.salary_snapshot_refresh)
+                await on_tick()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Listener on %s failed", CHANNEL)
+        finally:
+            if on_disconnect is not None:
+                on_disconnect()
+            if connection is not None:
+                await connection.close()
+        await asyncio.sleep(settings.salary_snapshot_refresh)
+
+
+def current_salaries():
+    return select(
+        models.Salary.employee_id,
+        models.Salary.current_rate,
+        models.Salary.rate_increase_period,
+        models.Salary.last_promotion_date,
+    ).where(is_current_salary())
+
+
+salary_snapshot = SalarySnapshot()
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import async_session_maker
+from .models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    """
+    Неблокирующий журнал аудита.
+
+    События складываются в ограниченную очередь в памяти и записываются в
+    базу пачками фоновой задачей. При переполнении очереди событие
+    отбрасывается и учитывается в счётчике `dropped`, запрос не ждёт.
+
+    Attributes:
+    - `queue`: Очередь событий.
+    - `batch_size`: Максимальный размер одной вставки.
+    - `written`: Количество записанных событий.
+    - `dropped`: Количество потерянных событий.
+    """
+
+    def __init__(self, maxsize: int, batch_size: int):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.written = 0
+        self.dropped = 0
+
+    def record(
+        self,
+        actor: str,
+        action: str,
+        employee_id: int = None,
+        details: str = None
+    ):
+        """
+        Добавляет событие в очередь.
+
+        Args:
+        - `actor`: Имя пользователя, выполнившего действие.
+        - `action`: Тип действия.
+        - `employee_id`: Идентификатор сотрудника (опционально).
+        - `details`: Параметры действия в JSON (опционально).
+        """
+        event = {
+            "created_at": datetime.now(),
+            "actor": actor,
+            "action": action,
+            "employee_id": employee_id,
+            "details": details,
+        }
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def flush(self, session: AsyncSession) -> int:
+        """
+        Записывает одну пачку событий многострочным INSERT.
+
+        Args:
+        - `session`: Сеанс базы данных.
+
+        Returns:
+        - Количество записанных событий.
+        """
+        batch = []
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        if not batch:
+            return 0
+        try:
+            await session.execute(insert(AuditEvent), batch)
+            await session.commit()
+        except Exception:
+            # Сеанс переиспользуется для следующих пачек.
+            await session.rollback()
+            self.dropped += len(batch)
+            logger.exception("Failed to write %d audit events", len(batch))
+            return 0
+        self.written += len(batch)
+        return len(batch)
+
+    async def flush_pending(self):
+        """
+        Записывает все накопленные события.
+        """
+        async with async_session_maker() as session:
+            while not self.queue.empty():
+                await self.flush(session)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+audit_log = AuditLog(settings.audit_queue_size, settings.audit_batch_size)
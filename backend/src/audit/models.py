@@ -0,0 +1,26 @@
+from sqlalchemy import TIMESTAMP, Column, Integer, String
+
+from ..database import Base
+
+
+class AuditEvent(Base):
+    """
+    Модель записи журнала аудита.
+
+    Attributes:
+    - `id`: Уникальный идентификатор.
+    - `created_at`: Время события.
+    - `actor`: Имя пользователя, выполнившего действие.
+    - `action`: Тип действия.
+    - `employee_id`: Идентификатор сотрудника, чьи данные затронуты.
+    - `details`: Параметры действия в JSON (опционально).
+
+    """
+    __tablename__ = "audit_events"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(TIMESTAMP, nullable=False, index=True)
+    actor = Column(String)
+    action = Column(String, nullable=False)
+    employee_id = Column(Integer, nullable=True)
+    details = Column(String, nullable=True)
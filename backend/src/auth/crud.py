@@ -1,8 +1,24 @@
-from sqlalchemy import select
+import asyncio
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..cache import LRUCache, response_cache
+from ..config import settings
 from . import models, schemas
 
+search_cache = LRUCache(
+    settings.user_search_cache_size, settings.user_search_cache_ttl
+)
+# Активность пользователей для проверки отзыва токенов.
+active_users_cache = LRUCache(
+    settings.introspection_cache_size, settings.introspection_cache_ttl
+)
+
 
 async def get_user(
     session: AsyncSession,
@@ -23,6 +39,45 @@ async def get_user(
     return result.scalars().first()
 
 
+async def get_active_user_ids(
+    session: AsyncSession,
+    user_ids: set[int]
+) -> set[int]:
+    """
+    Отбирает существующих активных пользователей.
+
+    Notes:
+    - Ответы кэшируются на `INTROSPECTION_CACHE_TTL` секунд; промахи
+    проверяются одним запросом.
+
+    Args:
+    - `session`: Сеанс базы данных.
+    - `user_ids`: Идентификаторы пользователей.
+
+    Returns:
+    - Идентификаторы активных пользователей.
+    """
+    active = set()
+    missing = set()
+    for user_id in user_ids:
+        cached = active_users_cache.get(user_id)
+        if cached is None:
+            missing.add(user_id)
+        elif cached:
+            active.add(user_id)
+    if missing:
+        result = await session.execute(
+            select(models.User.id).where(
+                models.User.id.in_(missing), models.User.is_active.is_(True)
+            )
+        )
+        found = set(result.scalars())
+        for user_id in missing:
+            active_users_cache.set(user_id, user_id in found)
+        active |= found
+    return active
+
+
 async def get_user_by_username(
     session: AsyncSession,
     username: str
@@ -63,6 +118,72 @@ async def get_users(
     return result.scalars().all()
 
 
+def escape_like(value: str) -> str:
+    # Обратная косая черта - экранирующий символ LIKE по умолчанию в
+    # PostgreSQL; явный ESCAPE помешал бы использовать индекс.
+    return (
+        value.replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+    )
+
+
+async def search_users(
+    session: AsyncSession,
+    query: str,
+    after: str = None,
+    limit: int = 20,
+    contains: bool = False
+) -> list[schemas.Users]:
+    """
+    Ищет пользователей по началу имени пользователя или электронной почты.
+
+    Notes:
+    - Поиск по префиксу без учета регистра использует индексы
+    `lower(...) text_pattern_ops`, поиск по подстроке (`contains`)
+    просматривает всю таблицу.
+    - Страницы выбираются по ключу: следующая начинается после `after`,
+    последнего имени пользователя предыдущей страницы.
+    - Первые страницы кэшируются в `search_cache` и сбрасываются при
+    создании пользователя и назначении статуса сотрудника. Вход
+    пользователя кэш не сбрасывает: входы слишком часты, поэтому
+    `last_login` в кэшированной странице может отставать на
+    `USER_SEARCH_CACHE_TTL` секунд.
+
+    Args:
+    - `session`: Сеанс базы данных.
+    - `query`: Искомая строка.
+    - `after`: Имя пользователя, после которого начинается страница.
+    - `limit`: Максимальное количество возвращаемых пользователей.
+    - `contains`: Искать подстроку, а не префикс.
+
+    Returns:
+    - Список пользователей, упорядоченный по имени пользователя.
+    """
+    pattern = escape_like(query.lower()) + "%"
+    if contains:
+        pattern = "%" + pattern
+    key = (pattern, limit)
+    if after is None:
+        users = search_cache.get(key)
+        if users is not None:
+            return users
+
+    statement = select(models.User).where(or_(
+        func.lower(models.User.username).like(pattern),
+        func.lower(models.User.email).like(pattern),
+    ))
+    if after is not None:
+        statement = statement.where(models.User.username > after)
+    result = await session.execute(
+        statement.order_by(models.User.username).limit(limit)
+    )
+    users = [schemas.Users.from_orm(user) for user in result.scalars()]
+    if after is None:
+        search_cache.set(key, users)
+    return users
+
+
 async def create_user(
     session: AsyncSession,
     user: schemas.UserCreate
@@ -78,9 +199,10 @@ async def create_user(
     - Созданный объект модели User.
     """
     db_user = models.User(username=user.username)
-    db_user.set_password(user.password)
+    await asyncio.to_thread(db_user.set_password, user.password)
     session.add(db_user)
     await session.commit()
+    search_cache.clear()
     await session.refresh(db_user)
     return db_user
 
@@ -104,5 +226,94 @@ async def set_status_staff(
     )
     db_user.is_staff = True
     await session.commit()
+    search_cache.clear()
+    await response_cache.invalidate(db_user.id)
     await session.refresh(db_user)
     return db_user
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def create_refresh_token(
+    session: AsyncSession,
+    user_id: int,
+    family: str = None
+) -> str:
+    """
+    Создает токен обновления.
+
+    Args:
+    - `session`: Сеанс базы данных.
+    - `user_id`: Идентификатор пользователя.
+    - `family`: Цепочка токенов (по умолчанию новая).
+
+    Returns:
+    - Токен обновления.
+    """
+    token = secrets.token_urlsafe(32)
+    session.add(models.RefreshToken(
+        token_hash=hash_token(token),
+        user_id=user_id,
+        family=family or uuid.uuid4().hex,
+        expires_at=datetime.now() + timedelta(
+            days=settings.refresh_token_expire
+        ),
+    ))
+    await session.commit()
+    return token
+
+
+async def use_refresh_token(
+    session: AsyncSession,
+    token: str
+):
+    """
+    Погашает токен обновления.
+
+    Notes:
+    - Токен отмечается использованным одним условным `UPDATE`, поэтому
+    одновременные запросы не смогут обменять его дважды.
+    - Повторное предъявление использованного токена означает его утечку:
+    отзывается вся цепочка.
+
+    Args:
+    - `session`: Сеанс базы данных.
+    - `token`: Токен обновления.
+
+    Returns:
+    - Строка с `user_id` и `family` или None, если токен недействителен.
+    """
+    token_hash = hash_token(token)
+    now = datetime.now()
+    result = await session.execute(
+        update(models.RefreshToken)
+        .where(
+            models.RefreshToken.token_hash == token_hash,
+            models.RefreshToken.used_at.is_(None),
+            models.RefreshToken.revoked.is_(False),
+            models.RefreshToken.expires_at > now,
+        )
+        .values(used_at=now)
+        .returning(models.RefreshToken.user_id, models.RefreshToken.family)
+        .execution_options(synchronize_session=False)
+    )
+    row = result.first()
+    if row is None:
+        result = await session.execute(
+            select(models.RefreshToken.family).where(
+                models.RefreshToken.token_hash == token_hash,
+                models.RefreshToken.used_at.is_not(None),
+            )
+        )
+        family = result.scalar()
+        if family is not None:
+            await session.execute(
+                update(models.RefreshToken)
+                .where(models.RefreshToken.family == family)
+                .values(revoked=True)
+                .execution_options(synchronize_session=False)
+            )
+    await session.commit()
+    return row
@@ -1,20 +1,20 @@
+import hmac
 from datetime import datetime, timedelta
+from typing import Optional
 
 import jwt
-from fastapi import Depends, FastAPI, HTTPException, Security, status
-from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
+from fastapi import Depends, HTTPException, Request, Security, status
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..auth import crud
+from ..auth import crud, schemas
 from ..config import settings
 from ..database import get_async_session
 
-app = FastAPI()
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+introspection_key_header = APIKeyHeader(
+    name="X-Introspection-Key", auto_error=False
+)
 
 SECRET_KEY = settings.secret_key
 ALGORITHM = "HS256"
@@ -37,6 +37,28 @@ def create_access_token(data: dict, expires_delta: timedelta):
     return jwt.encode(payload, key=SECRET_KEY, algorithm=ALGORITHM)
 
 
+def inspect_token(token: str) -> tuple[str, Optional[dict]]:
+    """
+    Проверяет подпись и срок действия токена без обращения к базе.
+
+    Args:
+    - `token`: Токен, который нужно проверить.
+
+    Returns:
+    - Статус `active`, `expired` или `invalid` и расшифрованный токен
+    (только для действительного).
+    """
+    try:
+        payload = jwt.decode(
+            token, settings.secret_key, algorithms=[ALGORITHM]
+        )
+    except jwt.ExpiredSignatureError:
+        return "expired", None
+    except jwt.InvalidTokenError:
+        return "invalid", None
+    return "active", payload
+
+
 def decode_token(token: str):
     """
     Расшифровывает токен.
@@ -53,24 +75,24 @@ def decode_token(token: str):
     - `HTTPException` с кодом состояния 401 и деталями "Invalid token" при
     недействительном токене.
     """
-    try:
-        decoded_token = jwt.decode(
-            token, settings.secret_key, algorithms=[ALGORITHM]
-        )
-        return decoded_token
-    except jwt.ExpiredSignatureError:
+    token_status, payload = inspect_token(token)
+    if token_status == "expired":
         raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.InvalidTokenError:
+    if token_status == "invalid":
         raise HTTPException(status_code=401, detail="Invalid token")
+    return payload
 
 
 def get_current_user(
+    request: Request,
     token: str = Security(oauth2_scheme),
 ) -> dict:
     """
     Получает текущего пользователя.
 
     Args:
+    - `request`: Запрос; идентификатор пользователя сохраняется в
+    `request.state` для журнала доступа.
     - `token`: Токен доступа пользователя.
 
     Returns:
@@ -84,10 +106,12 @@ def get_current_user(
     username = payload.get("username")
     if not username:
         raise HTTPException(status_code=401, detail="Invalid token")
+    request.state.user_id = payload.get("id")
     return payload
 
 
 async def get_current_user_if_staff(
+    request: Request,
     token: str = Security(oauth2_scheme),
     session: AsyncSession = Depends(get_async_session),
 ) -> dict:
@@ -95,6 +119,8 @@ async def get_current_user_if_staff(
     Проверяет токен текущего юзера и статус staff.
 
     Args:
+    - `request`: Запрос; идентификатор пользователя сохраняется в
+    `request.state` для журнала доступа.
     - `token`: Токен доступа сотрудника.
     - `session`: Сессия базы данных.
 
@@ -111,6 +137,7 @@ async def get_current_user_if_staff(
     username = payload.get("username")
     if not username:
         raise HTTPException(status_code=401, detail="Invalid token")
+    request.state.user_id = payload.get("id")
 
     db_user = await crud.get_user_by_username(session, username=username)
     if not db_user.is_staff:
@@ -119,3 +146,80 @@ async def get_current_user_if_staff(
             detail="User is not a staff member"
         )
     return payload
+
+
+def verify_introspection_key(
+    key: str = Security(introspection_key_header),
+):
+    """
+    Проверяет ключ сервиса, запрашивающего проверку токенов.
+
+    Args:
+    - `key`: Значение заголовка `X-Introspection-Key`.
+
+    Exception:
+    - `HTTPException` с кодом состояния 404, если `INTROSPECTION_KEY` не
+    задан.
+    - `HTTPException` с кодом состояния 401 и деталями
+    "Invalid introspection key" при неверном ключе.
+    """
+    if not settings.introspection_key:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not key or not hmac.compare_digest(
+        key.encode(), settings.introspection_key.encode()
+    ):
+        raise HTTPException(
+            status_code=401, detail="Invalid introspection key"
+        )
+
+
+async def introspect_tokens(
+    session: AsyncSession,
+    tokens: list[str],
+    check_revoked: bool = False
+) -> list[schemas.TokenStatus]:
+    """
+    Проверяет пачку токенов доступа по тем же правилам, что и
+    `get_current_user`.
+
+    Notes:
+    - Повторяющиеся токены проверяются один раз.
+    - К базе обращается только проверка отзыва, одним запросом на пачку и
+    с кэшем.
+
+    Args:
+    - `session`: Сеанс базы данных.
+    - `tokens`: Токены доступа.
+    - `check_revoked`: Считать отозванными токены удаленных и неактивных
+    пользователей.
+
+    Returns:
+    - Результаты проверки в порядке токенов.
+    """
+    checked = {}
+    for token in tokens:
+        if token in checked:
+            continue
+        token_status, payload = inspect_token(token)
+        if payload is not None and not payload.get("username"):
+            token_status, payload = "invalid", None
+        checked[token] = (token_status, payload)
+
+    if check_revoked:
+        user_ids = {
+            payload.get("id") for _, payload in checked.values()
+            if payload is not None
+        }
+        active = await crud.get_active_user_ids(session, user_ids)
+        for token, (_, payload) in checked.items():
+            if payload is not None and payload.get("id") not in active:
+                checked[token] = ("revoked", None)
+
+    return [
+        schemas.TokenStatus(
+            active=token_status == "active",
+            status=token_status,
+            claims=payload,
+        )
+        for token_status, payload in map(checked.get, tokens)
+    ]
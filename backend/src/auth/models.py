@@ -1,12 +1,11 @@
 from datetime import datetime
 
-from passlib.context import CryptContext
-from sqlalchemy import TIMESTAMP, Boolean, Column, Integer, String
+from sqlalchemy import (TIMESTAMP, BigInteger, Boolean, Column, ForeignKey,
+                        Index, Integer, String, func)
 from sqlalchemy.orm import Session, relationship
 
-from ..database import Base
-
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from ..database import Base, CurrentTransaction, NextChange
+from .passwords import get_password_context
 
 
 class User(Base):
@@ -21,10 +20,12 @@ class User(Base):
     - `last_login`: Дата последней авторизации пользователя.
     - `is_active`: Флаг активности пользователя.
     - `is_staff`: Флаг принадлежности пользователя к персоналу.
+    - `change_seq`: Номер последнего изменения строки.
+    - `change_xid`: Транзакция последнего изменения строки.
 
     Relationships:
     - `salaries`: Связь с моделью `Salary`, обратное отношение
-    "один ко многим".
+    "один ко многим". Загружается только явно (`lazy="raise"`).
 
     Methods:
     - `set_password()`: Задает хэш пароля пользователя.
@@ -33,6 +34,19 @@ class User(Base):
 
     """
     __tablename__ = "users"
+    __table_args__ = (
+        Index(
+            "ix_users_username_pattern",
+            func.lower(Column("username")).label("username_lower"),
+            postgresql_ops={"username_lower": "text_pattern_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_users_email_pattern",
+            func.lower(Column("email")).label("email_lower"),
+            postgresql_ops={"email_lower": "text_pattern_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_users_change_xid_change_seq", "change_xid", "change_seq"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
@@ -44,8 +58,21 @@ class User(Base):
     is_active = Column(Boolean(), default=True)
     is_staff = Column(Boolean(), default=False)
 
+    change_seq = Column(
+        BigInteger,
+        default=NextChange(),
+        onupdate=NextChange(),
+        nullable=False
+    )
+    change_xid = Column(
+        BigInteger,
+        server_default=CurrentTransaction(),
+        onupdate=CurrentTransaction(),
+        nullable=False
+    )
+
     salaries = relationship(
-        "Salary", back_populates="employee"
+        "Salary", back_populates="employee", lazy="raise"
     )
 
     def set_password(self, password: str):
@@ -58,24 +85,38 @@ class User(Base):
         Returns:
         - None.
         """
-        self.hashed_password = password_context.hash(password)
+        self.hashed_password = get_password_context().hash(password)
 
     def check_password(self, password: str) -> bool:
         """
         Проверяет соответствие пароля хэшу.
 
+        Notes:
+        - Если хэш создан по устаревшей политике (`PASSWORD_HASH_ROUNDS`),
+        он пересчитывается; изменение сохраняется вместе с `login()`.
+
         Args:
         - `password`: Пароль для проверки.
 
         Returns:
         - True, если пароль соответствует хэшу, иначе False.
         """
-        return password_context.verify(password, self.hashed_password)
+        valid, new_hash = get_password_context().verify_and_update(
+            password, self.hashed_password
+        )
+        if new_hash is not None:
+            self.hashed_password = new_hash
+        return valid
 
     async def login(self, session: Session):
         """
         Выполняет операцию авторизации пользователя.
 
+        Notes:
+        - `change_seq` и `change_xid` сохраняют прежние значения: вход не
+        считается изменением строки для ленты `/changes/`. Новый хэш пароля
+        после `check_password()` записывается тем же UPDATE.
+
         Args:
         - `db`: Сессия базы данных.
 
@@ -83,5 +124,32 @@ class User(Base):
         - None.
         """
         self.last_login = datetime.now()
+        self.change_seq = User.change_seq
+        self.change_xid = User.change_xid
         session.add(self)
         await session.commit()
+
+
+class RefreshToken(Base):
+    """
+    Модель токена обновления.
+
+    Attributes:
+    - `id`: Уникальный идентификатор.
+    - `token_hash`: SHA-256 от токена, сам токен не хранится.
+    - `user_id`: Идентификатор пользователя.
+    - `family`: Цепочка токенов, выданных с одного входа.
+    - `expires_at`: Время истечения срока действия.
+    - `used_at`: Время обмена на новую пару токенов.
+    - `revoked`: Флаг отзыва токена.
+
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String, unique=True, index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    family = Column(String, index=True, nullable=False)
+    expires_at = Column(TIMESTAMP, nullable=False)
+    used_at = Column(TIMESTAMP)
+    revoked = Column(Boolean(), default=False)
@@ -0,0 +1,111 @@
+import argparse
+import functools
+import statistics
+import time
+
+from ..config import settings
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 20
+SAMPLES = 3
+
+
+def make_context(rounds: int):
+    """
+    Создает политику хэширования паролей: bcrypt с заданной стоимостью.
+
+    Notes:
+    - Хэши с другой стоимостью считаются устаревшими (`needs_update`) и
+    пересчитываются при входе пользователя.
+
+    Args:
+    - `rounds`: Стоимость bcrypt (логарифм числа раундов).
+
+    Returns:
+    - Контекст passlib `CryptContext`.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_password_context():
+    """
+    Возвращает политику хэширования из настроек.
+
+    Notes:
+    - passlib и bcrypt загружаются при первой проверке пароля, а не при
+    старте приложения.
+    """
+    return make_context(settings.password_hash_rounds)
+
+
+def verify_time(rounds: int, samples: int = SAMPLES) -> float:
+    """
+    Измеряет время проверки пароля с заданной стоимостью.
+
+    Returns:
+    - Медиана времени проверки в секундах.
+    """
+    context = make_context(rounds)
+    hashed = context.hash("calibration")
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.verify("calibration", hashed)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, samples: int = SAMPLES) -> tuple[int, dict]:
+    """
+    Подбирает стоимость хэширования под целевое время проверки пароля.
+
+    Notes:
+    - Каждый шаг стоимости удваивает время, поэтому перебор
+    останавливается на первой стоимости дороже цели.
+    - Проверка пароля занимает ядро процессора на всё целевое время.
+    Вход и регистрация выполняют её в пуле потоков (`asyncio.to_thread`):
+    в цикле событий проверка в 250 мс останавливала бы на 250 мс все
+    запросы процесса. Пул потоков общий и ограничен, поэтому пропускная
+    способность входа - примерно число ядер, делённое на цель.
+
+    Args:
+    - `target_ms`: Целевое время проверки одного пароля в мс.
+    - `samples`: Количество замеров на стоимость.
+
+    Returns:
+    - Наибольшая стоимость, укладывающаяся в цель (не меньше
+    `MIN_ROUNDS`), и замеры в мс по стоимостям.
+    """
+    timings = {}
+    chosen = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        timings[rounds] = verify_time(rounds, samples) * 1000
+        if timings[rounds] > target_ms:
+            break
+        chosen = rounds
+    return chosen, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Подбирает стоимость хэширования паролей под целевое "
+                    "время проверки на текущем оборудовании."
+    )
+    parser.add_argument(
+        "--target-ms", type=float, default=settings.password_verify_target_ms
+    )
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    args = parser.parse_args()
+    rounds, timings = calibrate(args.target_ms, args.samples)
+    for cost, elapsed in timings.items():
+        print(f"rounds {cost:2d}: {elapsed:8.1f} ms")
+    print(f"PASSWORD_HASH_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
+import asyncio
 from datetime import timedelta
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..cache import response_cache
 from ..config import settings
-from ..database import get_async_session
+from ..database import SessionRoute, get_async_session
+from ..ops.access_log import access_log_sampled
+from ..ops.queries import query_budget
 from . import crud, schemas
 from .middleware import (create_access_token, get_current_user,
-                         get_current_user_if_staff)
+                         get_current_user_if_staff, introspect_tokens,
+                         verify_introspection_key)
 
-router = APIRouter()
+router = APIRouter(route_class=SessionRoute)
 
 
 @router.post(
@@ -17,6 +23,7 @@ router = APIRouter()
     response_model=schemas.User,
     status_code=status.HTTP_201_CREATED
 )
+@query_budget(3)
 async def register(
     user: schemas.UserCreate,
     session: AsyncSession = Depends(get_async_session)
@@ -44,20 +51,51 @@ async def register(
     return await crud.create_user(session=session, user=user)
 
 
+async def issue_tokens(
+    session: AsyncSession,
+    db_user,
+    family: str = None
+) -> schemas.Token:
+    """
+    Выдает пару из короткоживущего токена доступа и токена обновления.
+
+    Args:
+    - `session`: Сессия базы данных.
+    - `db_user`: Объект модели User.
+    - `family`: Цепочка токенов обновления (по умолчанию новая).
+
+    Returns:
+    - Токены доступа и обновления и тип токена.
+    """
+    access_token = create_access_token(
+        {"id": db_user.id, "username": db_user.username},
+        timedelta(minutes=settings.access_token_expire)
+    )
+    refresh_token = await crud.create_refresh_token(
+        session, user_id=db_user.id, family=family
+    )
+    return schemas.Token(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        token_type="Bearer"
+    )
+
+
 @router.post("/login/")
+@query_budget(3)
 async def login(
     user: schemas.UserLogin,
     session: AsyncSession = Depends(get_async_session)
 ):
     """
-    Аутентификация пользователя и генерация токена доступа.
+    Аутентификация пользователя и генерация токенов доступа и обновления.
 
     Args:
     - `user`: Схема данных пользователя для аутентификации.
     - `session`: Сессия базы данных.
 
     Returns:
-    - Токен доступа и тип токена.
+    - Токены доступа и обновления и тип токена.
 
     Raises:
     - `HTTPException` с кодом состояния 404 и деталями "User not found",
@@ -67,24 +105,73 @@ async def login(
     """
     db_user = await crud.get_user_by_username(session, username=user.username)
 
-    await db_user.login(session)
-
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    if not db_user.check_password(user.password):
+    # Хэширование занимает сотни миллисекунд и не должно блокировать цикл
+    # событий.
+    if not await asyncio.to_thread(db_user.check_password, user.password):
         raise HTTPException(status_code=401, detail="Invalid password")
 
-    user = {"username": user.username, "password": user.password}
+    await db_user.login(session)
+    return await issue_tokens(session, db_user)
 
-    access_token = create_access_token(
-        user,
-        timedelta(minutes=settings.access_token_expire)
-    )
-    return schemas.Token(
-        access_token=access_token,
-        token_type="Bearer"
-    )
+
+@router.post("/refresh/")
+@query_budget(3)
+async def refresh(
+    data: schemas.TokenRefresh,
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Обменивает токен обновления на новую пару токенов без проверки пароля.
+
+    Args:
+    - `data`: Схема с токеном обновления.
+    - `session`: Сессия базы данных.
+
+    Returns:
+    - Новые токены доступа и обновления и тип токена.
+
+    Raises:
+    - `HTTPException` с кодом состояния 401 и деталями
+    "Invalid refresh token", если токен неизвестен, истек, отозван или уже
+    был использован (в последнем случае отзывается вся цепочка).
+    """
+    refresh_token = await crud.use_refresh_token(session, data.refresh_token)
+    if refresh_token is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    db_user = await crud.get_user(session, user_id=refresh_token.user_id)
+    return await issue_tokens(session, db_user, family=refresh_token.family)
+
+
+@router.post(
+    "/introspect/",
+    response_model=list[schemas.TokenStatus],
+    dependencies=[Depends(verify_introspection_key)]
+)
+@query_budget(1)
+async def introspect(
+    data: schemas.TokenIntrospect,
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Проверяет пачку токенов доступа для других сервисов.
+
+    Сервис передает ключ `INTROSPECTION_KEY` в заголовке
+    `X-Introspection-Key`. Подпись и срок действия проверяются без
+    обращения к базе; при `check_revoked` дополнительно проверяется, что
+    пользователь существует и активен.
+
+    Args:
+    - `data`: Схема с токенами и флагом проверки отзыва.
+    - `session`: Сессия базы данных.
+
+    Returns:
+    - Статус и содержимое каждого токена в порядке запроса.
+    """
+    return await introspect_tokens(session, data.tokens, data.check_revoked)
 
 
 @router.get(
@@ -92,6 +179,7 @@ async def login(
     response_model=list[schemas.Users],
     dependencies=[Depends(get_current_user_if_staff)]
 )
+@query_budget(2)
 async def read_users(
     skip: int = 0,
     limit: int = 20,
@@ -112,7 +200,50 @@ async def read_users(
     return await crud.get_users(session, skip=skip, limit=limit)
 
 
+@router.get(
+    "/users/search/",
+    response_model=list[schemas.Users],
+    dependencies=[Depends(get_current_user_if_staff)]
+)
+@query_budget(2)
+async def search_users(
+    q: str = Query(min_length=1, max_length=64),
+    after: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    contains: bool = False,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Ищет пользователей по началу имени пользователя или электронной почты.
+
+    Notes:
+    - Поиск по префиксу использует индексы, поиск по подстроке
+    (`contains`) просматривает всю таблицу пользователей и подходит только
+    для редких запросов.
+    - Первые страницы кэшируются на `USER_SEARCH_CACHE_TTL` секунд и
+    сбрасываются при создании пользователя и назначении статуса
+    сотрудника. Вход пользователя кэш не сбрасывает, поэтому `last_login`
+    может отставать на время жизни кэша.
+
+    Args:
+    - `q`: Искомая строка, регистр не учитывается.
+    - `after`: Имя пользователя последней записи предыдущей страницы.
+    - `limit`: Максимальное количество записей, которое следует вернуть
+    (по умолчанию 20).
+    - `contains`: Искать подстроку, а не префикс (полный просмотр таблицы).
+    - `session`: Сессия базы данных.
+
+    Returns:
+    - Список пользователей, упорядоченный по имени пользователя.
+    """
+    return await crud.search_users(
+        session, q, after=after, limit=limit, contains=contains
+    )
+
+
 @router.get("/users/me/", response_model=schemas.User)
+@query_budget(1)
+@access_log_sampled
 async def read_user(
     session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(get_current_user)
@@ -124,6 +255,10 @@ async def read_user(
     - `session`: Сессия базы данных.
     - `current_user`: Текущий пользователь.
 
+    Notes:
+    - При включённом `RESPONSE_CACHE` ответ кэшируется до изменения
+    пользователя.
+
     Returns:
     - Данные пользователя с указанным идентификатором.
 
@@ -136,18 +271,22 @@ async def read_user(
     if not current_user:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
+    cached = await response_cache.slot("users_me", current_user.get("id"))
+    if cached.hit is not None:
+        return cached.hit
     db_user = await crud.get_user_by_username(
         session, username=current_user.get('username')
     )
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return db_user
+    return await cached.store(schemas.User.from_orm(db_user))
 
 
 @router.patch(
     "/users/get-staff-status/",
     status_code=status.HTTP_200_OK
 )
+@query_budget(3)
 async def get_staff(
     code: dict,
     session: AsyncSession = Depends(get_async_session),
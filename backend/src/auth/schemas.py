@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, conlist
+
+from ..config import settings
 
 
 class UserBase(BaseModel):
@@ -82,8 +84,51 @@ class Token(BaseModel):
 
     Attributes:
     - `access_token`: Токен доступа.
+    - `refresh_token`: Токен обновления.
     - `token_type`: Тип токена.
 
     """
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str
+
+
+class TokenRefresh(BaseModel):
+    """
+    Схема данных для обновления токена доступа.
+
+    Attributes:
+    - `refresh_token`: Токен обновления.
+
+    """
+    refresh_token: str
+
+
+class TokenIntrospect(BaseModel):
+    """
+    Схема запроса проверки пачки токенов доступа.
+
+    Attributes:
+    - `tokens`: Токены доступа, не более `INTROSPECTION_BATCH_LIMIT`.
+    - `check_revoked`: Проверить, что пользователь существует и активен.
+
+    """
+    tokens: conlist(
+        str, min_items=1, max_items=settings.introspection_batch_limit
+    )
+    check_revoked: bool = False
+
+
+class TokenStatus(BaseModel):
+    """
+    Схема результата проверки токена доступа.
+
+    Attributes:
+    - `active`: Токен действителен.
+    - `status`: `active`, `expired`, `invalid` или `revoked`.
+    - `claims`: Содержимое токена (только для действительного).
+
+    """
+    active: bool
+    status: Literal["active", "expired", "invalid", "revoked"]
+    claims: Optional[dict] = None
@@ -0,0 +1,531 @@
+import abc
+import asyncio
+import json
+import logging
+import secrets
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Hashable, Optional
+from urllib.parse import unquote, urlsplit
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Небольшой кэш в памяти процесса с вытеснением давно не используемых
+    записей и ограниченным временем жизни.
+
+    Attributes:
+    - `maxsize`: Максимальное количество записей.
+    - `ttl`: Время жизни записи в секундах (0 - без ограничения).
+    - `hits`: Количество попаданий.
+    - `misses`: Количество промахов.
+    """
+
+    def __init__(self, maxsize: int, ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Возвращает значение по ключу и помечает запись использованной.
+        """
+        value, expires = self._data.get(key, (_MISSING, 0))
+        if value is _MISSING or (expires and expires < time.monotonic()):
+            if value is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        """
+        Сохраняет значение, вытесняя самую давнюю запись при переполнении.
+
+        Args:
+        - `key`: Ключ.
+        - `value`: Значение.
+        - `ttl`: Время жизни записи в секундах (по умолчанию `self.ttl`).
+        """
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else 0
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
+
+
+class CacheError(Exception):
+    """
+    Ошибка хранилища кэша.
+    """
+
+
+# Сбои хранилища, при которых кэш пропускается, а запрос обслуживается
+# без него.
+CACHE_ERRORS = (CacheError, OSError, EOFError, asyncio.TimeoutError)
+
+
+class CacheBackend(abc.ABC):
+    """
+    Хранилище общего кэша: байтовые значения по строковым ключам.
+
+    Наследники обязаны реализовать `get_many()`, `set()` и `delete()`.
+    """
+
+    name = None
+
+    @abc.abstractmethod
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        """
+        Возвращает значения ключей, None - для отсутствующих.
+        """
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return (await self.get_many([key]))[0]
+
+    @abc.abstractmethod
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: float = 0,
+        only_new: bool = False
+    ) -> bool:
+        """
+        Сохраняет значение.
+
+        Args:
+        - `key`: Ключ.
+        - `value`: Значение.
+        - `ttl`: Время жизни в секундах (0 - без ограничения).
+        - `only_new`: Не перезаписывать существующее значение.
+
+        Returns:
+        - True, если значение сохранено.
+        """
+
+    @abc.abstractmethod
+    async def delete(self, *keys: str):
+        """
+        Удаляет ключи.
+        """
+
+    async def close(self):
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Хранилище в памяти процесса на основе `LRUCache`.
+
+    Notes:
+    - У каждого процесса свой кэш и свои версии данных: сброс на одном
+    экземпляре приложения не виден остальным.
+    """
+
+    name = "memory"
+
+    def __init__(self, maxsize: int):
+        self.entries = LRUCache(maxsize)
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        return [self.entries.get(key) for key in keys]
+
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: float = 0,
+        only_new: bool = False
+    ) -> bool:
+        if only_new and self.entries.get(key) is not None:
+            return False
+        self.entries.set(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self.entries.delete(key)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Хранилище на сервере с протоколом Redis (RESP): Redis, Valkey,
+    KeyDB и совместимые.
+
+    Notes:
+    - Используются только команды `GET`, `MGET`, `SET` и `DEL`.
+    - Соединения переиспользуются, не больше `pool_size` простаивающих.
+    - Каждая команда ограничена `timeout` секунд; соединение с
+    прерванной командой закрывается.
+
+    Args:
+    - `url`: `redis://[[user]:password@]host[:port][/db]`.
+    - `timeout`: Таймаут подключения и команды в секундах.
+    - `pool_size`: Количество простаивающих соединений.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, timeout: float, pool_size: int = 10):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle = []
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        return await self.execute("MGET", *keys)
+
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: float = 0,
+        only_new: bool = False
+    ) -> bool:
+        args = ["SET", key, value]
+        if ttl:
+            args += ["PX", max(int(ttl * 1000), 1)]
+        if only_new:
+            args.append("NX")
+        return await self.execute(*args) == "OK"
+
+    async def delete(self, *keys: str):
+        await self.execute("DEL", *keys)
+
+    async def execute(self, *args):
+        """
+        Выполняет команду.
+
+        Returns:
+        - Ответ сервера: строка, число, байты, None или список.
+
+        Raises:
+        - `CacheError` при ответе-ошибке сервера.
+        - `OSError`, `EOFError`, `asyncio.TimeoutError` при сбое
+        соединения.
+        """
+        connection = self._idle.pop() if self._idle else None
+        try:
+            if connection is None:
+                connection = await asyncio.wait_for(
+                    self.connect(), self.timeout
+                )
+            reply = await asyncio.wait_for(
+                self.call(connection, args), self.timeout
+            )
+        except BaseException:
+            if connection is not None:
+                connection[1].close()
+            raise
+        if len(self._idle) < self.pool_size:
+            self._idle.append(connection)
+        else:
+            connection[1].close()
+        return reply
+
+    async def connect(self):
+        connection = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.password:
+                credentials = [self.password]
+                if self.username:
+                    credentials.insert(0, self.username)
+                await self.call(connection, ["AUTH", *credentials])
+            if self.db:
+                await self.call(connection, ["SELECT", self.db])
+        except BaseException:
+            connection[1].close()
+            raise
+        return connection
+
+    @classmethod
+    async def call(cls, connection, args):
+        reader, writer = connection
+        writer.write(cls.encode(args))
+        await writer.drain()
+        return await cls.read_reply(reader)
+
+    @staticmethod
+    def encode(args) -> bytes:
+        chunks = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            chunks.append(b"$%d\r\n%b\r\n" % (len(arg), arg))
+        return b"".join(chunks)
+
+    @classmethod
+    async def read_reply(cls, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise EOFError("Connection closed")
+        kind, value = line[:1], line[1:-2]
+        if kind == b"+":
+            return value.decode()
+        if kind == b"-":
+            raise CacheError(value.decode())
+        if kind == b":":
+            return int(value)
+        if kind == b"$":
+            if int(value) < 0:
+                return None
+            return (await reader.readexactly(int(value) + 2))[:-2]
+        if kind == b"*":
+            if int(value) < 0:
+                return None
+            return [await cls.read_reply(reader) for _ in range(int(value))]
+        raise CacheError(f"Unexpected reply: {line!r}")
+
+    async def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+class CacheSlot:
+    """
+    Место ответа в кэше, найденное `ResponseCache.slot()`.
+
+    Attributes:
+    - `hit`: Ответ из кэша или None при промахе.
+    """
+
+    def __init__(self, cache: "ResponseCache", name: str, key: str = None):
+        self.cache = cache
+        self.name = name
+        self.key = key
+        self.hit = None
+
+    async def store(self, content: Any, expires: datetime = None) -> Response:
+        """
+        Сохраняет ответ в кэш.
+
+        Args:
+        - `content`: Данные ответа, кодируемые в JSON.
+        - `expires`: Момент, когда ответ устареет без записи в базу данных;
+        время жизни записи не больше `RESPONSE_CACHE_TTL`.
+
+        Returns:
+        - JSON-ответ.
+        """
+        body = json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            separators=(",", ":")
+        ).encode()
+        if self.key is None:
+            return Response(body, media_type="application/json")
+        ttl = self.cache.ttl
+        if expires is not None and expires > datetime.now():
+            ttl = min(ttl, (expires - datetime.now()).total_seconds())
+        try:
+            await self.cache.backend.set(self.key, body, ttl)
+        except CACHE_ERRORS:
+            self.cache.failed("store")
+        return self.cache.response(body, "miss")
+
+
+class ResponseCache:
+    """
+    Кэш ответов для чтения данных пользователя.
+
+    Ключ записи включает версию данных пользователя и общую версию.
+    Версия - случайная метка в хранилище; запись в базу данных удаляет
+    метку (`invalidate()`), и старые записи становятся недоступны, а
+    следующее чтение создает новую. Так сброс виден всем экземплярам
+    приложения с общим хранилищем, а вытеснение метки не может вернуть
+    устаревший ответ.
+
+    Notes:
+    - Версия читается до обращения к базе данных, поэтому ответ,
+    вычисленный одновременно с записью, сохраняется под старой версией и
+    не будет прочитан. Это верно только для ответов из базы данных: ответ
+    из снимка зарплат (`SALARY_SNAPSHOT`) может быть старше версии, пока
+    снимок не обновлён, поэтому `SalarySnapshot.refresh()` сбрасывает
+    версии обновлённых сотрудников ещё раз.
+    - При сбое хранилища запрос обслуживается без кэша, а ошибка
+    учитывается в `errors`; несработавший сброс оставляет старые ответы
+    до истечения их времени жизни.
+
+    Attributes:
+    - `backend`: Хранилище.
+    - `ttl`: Наибольшее время жизни записи в секундах.
+    - `enabled`: Кэш включен.
+    - `hits`, `misses`: Попадания и промахи по видам ответов.
+    - `errors`: Количество сбоев хранилища.
+    - `invalidations`: Количество сбросов.
+    """
+
+    prefix = "paychecks:"
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = Counter()
+        self.misses = Counter()
+        self.errors = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_settings(cls):
+        url = settings.response_cache_url
+        scheme = urlsplit(url).scheme
+        if scheme == "memory":
+            backend = MemoryBackend(settings.response_cache_size)
+        elif scheme == "redis":
+            backend = RedisBackend(url, settings.response_cache_timeout)
+        else:
+            raise ValueError(f"Unsupported RESPONSE_CACHE_URL: {url}")
+        return cls(
+            backend, settings.response_cache_ttl, settings.response_cache
+        )
+
+    def version_key(self, user_id: int = None) -> str:
+        return f"{self.prefix}version:{'*' if user_id is None else user_id}"
+
+    async def version(self, user_id: int) -> Optional[str]:
+        """
+        Возвращает версию данных пользователя, создавая недостающие метки.
+
+        Returns:
+        - Общая версия и версия пользователя или None, если метку
+        удалили во время создания.
+        """
+        keys = [self.version_key(), self.version_key(user_id)]
+        tokens = await self.backend.get_many(keys)
+        for index, token in enumerate(tokens):
+            if token is None:
+                token = secrets.token_hex(8).encode()
+                created = await self.backend.set(
+                    keys[index], token, only_new=True
+                )
+                if not created:
+                    token = await self.backend.get(keys[index])
+                if token is None:
+                    return None
+            tokens[index] = token
+        return b":".join(tokens).decode()
+
+    async def slot(self, name: str, user_id: Optional[int]) -> CacheSlot:
+        """
+        Ищет ответ в кэше.
+
+        Args:
+        - `name`: Вид ответа.
+        - `user_id`: Идентификатор пользователя; без него кэш не
+        используется.
+
+        Returns:
+        - Место ответа: `hit` с ответом из кэша или `store()` для
+        сохранения вычисленного ответа.
+        """
+        if not self.enabled or user_id is None:
+            return CacheSlot(self, name)
+        try:
+            version = await self.version(user_id)
+            if version is None:
+                return CacheSlot(self, name)
+            slot = CacheSlot(
+                self, name, f"{self.prefix}{name}:{user_id}:{version}"
+            )
+            body = await self.backend.get(slot.key)
+        except CACHE_ERRORS:
+            self.failed("lookup")
+            return CacheSlot(self, name)
+        if body is None:
+            self.misses[name] += 1
+        else:
+            self.hits[name] += 1
+            slot.hit = self.response(body, "hit")
+        return slot
+
+    async def invalidate(self, *user_ids: int):
+        """
+        Сбрасывает ответы пользователей, а без `user_ids` - все ответы.
+        """
+        if not self.enabled:
+            return
+        keys = [self.version_key(user_id) for user_id in user_ids]
+        try:
+            await self.backend.delete(*(keys or [self.version_key()]))
+        except CACHE_ERRORS:
+            self.failed("invalidation")
+            return
+        self.invalidations += 1
+
+    @staticmethod
+    def response(body: bytes, state: str) -> Response:
+        return Response(
+            body, media_type="application/json", headers={"X-Cache": state}
+        )
+
+    def failed(self, operation: str):
+        self.errors += 1
+        logger.warning(
+            "Response cache %s failed", operation, exc_info=True
+        )
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> dict:
+        def ratio(hits: int, misses: int) -> float:
+            return round(hits / (hits + misses), 4) if hits + misses else 0
+
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {
+            "backend": self.backend.name,
+            "enabled": self.enabled,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": ratio(hits, misses),
+            "errors": self.errors,
+            "invalidations": self.invalidations,
+            "responses": {
+                name: {
+                    "hits": self.hits[name],
+                    "misses": self.misses[name],
+                    "hit_ratio": ratio(self.hits[name], self.misses[name]),
+                }
+                for name in sorted(set(self.hits) | set(self.misses))
+            },
+        }
+
+
+response_cache = ResponseCache.from_settings()
@@ -0,0 +1,126 @@
+import heapq
+from itertools import islice
+
+from sqlalchemy import or_, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..api import models as salary_models
+from ..auth import models as user_models
+
+USER_COLUMNS = (
+    "id", "username", "email", "is_active", "is_staff",
+)
+SALARY_COLUMNS = (
+    "id", "employee_id", "current_rate", "rate_increase_period",
+    "last_promotion_date",
+)
+
+
+async def read_watermark(session: AsyncSession) -> tuple | None:
+    """
+    Получает границу завершённых транзакций.
+
+    Notes:
+    - Граница - наименьшая транзакция, которая ещё идёт: все транзакции с
+    меньшим идентификатором уже зафиксированы или отменены, их строки
+    больше не появятся задним числом.
+    - Свои изменения транзакция видит всегда, поэтому вместе с границей
+    возвращается идентификатор текущей транзакции, если он уже выдан.
+    - В SQLite транзакции не пересекаются, граница не нужна (None).
+
+    Args:
+    - `session`: Сеанс базы данных.
+
+    Returns:
+    - Пара (граница, текущая транзакция или None) или None.
+    """
+    if session.bind.dialect.name != "postgresql":
+        return None
+    result = await session.execute(text(
+        "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint, "
+        "pg_current_xact_id_if_assigned()::text::bigint"
+    ))
+    return tuple(result.one())
+
+
+async def read_table_changes(
+    session: AsyncSession,
+    model,
+    columns: tuple,
+    since: tuple[int, int],
+    watermark: tuple | None,
+    limit: int
+) -> list[dict]:
+    table = model.__table__
+    cursor = tuple_(table.c.change_xid, table.c.change_seq)
+    query = (
+        select(
+            table.c.change_xid, table.c.change_seq,
+            *(table.c[c] for c in columns)
+        )
+        .where(cursor > tuple_(*since))
+        .order_by(table.c.change_xid, table.c.change_seq)
+        .limit(limit)
+    )
+    if watermark is not None:
+        xmin, current = watermark
+        query = query.where(
+            or_(table.c.change_xid < xmin, table.c.change_xid == current)
+        )
+    result = await session.execute(query)
+    return [
+        {
+            "xid": row["change_xid"],
+            "seq": row["change_seq"],
+            "table": table.name,
+            "row": {c: row[c] for c in columns},
+        }
+        for row in result.mappings()
+    ]
+
+
+async def get_changes(
+    session: AsyncSession,
+    since: tuple[int, int],
+    limit: int
+) -> list[dict]:
+    """
+    Получает строки `users` и `salaries`, изменённые после курсора.
+
+    Notes:
+    - Строка помечается транзакцией (`change_xid`) и номером изменения
+    (`change_seq`), лента упорядочена по паре. Номер выдаётся при записи,
+    а не при фиксации, поэтому сам по себе он не годится для курсора.
+    - В ленту попадают только строки транзакций старше границы
+    `read_watermark()`: строки незавершённых транзакций появятся после их
+    завершения, уже после курсора, и не будут пропущены.
+    - Граница читается один раз до обеих таблиц; каждая таблица читается
+    по индексу `(change_xid, change_seq)` не больше `limit` строк,
+    результаты сливаются по курсору.
+    - Строка попадает в ленту один раз, с последними значениями, даже если
+    менялась несколько раз.
+    - Вход пользователя (`last_login`) изменением не считается.
+    - Удаление строк (перенос в архив) в ленту не попадает.
+
+    Args:
+    - `session`: Сеанс базы данных.
+    - `since`: Курсор, пара (транзакция, номер) последнего полученного
+    изменения.
+    - `limit`: Максимальное количество изменений.
+
+    Returns:
+    - Список словарей `xid`, `seq`, `table`, `row`, упорядоченный по
+    паре (`xid`, `seq`).
+    """
+    watermark = await read_watermark(session)
+    users = await read_table_changes(
+        session, user_models.User, USER_COLUMNS, since, watermark, limit
+    )
+    salaries = await read_table_changes(
+        session, salary_models.Salary, SALARY_COLUMNS, since, watermark,
+        limit
+    )
+    changes = heapq.merge(
+        users, salaries, key=lambda change: (change["xid"], change["seq"])
+    )
+    return list(islice(changes, limit))
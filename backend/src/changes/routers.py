@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..audit.log import audit_log
+from ..auth.middleware import get_current_user_if_staff
+from ..config import settings
+from ..database import SessionRoute, get_async_session
+from ..ops.queries import query_budget
+from . import crud, schemas
+
+router = APIRouter(route_class=SessionRoute)
+
+
+@router.get(
+    "/",
+    status_code=status.HTTP_200_OK,
+    response_model=schemas.ChangesPage
+)
+@query_budget(4)
+async def read_changes(
+    since: str = Query("0:0", regex=r"^\d+:\d+$"),
+    limit: int = Query(100, ge=1),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: dict = Depends(get_current_user_if_staff)
+):
+    """
+    Возвращает страницу изменений пользователей и зарплат после курсора.
+
+    Notes:
+    - Для инкрементальной синхронизации повторяйте запрос с
+    `since=next`, пока `more` истинно. Курсор - пара `xid:seq`, её нужно
+    передавать без изменений; отступать от курсора «с запасом» не нужно.
+    - Изменения выдаются только после фиксации их транзакции: строки
+    транзакций, которые ещё идут, придут в следующих запросах после
+    курсора. Поэтому долгая транзакция задерживает выдачу всех более
+    поздних изменений до своего завершения.
+    - Вход пользователя (`last_login`) в ленту не попадает.
+
+    Args:
+    - `since`: Курсор `xid:seq` последнего полученного изменения
+    (по умолчанию `0:0` - с начала).
+    - `limit`: Размер страницы, не больше `CHANGES_PAGE_LIMIT`.
+    - `session`: Сеанс базы данных.
+    - `current_user`: Текущий сотрудник staff.
+
+    Returns:
+    - Изменения, курсор следующей страницы и признак продолжения.
+    """
+    audit_log.record(current_user.get("username"), "changes.read")
+    limit = min(limit, settings.changes_page_limit)
+    xid, seq = map(int, since.split(":"))
+    changes = await crud.get_changes(session, since=(xid, seq), limit=limit)
+    if changes:
+        since = f"{changes[-1]['xid']}:{changes[-1]['seq']}"
+    return {
+        "changes": changes,
+        "next": since,
+        "more": len(changes) == limit,
+    }
@@ -0,0 +1,35 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class Change(BaseModel):
+    """
+    Схема изменения строки.
+
+    Attributes:
+    - `xid`: Транзакция изменения.
+    - `seq`: Номер изменения.
+    - `table`: Таблица строки: `users` или `salaries`.
+    - `row`: Текущие значения колонок строки.
+
+    """
+    xid: int
+    seq: int
+    table: Literal["users", "salaries"]
+    row: dict
+
+
+class ChangesPage(BaseModel):
+    """
+    Схема страницы ленты изменений.
+
+    Attributes:
+    - `changes`: Изменения, упорядоченные по паре (`xid`, `seq`).
+    - `next`: Курсор `xid:seq` для следующего запроса (`since`).
+    - `more`: Есть ли изменения после этой страницы.
+
+    """
+    changes: list[Change]
+    next: str
+    more: bool
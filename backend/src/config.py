@@ -15,9 +15,67 @@ class Settings(BaseSettings):
     database_password: str = os.getenv("POSTGRES_PASSWORD")
     secret_key: str = os.getenv("SECRET_KEY")
     access_token_expire: int = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
+    password_hash_rounds: int = os.getenv("PASSWORD_HASH_ROUNDS", 12)
+    password_verify_target_ms: float = os.getenv(
+        "PASSWORD_VERIFY_TARGET_MS", 250
+    )
+    refresh_token_expire: int = os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30)
     db_host_test: str = os.getenv("DB_HOST_TEST")
     db_port_test: int = os.getenv("DB_PORT_TEST")
     db_name_test: str = os.getenv("DB_NAME_TEST")
+    raise_percent: float = os.getenv("RAISE_PERCENT", 10.0)
+    raise_chunk_size: int = os.getenv("RAISE_CHUNK_SIZE", 1000)
+    raise_job_interval: int = os.getenv("RAISE_JOB_INTERVAL", 0)
+    slow_query_threshold_ms: float = os.getenv("SLOW_QUERY_THRESHOLD_MS", 0)
+    profiling_sample_rate: float = os.getenv("PROFILING_SAMPLE_RATE", 0)
+    profiling_buffer_size: int = os.getenv("PROFILING_BUFFER_SIZE", 100)
+    query_repeat_limit: int = os.getenv("QUERY_REPEAT_LIMIT", 5)
+    log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    log_queue_size: int = os.getenv("LOG_QUEUE_SIZE", 10000)
+    access_log: bool = os.getenv("ACCESS_LOG", True)
+    access_log_sample_rate: float = os.getenv("ACCESS_LOG_SAMPLE_RATE", 1.0)
+    audit_queue_size: int = os.getenv("AUDIT_QUEUE_SIZE", 10000)
+    audit_batch_size: int = os.getenv("AUDIT_BATCH_SIZE", 500)
+    audit_flush_interval: float = os.getenv("AUDIT_FLUSH_INTERVAL", 1.0)
+    salary_batch_limit: int = os.getenv("SALARY_BATCH_LIMIT", 1000)
+    salary_snapshot: bool = os.getenv("SALARY_SNAPSHOT", False)
+    salary_snapshot_refresh: float = os.getenv("SALARY_SNAPSHOT_REFRESH", 0.2)
+    user_search_cache_size: int = os.getenv("USER_SEARCH_CACHE_SIZE", 256)
+    user_search_cache_ttl: float = os.getenv("USER_SEARCH_CACHE_TTL", 30)
+    raise_events: bool = os.getenv("RAISE_EVENTS", False)
+    raise_events_keepalive: float = os.getenv("RAISE_EVENTS_KEEPALIVE", 15)
+    raise_events_queue_size: int = os.getenv("RAISE_EVENTS_QUEUE_SIZE", 16)
+    export_batch_size: int = os.getenv("EXPORT_BATCH_SIZE", 10000)
+    changes_page_limit: int = os.getenv("CHANGES_PAGE_LIMIT", 1000)
+    admission_limit: int = os.getenv("ADMISSION_LIMIT", 0)
+    admission_queue_size: int = os.getenv("ADMISSION_QUEUE_SIZE", 100)
+    admission_timeout: float = os.getenv("ADMISSION_TIMEOUT", 5)
+    admission_retry_after: int = os.getenv("ADMISSION_RETRY_AFTER", 1)
+    admission_auth_limit: int = os.getenv("ADMISSION_AUTH_LIMIT", 4)
+    admission_bulk_limit: int = os.getenv("ADMISSION_BULK_LIMIT", 2)
+    job_workers: int = os.getenv("JOB_WORKERS", 2)
+    job_queue_size: int = os.getenv("JOB_QUEUE_SIZE", 100)
+    job_retention: float = os.getenv("JOB_RETENTION", 3600)
+    job_history: int = os.getenv("JOB_HISTORY", 1000)
+    introspection_key: str = os.getenv("INTROSPECTION_KEY", "")
+    introspection_batch_limit: int = os.getenv(
+        "INTROSPECTION_BATCH_LIMIT", 1000
+    )
+    introspection_cache_size: int = os.getenv(
+        "INTROSPECTION_CACHE_SIZE", 10000
+    )
+    introspection_cache_ttl: float = os.getenv("INTROSPECTION_CACHE_TTL", 30)
+    response_cache: bool = os.getenv("RESPONSE_CACHE", False)
+    response_cache_url: str = os.getenv("RESPONSE_CACHE_URL", "memory://")
+    response_cache_size: int = os.getenv("RESPONSE_CACHE_SIZE", 10000)
+    response_cache_ttl: float = os.getenv("RESPONSE_CACHE_TTL", 300)
+    response_cache_timeout: float = os.getenv("RESPONSE_CACHE_TIMEOUT", 0.1)
+    compression: bool = os.getenv("COMPRESSION", True)
+    compression_min_size: int = os.getenv("COMPRESSION_MIN_SIZE", 1024)
+    compression_offload_size: int = os.getenv(
+        "COMPRESSION_OFFLOAD_SIZE", 65536
+    )
+    compression_cache_size: int = os.getenv("COMPRESSION_CACHE_SIZE", 64)
 
     @property
     def database_url(self) -> str:
@@ -26,6 +84,15 @@ class Settings(BaseSettings):
             f':{quote_plus(self.database_password)}'
             f'@{self.database_host}:{self.database_port}/{self.database_name}')
 
+    @property
+    def test_database_url(self) -> str:
+        return (
+            f'postgresql+asyncpg://{quote_plus(self.database_user)}'
+            f':{quote_plus(self.database_password)}'
+            f'@{self.db_host_test or self.database_host}'
+            f':{self.db_port_test or self.database_port}'
+            f'/{self.db_name_test or self.database_name}')
+
     class Config:
         env_file = ".env"
 
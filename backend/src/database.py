@@ -1,29 +1,150 @@
-from typing import AsyncGenerator
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from typing import AsyncGenerator, Callable
 
-from sqlalchemy import MetaData
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
-                                    create_async_engine)
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from fastapi.routing import APIRoute
+from sqlalchemy import BigInteger, MetaData, Sequence, event
+from sqlalchemy.ext.asyncio import (AsyncSession, async_session,
+                                    async_sessionmaker, create_async_engine)
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.sql.functions import FunctionElement
 
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
 engine = create_async_engine(settings.database_url)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 metadata = MetaData()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
-
 
 class Base(DeclarativeBase):
     pass
 
 
+# Общая последовательность изменений строк `users` и `salaries`.
+change_seq = Sequence("change_seq", metadata=Base.metadata)
+
+
+class NextChange(FunctionElement):
+    """
+    Следующий номер изменения из последовательности `change_seq`.
+
+    Notes:
+    - Используется как `default` и `onupdate` колонок `change_seq`, поэтому
+    номер получают все вставки и обновления через ORM и `update()`.
+    """
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(NextChange)
+def compile_next_change(element, compiler, **kw):
+    return "nextval('change_seq')"
+
+
+@compiles(NextChange, "sqlite")
+def compile_next_change_sqlite(element, compiler, **kw):
+    # В SQLite нет последовательностей: микросекунды с начала эпохи.
+    return "CAST((julianday('now') - 2440587.5) * 86400000000 AS INTEGER)"
+
+
+class CurrentTransaction(FunctionElement):
+    """
+    Идентификатор текущей транзакции (`xid8`) в виде `bigint`.
+
+    Notes:
+    - Используется как `server_default` и `onupdate` колонок `change_xid`:
+    в отличие от `change_seq`, по нему лента изменений отличает строки
+    завершённых транзакций от строк транзакций, которые ещё идут.
+    - В SQLite транзакции выполняются по одной, идентификатор всегда 0.
+    """
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(CurrentTransaction)
+def compile_current_transaction(element, compiler, **kw):
+    return "pg_current_xact_id()::text::bigint"
+
+
+@compiles(CurrentTransaction, "sqlite")
+def compile_current_transaction_sqlite(element, compiler, **kw):
+    return "0"
+
+
+# Обработчики (statement, seconds), вызываемые после каждого SQL-запроса.
+query_listeners: list[Callable[[str, float], None]] = []
+
+
+def instrument(sync_engine):
+    """
+    Подключает к движку замер времени запросов, журнал медленных запросов и
+    обработчики `query_listeners`.
+
+    Args:
+    - `sync_engine`: Синхронный движок SQLAlchemy.
+    """
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context,
+                              executemany):
+        context.query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context,
+                             executemany):
+        elapsed = time.perf_counter() - context.query_started
+        threshold = settings.slow_query_threshold_ms
+        if threshold and elapsed * 1000 >= threshold:
+            logger.warning(
+                "Slow query (%.1f ms): %s", elapsed * 1000, statement
+            )
+        for listener in query_listeners:
+            listener(statement, elapsed)
+
+
+instrument(engine.sync_engine)
+
+
+# Обработчики (seconds), вызываемые, когда сеанс возвращает соединение.
+connection_listeners: list[Callable[[float], None]] = []
+# Сеансы текущего HTTP-запроса, которые держат соединение.
+request_sessions: ContextVar = ContextVar("request_sessions", default=None)
+
+
+@event.listens_for(Session, "after_begin")
+def after_begin(session, transaction, connection):
+    session.info.setdefault("checked_out", time.perf_counter())
+    sessions = request_sessions.get()
+    if sessions is not None:
+        sessions.add(session)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def after_transaction_end(session, transaction):
+    if transaction.parent is not None or "checked_out" not in session.info:
+        return
+    held = time.perf_counter() - session.info.pop("checked_out")
+    sessions = request_sessions.get()
+    if sessions is not None:
+        sessions.discard(session)
+    for listener in connection_listeners:
+        listener(held)
+
+
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Возвращает экземпляр сессии базы данных.
 
+    Notes:
+    - Соединение берется из пула только при первом запросе к базе, поэтому
+    запросы, отклоненные при проверке токена, его не занимают.
+    - В маршрутах `SessionRoute` соединение возвращается в пул сразу после
+    выполнения обработчика, до сериализации ответа.
+
     Yields:
     - Сессия базы данных.
     """
@@ -31,6 +152,61 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+def keep_session(endpoint):
+    """
+    Оставляет сеанс открытым до конца отправки ответа.
+
+    Нужен маршрутам, которые читают базу из `StreamingResponse`.
+    """
+    endpoint.keep_session = True
+    return endpoint
+
+
+async def release_sessions():
+    """
+    Закрывает сеансы текущего запроса, которые держат соединение.
+    """
+    for session in list(request_sessions.get() or ()):
+        await async_session(session).close()
+
+
+class SessionRoute(APIRoute):
+    """
+    Маршрут, который возвращает соединения в пул, как только обработчик
+    закончил работу, не дожидаясь сериализации и отправки ответа.
+
+    Notes:
+    - Незафиксированная транзакция при этом откатывается.
+    - Маршруты с `@keep_session` закрывают сеанс как обычно, после ответа.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, endpoint, **kwargs)
+        if not getattr(endpoint, "keep_session", False):
+            self.dependant.call = self.releasing(self.dependant.call)
+
+    @staticmethod
+    def releasing(call: Callable) -> Callable:
+        @functools.wraps(call)
+        async def endpoint(**kwargs):
+            try:
+                return await call(**kwargs)
+            finally:
+                await release_sessions()
+        return endpoint
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request):
+            token = request_sessions.set(set())
+            try:
+                return await handler(request)
+            finally:
+                request_sessions.reset(token)
+        return route_handler
+
+
 async def create_db_and_tables():
     """
     Создает таблицы в базе данных.
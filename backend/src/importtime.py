@@ -0,0 +1,95 @@
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+# Модули, которые должны загружаться при первом использовании, а не при
+# старте приложения.
+LAZY_MODULES = ("pyarrow", "passlib")
+# Бюджет времени импорта `src.main` в мс: по умолчанию для `--budget-ms`
+# и для теста холодного старта.
+BUDGET_MS = 1500
+
+
+def measure(module: str = "src.main") -> dict:
+    """
+    Импортирует модуль в отдельном интерпретаторе с `-X importtime`.
+
+    Args:
+    - `module`: Импортируемый модуль.
+
+    Returns:
+    - `total_ms`: Общее время импорта модуля в мс.
+    - `modules`: Общее время импорта каждого загруженного модуля в мс.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for match in LINE.finditer(result.stderr):
+        modules[match[4]] = int(match[2]) / 1000
+    return {"total_ms": modules[module], "modules": modules}
+
+
+def benchmark(module: str = "src.main", runs: int = 5) -> dict:
+    """
+    Измеряет время импорта несколько раз.
+
+    Args:
+    - `module`: Импортируемый модуль.
+    - `runs`: Количество замеров.
+
+    Returns:
+    - `median_ms`: Медиана общего времени импорта в мс.
+    - `slowest`: Самые долгие модули последнего замера.
+    - `eager`: Модули из `LAZY_MODULES`, загруженные при импорте.
+    """
+    runs = [measure(module) for _ in range(runs)]
+    modules = runs[-1]["modules"]
+    return {
+        "median_ms": statistics.median(run["total_ms"] for run in runs),
+        "slowest": sorted(
+            modules.items(), key=lambda item: item[1], reverse=True
+        )[:15],
+        "eager": sorted(
+            name for name in modules if name.split(".")[0] in LAZY_MODULES
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Замеряет время импорта приложения (холодный старт)."
+    )
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms", type=float, default=BUDGET_MS,
+        help="завершиться с ошибкой, если медиана больше бюджета "
+             f"(по умолчанию {BUDGET_MS})"
+    )
+    args = parser.parse_args()
+    result = benchmark(args.module, args.runs)
+    for name, elapsed in result["slowest"]:
+        print(f"{elapsed:9.1f} ms  {name}")
+    print(f"{args.module}: {result['median_ms']:.1f} ms (median)")
+    failed = False
+    if result["eager"]:
+        print(f"Imported at startup: {', '.join(result['eager'])}")
+        failed = True
+    if result["median_ms"] > args.budget_ms:
+        print(f"Import time budget exceeded: {args.budget_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+
+from ..api import schemas as salary_schemas
+from ..audit.log import audit_log
+from ..auth.middleware import get_current_user_if_staff
+from ..database import SessionRoute
+from ..ops.queries import query_budget
+from . import schemas, tasks
+from .runner import JobQueueFullError, job_runner
+
+router = APIRouter(route_class=SessionRoute)
+
+
+def submit(kind: str, func, owner: str) -> dict:
+    try:
+        job = job_runner.submit(kind, func, owner)
+    except JobQueueFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job queue is full"
+        )
+    audit_log.record(owner, f"jobs.{kind}")
+    return job.as_dict()
+
+
+@router.post(
+    "/adjust-rates/",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=schemas.Job
+)
+@query_budget(1)
+async def start_adjust_rates(
+    adjustment: salary_schemas.RateAdjustment,
+    current_user: dict = Depends(get_current_user_if_staff)
+):
+    """
+    Запускает массовое изменение ставок в фоне.
+
+    Args:
+    - `adjustment`: Схема массового изменения ставок.
+    - `current_user`: Текущий сотрудник staff.
+
+    Returns:
+    - Поставленная в очередь задача; результат - количество изменённых
+    ставок.
+
+    Raises:
+    - `HTTPException` с кодом состояния 503 и деталями "Job queue is full",
+    если очередь задач заполнена.
+    """
+    return submit(
+        "adjust_rates",
+        lambda job: tasks.adjust_rates(job, job_runner.sessions, adjustment),
+        current_user.get("username")
+    )
+
+
+@router.post(
+    "/due-raises/",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=schemas.Job
+)
+@query_budget(1)
+async def start_due_raises(
+    params: schemas.DueRaises,
+    current_user: dict = Depends(get_current_user_if_staff)
+):
+    """
+    Запускает применение наступивших повышений в фоне.
+
+    Args:
+    - `params`: Размер повышения и пачки.
+    - `current_user`: Текущий сотрудник staff.
+
+    Returns:
+    - Поставленная в очередь задача; прогресс - количество повышенных
+    ставок из ожидающих повышения.
+
+    Raises:
+    - `HTTPException` с кодом состояния 503 и деталями "Job queue is full",
+    если очередь задач заполнена.
+    """
+    return submit(
+        "due_raises",
+        lambda job: tasks.due_raises(job, job_runner.sessions, params),
+        current_user.get("username")
+    )
+
+
+@router.get(
+    "/",
+    response_model=list[schemas.Job],
+    dependencies=[Depends(get_current_user_if_staff)]
+)
+@query_budget(1)
+async def read_jobs():
+    """
+    Возвращает фоновые задачи, от старых к новым.
+    """
+    job_runner.prune()
+    return [job.as_dict() for job in job_runner.jobs.values()]
+
+
+@router.get(
+    "/{job_id}/",
+    response_model=schemas.Job,
+    dependencies=[Depends(get_current_user_if_staff)]
+)
+@query_budget(1)
+async def read_job(job_id: str):
+    """
+    Возвращает состояние и результат задачи.
+
+    Raises:
+    - `HTTPException` с кодом состояния 404 и деталями "Job not found",
+    если задача не найдена или уже удалена из истории.
+    """
+    job = job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.as_dict()
+
+
+@router.delete(
+    "/{job_id}/",
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response
+)
+@query_budget(1)
+async def cancel_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user_if_staff)
+):
+    """
+    Отменяет ожидающую или выполняемую задачу.
+
+    Raises:
+    - `HTTPException` с кодом состояния 404 и деталями "Job not found",
+    если задача не найдена.
+    """
+    job = job_runner.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    audit_log.record(current_user.get("username"), "jobs.cancel")
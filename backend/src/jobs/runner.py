@@ -0,0 +1,234 @@
+import asyncio
+import contextvars
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..config import settings
+from ..database import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobQueueFullError(Exception):
+    """
+    Очередь задач заполнена.
+    """
+
+
+class Job:
+    """
+    Фоновая задача.
+
+    Attributes:
+    - `id`: Идентификатор задачи.
+    - `kind`: Вид задачи.
+    - `owner`: Имя пользователя, запустившего задачу.
+    - `status`: `pending`, `running`, `succeeded`, `failed` или
+    `cancelled`.
+    - `done`, `total`: Прогресс: обработано и всего (если известно).
+    - `result`: Результат успешной задачи.
+    - `error`: Текст ошибки упавшей задачи.
+    """
+
+    def __init__(self, kind: str, owner: str = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner = owner
+        self.status = PENDING
+        self.created = datetime.now()
+        self.started = None
+        self.finished = None
+        self.done = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        self.task = None
+        self._finished_at = None
+
+    def report(self, done: int, total: int = None):
+        """
+        Обновляет прогресс; вызывается из функции задачи.
+        """
+        self.done = done
+        if total is not None:
+            self.total = total
+
+    def finish(self, status: str):
+        self.status = status
+        self.finished = datetime.now()
+        self._finished_at = time.monotonic()
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "owner": self.owner,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "done": self.done,
+            "total": self.total,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobRunner:
+    """
+    Выполняет долгие операции в фоне, вне обработки HTTP-запроса.
+
+    Одновременно выполняется не больше `workers` задач, остальные ждут в
+    очереди длиной до `queue_size`. Каждая задача работает в своем сеансе,
+    поэтому задачи держат не больше `workers` соединений пула и не
+    вытесняют интерактивные запросы.
+
+    Notes:
+    - Завершенные задачи хранятся `retention` секунд, но не больше
+    `history` штук.
+    - Отмена прерывает задачу на ближайшем `await`; уже зафиксированные
+    пачки изменений остаются в базе.
+    - Реестр задач хранится в памяти процесса: при нескольких экземплярах
+    приложения `GET /jobs/{id}/` на другом экземпляре отвечает 404, а
+    очередь и лимит `workers` действуют в каждом экземпляре отдельно.
+
+    Attributes:
+    - `jobs`: Задачи по идентификатору, от старых к новым.
+    - `sessions`: Фабрика сеансов задач (по умолчанию
+    `async_session_maker`), тесты подменяют её своей.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue_size: int,
+        retention: float,
+        history: int,
+        sessions: async_sessionmaker = async_session_maker
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retention = retention
+        self.history = history
+        self.sessions = sessions
+        self.jobs = OrderedDict()
+        self._slots = None
+
+    def submit(
+        self,
+        kind: str,
+        func: Callable[[Job], Awaitable[Any]],
+        owner: str = None
+    ) -> Job:
+        """
+        Ставит задачу в очередь.
+
+        Args:
+        - `kind`: Вид задачи.
+        - `func`: Асинхронная функция задачи, получает объект `Job`.
+        - `owner`: Имя пользователя, запустившего задачу.
+
+        Returns:
+        - Созданная задача.
+
+        Raises:
+        - `JobQueueFullError`, если ожидающих задач уже `queue_size`.
+        """
+        self.prune()
+        pending = sum(job.status == PENDING for job in self.jobs.values())
+        if pending >= self.queue_size:
+            raise JobQueueFullError()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        job = Job(kind, owner)
+        # Задача не наследует контекст запроса (учет запросов, сеансы).
+        job.task = contextvars.Context().run(
+            asyncio.create_task, self.run(job, func), name=job.id
+        )
+        # Задача, отмененная до первого шага, не попадает в `run()`.
+        job.task.add_done_callback(lambda _: self.finalize(job))
+        self.jobs[job.id] = job
+        return job
+
+    async def run(self, job: Job, func: Callable[[Job], Awaitable[Any]]):
+        try:
+            async with self._slots:
+                job.status = RUNNING
+                job.started = datetime.now()
+                job.result = await func(job)
+        except asyncio.CancelledError:
+            job.finish(CANCELLED)
+        except Exception as error:
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            job.error = str(error)
+            job.finish(FAILED)
+        else:
+            job.finish(SUCCEEDED)
+
+    @staticmethod
+    def finalize(job: Job):
+        if job.status not in FINISHED:
+            job.finish(CANCELLED)
+
+    def get(self, job_id: str):
+        self.prune()
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str):
+        """
+        Отменяет ожидающую или выполняемую задачу.
+
+        Returns:
+        - Задача или None, если она не найдена.
+        """
+        job = self.get(job_id)
+        if job is not None and job.status not in FINISHED:
+            job.task.cancel()
+        return job
+
+    def prune(self):
+        """
+        Удаляет завершенные задачи старше `retention` и сверх `history`.
+        """
+        now = time.monotonic()
+        finished = [
+            job for job in self.jobs.values() if job.status in FINISHED
+        ]
+        excess = len(finished) - self.history
+        for job in finished:
+            if excess > 0 or now - job._finished_at > self.retention:
+                del self.jobs[job.id]
+                excess -= 1
+
+    async def shutdown(self):
+        """
+        Отменяет незавершенные задачи.
+        """
+        tasks = [
+            job.task for job in self.jobs.values()
+            if job.status not in FINISHED
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+job_runner = JobRunner(
+    settings.job_workers,
+    settings.job_queue_size,
+    settings.job_retention,
+    settings.job_history
+)
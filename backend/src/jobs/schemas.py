@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, confloat, conint
+
+
+class Job(BaseModel):
+    """
+    Схема фоновой задачи.
+
+    Attributes:
+    - `id`: Идентификатор задачи.
+    - `kind`: Вид задачи.
+    - `owner`: Имя пользователя, запустившего задачу.
+    - `status`: Состояние задачи.
+    - `created`, `started`, `finished`: Время постановки, запуска и
+    завершения.
+    - `done`, `total`: Прогресс: обработано и всего (если известно).
+    - `result`: Результат успешной задачи.
+    - `error`: Текст ошибки упавшей задачи.
+
+    """
+    id: str
+    kind: str
+    owner: Optional[str]
+    status: Literal["pending", "running", "succeeded", "failed", "cancelled"]
+    created: datetime
+    started: Optional[datetime]
+    finished: Optional[datetime]
+    done: int
+    total: Optional[int]
+    result: Optional[dict]
+    error: Optional[str]
+
+
+class DueRaises(BaseModel):
+    """
+    Схема запуска наступивших повышений.
+
+    Attributes:
+    - `percent`: Размер повышения в процентах (по умолчанию из настроек).
+    - `chunk_size`: Размер пачки (по умолчанию из настроек).
+
+    """
+    percent: Optional[confloat(gt=0)] = None
+    chunk_size: Optional[conint(ge=1)] = None
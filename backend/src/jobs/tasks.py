@@ -0,0 +1,63 @@
+from sqlalchemy import func, select
+
+from ..api import crud as salary_crud
+from ..api import models as salary_models
+from ..api import schemas as salary_schemas
+from ..api.crud import is_current_salary
+from ..api.raises import apply_due_raises, is_raise_due
+from ..audit.log import audit_log
+from . import schemas
+from .runner import Job
+
+
+async def adjust_rates(
+    job: Job,
+    sessions,
+    adjustment: salary_schemas.RateAdjustment
+) -> dict:
+    """
+    Задача массового изменения ставок.
+
+    Args:
+    - `job`: Задача.
+    - `sessions`: Фабрика сеансов (`JobRunner.sessions`).
+    - `adjustment`: Схема массового изменения ставок.
+
+    Returns:
+    - Количество изменённых ставок.
+    """
+    async with sessions() as session:
+        employee_ids = await salary_crud.adjust_rates(session, adjustment)
+    details = adjustment.audit_details()
+    for employee_id in employee_ids:
+        audit_log.record(
+            job.owner, "salary.adjust_rates", employee_id, details
+        )
+    job.report(len(employee_ids), len(employee_ids))
+    return {"updated": len(employee_ids)}
+
+
+async def due_raises(job: Job, sessions, params: schemas.DueRaises) -> dict:
+    """
+    Задача применения наступивших повышений пачками.
+
+    Args:
+    - `job`: Задача.
+    - `sessions`: Фабрика сеансов (`JobRunner.sessions`).
+    - `params`: Размер повышения и пачки.
+
+    Returns:
+    - Количество повышенных ставок.
+    """
+    async with sessions() as session:
+        total = await session.scalar(
+            select(func.count())
+            .select_from(salary_models.Salary)
+            .where(is_current_salary(), is_raise_due())
+        )
+        await session.commit()
+        job.report(0, total)
+        updated = await apply_due_raises(
+            session, params.percent, params.chunk_size, job.report
+        )
+    return {"updated": updated}
@@ -1,7 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .database import create_db_and_tables
+from . import scheduler
+from .api.notifications import raise_notifier
+from .api.raises import run_due_raises
+from .api.snapshot import salary_snapshot
+from .audit.log import audit_log
+from .cache import response_cache
+from .config import settings
+from .jobs.runner import job_runner
+from .ops.access_log import AccessLogMiddleware, log_pipeline
+from .ops.admission import AdmissionMiddleware
+from .ops.compression import CompressionMiddleware
+from .ops.profiling import ProfilingMiddleware
+from .ops.queries import QueryBudgetMiddleware
 from .routers import routers
 
 description = """
@@ -31,8 +43,6 @@ origins = [
     "http://localhost:8000",
 ]
 
-app = FastAPI()
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -46,6 +56,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-create_db_and_tables()
+app.add_middleware(QueryBudgetMiddleware)
+
+app.add_middleware(ProfilingMiddleware)
+
+app.add_middleware(AdmissionMiddleware)
+
+app.add_middleware(CompressionMiddleware)
+
+app.add_middleware(AccessLogMiddleware)
 
 app.include_router(routers)
+
+
+@app.on_event("startup")
+async def start_scheduler():
+    log_pipeline.start()
+    if settings.raise_job_interval:
+        scheduler.schedule(run_due_raises, settings.raise_job_interval)
+    scheduler.schedule(
+        audit_log.flush_pending, settings.audit_flush_interval, "audit"
+    )
+    if settings.salary_snapshot:
+        scheduler.start(salary_snapshot.run, "salary_snapshot")
+    if settings.raise_events:
+        scheduler.start(raise_notifier.run_timer, "raise_events_timer")
+        scheduler.start(raise_notifier.listen, "raise_events_listener")
+
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await scheduler.shutdown()
+    await job_runner.shutdown()
+    await audit_log.flush_pending()
+    await response_cache.close()
+    log_pipeline.stop()
@@ -0,0 +1,208 @@
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from ..config import settings
+from .queries import route_name
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def access_log_sampled(endpoint):
+    """
+    Включает выборочную запись журнала доступа для маршрута с большим
+    потоком запросов.
+
+    Успешные запросы маршрута записываются с долей
+    `ACCESS_LOG_SAMPLE_RATE`, ошибки - всегда.
+    """
+    endpoint.access_log_sampled = True
+    return endpoint
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирует запись журнала в одну строку JSON.
+
+    Поля из `extra={"fields": {...}}` добавляются на верхний уровень.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LogQueueHandler(QueueHandler):
+    """
+    Кладет записи в ограниченную очередь, не блокируя вызывающий поток.
+
+    Notes:
+    - При переполненной очереди запись отбрасывается и учитывается в
+    `dropped`.
+    - В потоке цикла событий подставляются только аргументы сообщения;
+    JSON и трассировки формируются в потоке `QueueListener`.
+    """
+
+    def __init__(self, queue: queue.Queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogListener(QueueListener):
+    """
+    Поток записи журнала; при остановке дожидается разбора очереди.
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """
+    Неблокирующий журнал приложения в формате JSON.
+
+    Записи всех логгеров попадают через корневой логгер в ограниченную
+    очередь, которую разбирает отдельный поток, поэтому запись журнала не
+    задерживает цикл событий.
+
+    Attributes:
+    - `queue`: Очередь записей.
+    - `handler`: Обработчик корневого логгера.
+    - `logged`: Количество записей журнала доступа.
+    - `sampled_out`: Количество запросов, пропущенных выборкой.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = LogQueueHandler(self.queue)
+        self.listener = None
+        self.logged = 0
+        self.sampled_out = 0
+
+    def start(self, stream=None):
+        """
+        Подключает обработчик к корневому логгеру и запускает поток записи.
+
+        Args:
+        - `stream`: Поток вывода (по умолчанию stderr).
+        """
+        if self.listener is not None:
+            return
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter())
+        self.listener = LogListener(self.queue, output)
+        self.listener.start()
+        root = logging.getLogger()
+        root.addHandler(self.handler)
+        root.setLevel(settings.log_level)
+
+    def stop(self):
+        """
+        Отключает обработчик и дописывает накопленные записи.
+        """
+        if self.listener is None:
+            return
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
+        self.listener = None
+
+    def access(self, scope, state: dict, status: int, elapsed: float):
+        """
+        Записывает запрос в журнал доступа.
+
+        Args:
+        - `scope`: ASGI scope запроса.
+        - `state`: Состояние запроса (`request.state`).
+        - `status`: Код ответа.
+        - `elapsed`: Время обработки в секундах.
+        """
+        fields = {}
+        if getattr(scope.get("endpoint"), "access_log_sampled", False):
+            rate = settings.access_log_sample_rate
+            if status < 400 and random.random() >= rate:
+                self.sampled_out += 1
+                return
+            fields["sample_rate"] = rate
+        route = route_name(scope)
+        db_time = state.get("db_time")
+        fields.update({
+            "route": route,
+            "status": status,
+            "latency_ms": round(elapsed * 1000, 3),
+            "db_ms": None if db_time is None else round(db_time * 1000, 3),
+            "user_id": state.get("user_id"),
+        })
+        self.logged += 1
+        logger.info("%s %s", route, status, extra={"fields": fields})
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "logged": self.logged,
+            "sampled_out": self.sampled_out,
+            "dropped": self.handler.dropped,
+        }
+
+
+log_pipeline = LogPipeline(settings.log_queue_size)
+
+
+class AccessLogMiddleware:
+    """
+    ASGI-middleware журнала доступа.
+
+    Для каждого запроса пишет маршрут, код ответа, время обработки, время в
+    базе и идентификатор пользователя. Включается настройкой `ACCESS_LOG`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.access_log:
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            log_pipeline.access(
+                scope, state, status, time.perf_counter() - started
+            )
@@ -0,0 +1,247 @@
+import asyncio
+import heapq
+import itertools
+import json
+
+from ..config import settings
+
+EXEMPT = (
+    "/ops/", "/docs", "/redoc", "/openapi.json", "/salary/raise-events/"
+)
+DEFAULT_PRIORITY = 1
+
+
+class Lane:
+    """
+    Группа маршрутов с общим лимитом одновременных запросов.
+
+    Attributes:
+    - `name`: Имя группы.
+    - `prefixes`: Префиксы путей группы.
+    - `priority`: Приоритет в очереди (меньше - раньше).
+    - `limit`: Максимум одновременно выполняемых запросов группы.
+    - `active`, `waiting`: Выполняемые и ожидающие запросы.
+    - `admitted`, `shed`: Счётчики пропущенных и отклонённых запросов.
+    """
+
+    def __init__(
+        self, name: str, prefixes: tuple, priority: int, limit: int
+    ):
+        self.name = name
+        self.prefixes = prefixes
+        self.priority = priority
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+
+    def stats(self) -> dict:
+        return {
+            "priority": self.priority,
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+class AdmissionController:
+    """
+    Ограничивает число одновременно выполняемых запросов.
+
+    Запросы сверх лимита ждут в общей очереди с приоритетами; при
+    освобождении места первым проходит запрос с наименьшим `priority`,
+    среди равных - пришедший раньше. Запрос отклоняется, если очередь его
+    группы заполнена или ожидание превысило `timeout`.
+
+    Attributes:
+    - `limit`: Общий лимит одновременных запросов (0 - без ограничений).
+    - `queue_size`: Максимальная длина очереди одной группы.
+    - `timeout`: Максимальное время ожидания в очереди в секундах.
+    - `lanes`: Группы маршрутов, проверяются по порядку.
+    - `default`: Группа для остальных маршрутов.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        queue_size: int,
+        timeout: float,
+        lanes: list[Lane]
+    ):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.lanes = lanes
+        self.default = Lane("default", (), DEFAULT_PRIORITY, limit)
+        self.active = 0
+        self._waiters = []
+        self._counter = itertools.count()
+
+    @classmethod
+    def from_settings(cls):
+        limit = settings.admission_limit
+        return cls(
+            limit,
+            settings.admission_queue_size,
+            settings.admission_timeout,
+            [
+                Lane(
+                    "read",
+                    (
+                        "/salary/next-pay-raise/", "/auth/users/me/",
+                        "/auth/introspect/",
+                    ),
+                    0,
+                    limit
+                ),
+                Lane(
+                    "auth",
+                    ("/auth/login/", "/auth/refresh/", "/auth/register/"),
+                    2,
+                    settings.admission_auth_limit
+                ),
+                Lane(
+                    "bulk",
+                    ("/salary/", "/auth/users/", "/changes/", "/jobs/"),
+                    2,
+                    settings.admission_bulk_limit
+                ),
+            ]
+        )
+
+    def lane_for(self, path: str):
+        """
+        Возвращает группу маршрута или None, если путь не ограничивается.
+        """
+        if path.startswith(EXEMPT):
+            return None
+        for lane in self.lanes:
+            if path.startswith(lane.prefixes):
+                return lane
+        return self.default
+
+    async def acquire(self, lane: Lane) -> bool:
+        """
+        Ждет места для запроса группы.
+
+        Returns:
+        - True, если запрос допущен, и False, если его следует отклонить.
+        """
+        if not self._waiters and self._can_start(lane):
+            self._start(lane)
+            return True
+        if lane.waiting >= self.queue_size:
+            lane.shed += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters,
+            (lane.priority, next(self._counter), future, lane)
+        )
+        lane.waiting += 1
+        self._dispatch()
+        try:
+            await asyncio.wait((future,), timeout=self.timeout)
+        except asyncio.CancelledError:
+            if future.done():
+                self.release(lane)
+            else:
+                future.cancel()
+                lane.waiting -= 1
+            raise
+        if future.done():
+            return True
+        future.cancel()
+        lane.waiting -= 1
+        lane.shed += 1
+        return False
+
+    def release(self, lane: Lane):
+        lane.active -= 1
+        self.active -= 1
+        self._dispatch()
+
+    def _can_start(self, lane: Lane) -> bool:
+        return self.active < self.limit and lane.active < lane.limit
+
+    def _start(self, lane: Lane):
+        lane.active += 1
+        lane.admitted += 1
+        self.active += 1
+
+    def _dispatch(self):
+        blocked = []
+        while self._waiters and self.active < self.limit:
+            waiter = heapq.heappop(self._waiters)
+            _, _, future, lane = waiter
+            if future.done():
+                continue
+            if lane.active >= lane.limit:
+                blocked.append(waiter)
+                continue
+            lane.waiting -= 1
+            self._start(lane)
+            future.set_result(None)
+        for waiter in blocked:
+            heapq.heappush(self._waiters, waiter)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "lanes": {
+                lane.name: lane.stats()
+                for lane in (*self.lanes, self.default)
+            },
+        }
+
+
+admission = AdmissionController.from_settings()
+
+
+class AdmissionMiddleware:
+    """
+    ASGI-middleware контроля допуска запросов.
+
+    Включается настройкой `ADMISSION_LIMIT`. Запросы, не дождавшиеся места,
+    получают `503` с заголовком `Retry-After`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        lane = None
+        if scope["type"] == "http" and admission.limit:
+            lane = admission.lane_for(scope["path"])
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await admission.acquire(lane):
+            await self.reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release(lane)
+
+    async def reject(self, send):
+        body = json.dumps({"detail": "Service overloaded"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (
+                    b"retry-after",
+                    str(settings.admission_retry_after).encode()
+                ),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,328 @@
+import argparse
+import asyncio
+import functools
+import gzip
+import hashlib
+import json
+import statistics
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers, MutableHeaders
+
+from ..cache import LRUCache
+from ..config import settings
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+# Уровни сжатия: быстрые, с основной частью выигрыша в размере на JSON.
+LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+
+
+@functools.lru_cache(maxsize=None)
+def load_codecs() -> dict[str, Callable[[bytes], bytes]]:
+    """
+    Возвращает доступные алгоритмы сжатия.
+
+    Notes:
+    - zstd (пакет zstandard) и br (пакет brotli) необязательны и
+    используются, если установлены; gzip доступен всегда.
+    - Функции сжатия не хранят состояние и могут выполняться в потоках.
+
+    Returns:
+    - Функции сжатия по названию кодировки, в порядке предпочтения.
+    """
+    codecs = {}
+    try:
+        import zstandard
+    except ImportError:
+        pass
+    else:
+        def compress_zstd(body: bytes) -> bytes:
+            return zstandard.ZstdCompressor(level=LEVELS["zstd"]).compress(
+                body
+            )
+
+        codecs["zstd"] = compress_zstd
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        def compress_brotli(body: bytes) -> bytes:
+            return brotli.compress(body, quality=LEVELS["br"])
+
+        codecs["br"] = compress_brotli
+
+    def compress_gzip(body: bytes) -> bytes:
+        # Нулевое время в заголовке: одинаковые ответы дают одинаковые байты.
+        return gzip.compress(body, compresslevel=LEVELS["gzip"], mtime=0)
+
+    codecs["gzip"] = compress_gzip
+    return codecs
+
+
+def choose_encoding(accept_encoding: str, encodings) -> Optional[str]:
+    """
+    Выбирает кодировку ответа по заголовку `Accept-Encoding`.
+
+    Args:
+    - `accept_encoding`: Значение заголовка.
+    - `encodings`: Доступные кодировки в порядке предпочтения.
+
+    Returns:
+    - Кодировка с наибольшим весом `q` (при равенстве - предпочтительная)
+    или None, если клиент не принимает ни одну.
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.split(";")
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0
+        weights[name.strip().lower()] = weight
+    chosen, best = None, 0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get("*", 0))
+        if weight > best:
+            chosen, best = encoding, weight
+    return chosen
+
+
+class Compressor:
+    """
+    Сжимает тела ответов и кэширует результат для одинаковых ответов.
+
+    Attributes:
+    - `cache`: Сжатые тела по кодировке и хэшу исходного тела.
+    - `offload_size`: Тела от этого размера сжимаются в потоке, не
+    блокируя цикл событий.
+    - `responses`: Количество сжатых ответов по кодировкам.
+    - `bytes_in`, `bytes_out`: Размер тел до и после сжатия.
+    - `offloaded`: Количество сжатий в потоке.
+    """
+
+    def __init__(self, cache_size: int, offload_size: int):
+        self.cache = LRUCache(cache_size)
+        self.offload_size = offload_size
+        self.responses = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.offloaded = 0
+
+    async def compress(
+        self,
+        encoding: str,
+        body: bytes,
+        cacheable: bool = False
+    ) -> bytes:
+        """
+        Сжимает тело ответа.
+
+        Args:
+        - `encoding`: Кодировка из `load_codecs()`.
+        - `body`: Тело ответа.
+        - `cacheable`: Сохранить результат для одинаковых ответов.
+
+        Returns:
+        - Сжатое тело.
+        """
+        key = None
+        compressed = None
+        if cacheable:
+            key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+            compressed = self.cache.get(key)
+        if compressed is None:
+            codec = load_codecs()[encoding]
+            if len(body) >= self.offload_size:
+                self.offloaded += 1
+                compressed = await asyncio.to_thread(codec, body)
+            else:
+                compressed = codec(body)
+            if key is not None:
+                self.cache.set(key, compressed)
+        self.responses[encoding] += 1
+        self.bytes_in += len(body)
+        self.bytes_out += len(compressed)
+        return compressed
+
+    def stats(self) -> dict:
+        return {
+            "encodings": list(load_codecs()),
+            "responses": dict(self.responses),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": (
+                round(self.bytes_out / self.bytes_in, 4)
+                if self.bytes_in else 0
+            ),
+            "offloaded": self.offloaded,
+            "cache": self.cache.stats(),
+        }
+
+
+compressor = Compressor(
+    settings.compression_cache_size, settings.compression_offload_size
+)
+
+
+def is_compressible(headers: Headers, size: int) -> bool:
+    content_type = headers.get("content-type", "")
+    return (
+        size >= settings.compression_min_size
+        and "content-encoding" not in headers
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+    )
+
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware сжатия ответов.
+
+    Кодировка выбирается по `Accept-Encoding` из доступных в
+    `load_codecs()`. Сжимаются JSON и текстовые ответы от
+    `COMPRESSION_MIN_SIZE` байт, переданные одним сообщением; потоковые
+    ответы (выгрузки, Server-Sent Events) передаются как есть. Сжатые тела
+    успешных ответов на `GET` кэшируются. Включается настройкой
+    `COMPRESSION`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        encoding = None
+        if scope["type"] == "http" and settings.compression:
+            encoding = choose_encoding(
+                Headers(scope=scope).get("accept-encoding", ""),
+                load_codecs()
+            )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            if message.get("more_body") or not is_compressible(
+                headers, len(body)
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            cacheable = (
+                scope["method"] == "GET"
+                and start["status"] == 200
+                and "no-store" not in headers.get("cache-control", "")
+            )
+            compressed = await compressor.compress(encoding, body, cacheable)
+            headers.add_vary_header("Accept-Encoding")
+            if len(compressed) < len(body):
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(compressed))
+                body = compressed
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def sample_page(size: int) -> bytes:
+    """
+    Тело ответа `/auth/users/` со страницей из `size` пользователей.
+    """
+    from ..auth.schemas import Users
+
+    now = datetime.now()
+    users = [
+        Users(
+            id=user_id,
+            username=f"user{user_id:07d}",
+            is_active=True,
+            is_staff=user_id % 10 == 0,
+            last_login=now - timedelta(minutes=user_id),
+        )
+        for user_id in range(1, size + 1)
+    ]
+    return json.dumps(
+        jsonable_encoder(users), ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def benchmark(
+    sizes: list[int],
+    link_mbps: float,
+    samples: int = 5
+) -> list[dict]:
+    """
+    Замеряет размер и время сжатия страниц пользователей.
+
+    Args:
+    - `sizes`: Размеры страниц.
+    - `link_mbps`: Пропускная способность канала клиента в Мбит/с.
+    - `samples`: Количество замеров на кодировку.
+
+    Returns:
+    - Строки замеров: размер страницы, кодировка, байты, медиана времени
+    сжатия и оценка времени сжатия и передачи по каналу в мс.
+    """
+    rows = []
+    for size in sizes:
+        body = sample_page(size)
+        codecs = {"identity": lambda body: body, **load_codecs()}
+        for encoding, codec in codecs.items():
+            timings = []
+            for _ in range(samples):
+                started = time.perf_counter()
+                compressed = codec(body)
+                timings.append(time.perf_counter() - started)
+            compress_ms = statistics.median(timings) * 1000
+            transfer_ms = len(compressed) * 8 / (link_mbps * 1000)
+            rows.append({
+                "page": size,
+                "encoding": encoding,
+                "bytes": len(compressed),
+                "compress_ms": compress_ms,
+                "total_ms": compress_ms + transfer_ms,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Сравнивает размер и время ответа /auth/users/ без "
+                    "сжатия и с доступными алгоритмами сжатия."
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[20, 100, 1000, 10000]
+    )
+    parser.add_argument("--link-mbps", type=float, default=10)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'page':>6} {'encoding':>9} {'bytes':>10} "
+          f"{'compress ms':>12} {'total ms':>10}")
+    for row in benchmark(args.sizes, args.link_mbps, args.samples):
+        print(f"{row['page']:>6} {row['encoding']:>9} {row['bytes']:>10} "
+              f"{row['compress_ms']:>12.2f} {row['total_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
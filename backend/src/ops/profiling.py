@@ -0,0 +1,171 @@
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from ..auth import crud
+from ..auth.middleware import decode_token
+from ..config import settings
+from ..database import get_async_session, query_listeners
+
+PROFILE_HEADER = b"x-profile"
+SAMPLE_INTERVAL = 0.001
+MAX_STACKS = 50
+MAX_QUERIES = 500
+
+profiles: deque = deque(maxlen=settings.profiling_buffer_size)
+current_profile: ContextVar = ContextVar("current_profile", default=None)
+
+
+class StackSampler(threading.Thread):
+    """
+    Статистический профилировщик: периодически снимает стек потока цикла
+    событий и считает одинаковые стеки.
+
+    Notes:
+    - Запросы внутри одного цикла событий выполняются конкурентно, поэтому
+    в профиль попадают и стеки соседних запросов.
+
+    Attributes:
+    - `stacks`: Счётчик стеков в формате "file:func:line;...".
+    """
+
+    def __init__(self, thread_id: int):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_filename}:{code.co_name}:{frame.f_lineno}"
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class Profile:
+    """
+    Профиль одного запроса.
+
+    Attributes:
+    - `method`, `path`: Метод и путь запроса.
+    - `queries`: Список SQL-запросов с длительностью.
+    """
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.status = None
+        self.started = datetime.now()
+        self.queries = []
+        self._start = time.perf_counter()
+        self._sampler = StackSampler(threading.get_ident())
+        self._sampler.start()
+
+    def record_query(self, statement: str, elapsed: float):
+        if len(self.queries) < MAX_QUERIES:
+            self.queries.append(
+                {"statement": statement, "duration_ms": elapsed * 1000}
+            )
+
+    def finish(self) -> dict:
+        self._sampler.stop()
+        return {
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started": self.started.isoformat(),
+            "duration_ms": (time.perf_counter() - self._start) * 1000,
+            "queries": self.queries,
+            "samples": dict(self._sampler.stacks.most_common(MAX_STACKS)),
+        }
+
+
+def record_query(statement: str, elapsed: float):
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record_query(statement, elapsed)
+
+
+query_listeners.append(record_query)
+
+
+async def is_staff_request(scope) -> bool:
+    """
+    Проверяет, что запрос сделан сотрудником staff.
+
+    Notes:
+    - Сессия берётся с учётом `dependency_overrides` приложения.
+    """
+    headers = dict(scope["headers"])
+    scheme, _, token = headers.get(b"authorization", b"").decode().partition(
+        " "
+    )
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        username = decode_token(token).get("username")
+    except HTTPException:
+        return False
+    get_session = scope["app"].dependency_overrides.get(
+        get_async_session, get_async_session
+    )
+    async with asynccontextmanager(get_session)() as session:
+        db_user = await crud.get_user_by_username(session, username=username)
+    return bool(db_user and db_user.is_staff)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI-middleware выборочного профилирования запросов.
+
+    Профилируется доля `PROFILING_SAMPLE_RATE` запросов и запросы staff с
+    заголовком `X-Profile`. Результат попадает в кольцевой буфер `profiles`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not await self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"])
+        token = current_profile.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            profiles.append(profile.finish())
+
+    async def should_profile(self, scope) -> bool:
+        rate = settings.profiling_sample_rate
+        if rate and random.random() < rate:
+            return True
+        if any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+            return await is_staff_request(scope)
+        return False
@@ -0,0 +1,188 @@
+import logging
+import re
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+
+from ..config import settings
+from ..database import connection_listeners, query_listeners
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = re.compile(r"\$\d+(::[\w\[\]]+)?|%\(\w+\)s|\b\d+\b")
+PLACEHOLDER_LIST = re.compile(r"\?(\s*,\s*\?)+")
+# Точки сохранения ставит сессия, а не код маршрута.
+IGNORED = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+current_queries: ContextVar = ContextVar("current_queries", default=None)
+# Статистика по маршрутам "METHOD /path".
+route_stats: dict = {}
+# Последние превышения бюджета и повторы запросов.
+violations: deque = deque(maxlen=100)
+
+
+def query_budget(limit: int):
+    """
+    Задаёт бюджет SQL-запросов маршрута.
+
+    Декоратор ставится под декоратором маршрута:
+
+        @router.get("/path/")
+        @query_budget(2)
+        async def endpoint(...):
+
+    Args:
+    - `limit`: Максимальное количество запросов за один вызов.
+    """
+    def decorator(endpoint):
+        endpoint.query_budget = limit
+        return endpoint
+    return decorator
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Приводит запрос к виду без параметров: `IN ($1, $2)` и `IN ($1)`
+    дают одинаковую форму.
+    """
+    return PLACEHOLDER_LIST.sub("?", PLACEHOLDER.sub("?", statement))
+
+
+class RequestQueries:
+    """
+    SQL-запросы одного HTTP-запроса.
+
+    Attributes:
+    - `count`: Количество запросов.
+    - `elapsed`: Суммарное время запросов в секундах.
+    - `shapes`: Счётчик форм запросов.
+    - `held`: Суммарное время удержания соединений в секундах.
+    """
+
+    __slots__ = ("count", "elapsed", "shapes", "held")
+
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+        self.shapes = Counter()
+        self.held = 0.0
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.elapsed += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    def problems(self, budget: int = None) -> list[str]:
+        """
+        Возвращает превышение бюджета и повторяющиеся запросы (N+1).
+        """
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f"{self.count} queries, budget {budget}")
+        for shape, count in self.shapes.items():
+            if count > settings.query_repeat_limit:
+                problems.append(f"possible N+1, {count} x {shape}")
+        return problems
+
+
+def record_query(statement: str, elapsed: float):
+    queries = current_queries.get()
+    if queries is not None and not statement.startswith(IGNORED):
+        queries.record(statement, elapsed)
+
+
+def record_hold(held: float):
+    queries = current_queries.get()
+    if queries is not None:
+        queries.held += held
+
+
+query_listeners.append(record_query)
+connection_listeners.append(record_hold)
+
+
+class RouteStats:
+    """
+    Накопленная статистика маршрута.
+    """
+
+    __slots__ = (
+        "requests", "queries", "max_queries", "db_time", "hold_time",
+        "max_hold",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_time = 0.0
+        self.hold_time = 0.0
+        self.max_hold = 0.0
+
+    def add(self, queries: RequestQueries):
+        self.requests += 1
+        self.queries += queries.count
+        self.max_queries = max(self.max_queries, queries.count)
+        self.db_time += queries.elapsed
+        self.hold_time += queries.held
+        self.max_hold = max(self.max_hold, queries.held)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "queries_avg": self.queries / self.requests,
+            "queries_max": self.max_queries,
+            "db_ms_avg": self.db_time * 1000 / self.requests,
+            "hold_ms_avg": self.hold_time * 1000 / self.requests,
+            "hold_ms_max": self.max_hold * 1000,
+        }
+
+
+def route_name(scope) -> str:
+    """
+    Возвращает "METHOD /path" маршрута, обработавшего запрос.
+    """
+    endpoint = scope.get("endpoint")
+    for route in scope["app"].routes:
+        if isinstance(route, APIRoute) and route.endpoint is endpoint:
+            return f"{scope['method']} {route.path}"
+    return f"{scope['method']} {scope['path']}"
+
+
+class QueryBudgetMiddleware:
+    """
+    ASGI-middleware учёта SQL-запросов каждого HTTP-запроса.
+
+    Считает запросы, время в базе и время удержания соединений по
+    маршрутам, сравнивает количество с бюджетом `@query_budget` и ищет
+    запросы одной формы, выполненные больше `QUERY_REPEAT_LIMIT` раз.
+    Нарушения пишутся в журнал и в `violations`; тесты падают на любом
+    нарушении.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = current_queries.set(queries)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_queries.reset(token)
+            scope.setdefault("state", {})["db_time"] = queries.elapsed
+            if "endpoint" in scope:
+                self.finish(scope, queries)
+
+    def finish(self, scope, queries: RequestQueries):
+        route = route_name(scope)
+        route_stats.setdefault(route, RouteStats()).add(queries)
+        budget = getattr(scope["endpoint"], "query_budget", None)
+        for problem in queries.problems(budget):
+            violations.append(f"{route}: {problem}")
+            logger.warning("Query budget: %s: %s", route, problem)
@@ -0,0 +1,138 @@
+from fastapi import APIRouter, Depends, status
+
+from ..audit.log import audit_log
+from ..auth.middleware import get_current_user_if_staff
+from ..cache import response_cache
+from ..database import SessionRoute
+from . import admission
+from .access_log import log_pipeline
+from .compression import compressor
+from .profiling import profiles
+from .queries import query_budget, route_stats, violations
+
+router = APIRouter(route_class=SessionRoute)
+
+
+@router.get(
+    "/profiles/",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(get_current_user_if_staff)]
+)
+@query_budget(1)
+async def read_profiles():
+    """
+    Возвращает последние профили запросов.
+
+    Returns:
+    - Список профилей, от старых к новым.
+    """
+    return list(profiles)
+
+
+@router.get(
+    "/audit/",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(get_current_user_if_staff)]
+)
+@query_budget(1)
+async def read_audit_stats():
+    """
+    Возвращает состояние очереди журнала аудита.
+
+    Returns:
+    - Количество событий в очереди, записанных и потерянных.
+    """
+    return audit_log.stats()
+
+
+@router.get(
+    "/admission/",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(get_current_user_if_staff)]
+)
+@query_budget(1)
+async def read_admission_stats():
+    """
+    Возвращает состояние контроля допуска запросов.
+
+    Returns:
+    - Общий лимит и число выполняемых запросов, а по каждой группе
+    маршрутов - лимит, приоритет, длину очереди и счётчики пропущенных и
+    отклонённых запросов.
+    """
+    return admission.admission.stats()
+
+
+@router.get(
+    "/queries/",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(get_current_user_if_staff)]
+)
+@query_budget(1)
+async def read_query_stats():
+    """
+    Возвращает статистику SQL-запросов по маршрутам.
+
+    Returns:
+    - Количество вызовов, среднее и максимальное число запросов, среднее
+    время в базе и время удержания соединения по каждому маршруту, а также
+    последние нарушения бюджета.
+    """
+    return {
+        "routes": {
+            route: stats.as_dict() for route, stats in route_stats.items()
+        },
+        "violations": list(violations),
+    }
+
+
+@router.get(
+    "/logging/",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(get_current_user_if_staff)]
+)
+@query_budget(1)
+async def read_logging_stats():
+    """
+    Возвращает состояние очереди журнала.
+
+    Returns:
+    - Количество записей в очереди, записанных в журнал доступа,
+    пропущенных выборкой и отброшенных при переполнении очереди.
+    """
+    return log_pipeline.stats()
+
+
+@router.get(
+    "/cache/",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(get_current_user_if_staff)]
+)
+@query_budget(1)
+async def read_cache_stats():
+    """
+    Возвращает статистику кэша ответов.
+
+    Returns:
+    - Хранилище, попадания, промахи и доля попаданий, всего и по видам
+    ответов, а также количество сбросов и сбоев хранилища.
+    """
+    return response_cache.stats()
+
+
+@router.get(
+    "/compression/",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(get_current_user_if_staff)]
+)
+@query_budget(1)
+async def read_compression_stats():
+    """
+    Возвращает статистику сжатия ответов.
+
+    Returns:
+    - Доступные кодировки, количество сжатых ответов по кодировкам,
+    размер тел до и после сжатия, количество сжатий в потоке и состояние
+    кэша сжатых тел.
+    """
+    return compressor.stats()
@@ -2,6 +2,9 @@ from fastapi import APIRouter
 
 from .api.routers import router as api_routers
 from .auth.routers import router as auth_routers
+from .changes.routers import router as changes_routers
+from .jobs.routers import router as jobs_routers
+from .ops.routers import router as ops_routers
 
 routers = APIRouter()
 doc_router = APIRouter()
@@ -9,3 +12,9 @@ doc_router = APIRouter()
 routers.include_router(auth_routers, prefix="/auth", tags=["authentication"])
 
 routers.include_router(api_routers, prefix="/salary", tags=["salary"])
+
+routers.include_router(ops_routers, prefix="/ops", tags=["ops"])
+
+routers.include_router(changes_routers, prefix="/changes", tags=["changes"])
+
+routers.include_router(jobs_routers, prefix="/jobs", tags=["jobs"])
@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+_tasks: list[asyncio.Task] = []
+
+
+def schedule(job: Callable[[], Awaitable], interval: float, name: str = None):
+    """
+    Запускает периодическую фоновую задачу в текущем цикле событий.
+
+    Args:
+    - `job`: Асинхронная функция без аргументов.
+    - `interval`: Пауза между запусками в секундах.
+    - `name`: Имя задачи для логов.
+    """
+    name = name or job.__name__
+
+    async def runner():
+        while True:
+            try:
+                await job()
+            except Exception:
+                logger.exception("Scheduled job %s failed", name)
+            await asyncio.sleep(interval)
+
+    _tasks.append(asyncio.create_task(runner(), name=name))
+
+
+def start(job: Callable[[], Awaitable], name: str = None):
+    """
+    Запускает долгоживущую фоновую задачу, которая остановится вместе с
+    остальными в `shutdown()`.
+
+    Args:
+    - `job`: Асинхронная функция без аргументов.
+    - `name`: Имя задачи.
+    """
+    _tasks.append(asyncio.create_task(job(), name=name or job.__name__))
+
+
+async def shutdown():
+    """
+    Останавливает все запущенные фоновые задачи.
+    """
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,214 @@
+import argparse
+import asyncio
+import logging
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import asyncpg
+
+from .auth.passwords import get_password_context
+from .database import engine
+
+logger = logging.getLogger(__name__)
+
+USER_COLUMNS = (
+    "id", "username", "email", "hashed_password", "is_active", "is_staff",
+    "change_seq",
+)
+SALARY_COLUMNS = (
+    "employee_id", "current_rate", "rate_increase_period",
+    "last_promotion_date", "change_seq",
+)
+RATE_INCREASE_PERIODS = (90, 180, 365)
+
+
+def generate_chunk(
+    seed: int,
+    start: int,
+    count: int,
+    salaries_per_user: int,
+    end: date,
+    prefix: str
+) -> list[tuple]:
+    """
+    Генерирует пачку пользователей с историей зарплат.
+
+    Notes:
+    - Данные пользователя зависят только от `seed` и его номера, поэтому
+    результат не зависит от размера пачек, числа воркеров и порядка их
+    работы.
+
+    Args:
+    - `seed`: Начальное значение генератора.
+    - `start`: Номер первого пользователя пачки.
+    - `count`: Количество пользователей в пачке.
+    - `salaries_per_user`: Количество записей о зарплате на пользователя.
+    - `end`: Дата, к которой заканчиваются истории зарплат: последнее
+    повышение не раньше чем за один период до неё.
+    - `prefix`: Префикс имён пользователей.
+
+    Returns:
+    - Список `(username, email, salaries)`, где `salaries` - список
+    `(current_rate, rate_increase_period, last_promotion_date)` от старых к
+    новым.
+    """
+    end = datetime.combine(end, datetime.min.time())
+    users = []
+    for number in range(start, start + count):
+        rng = random.Random(f"{seed}:{number}")
+        username = f"{prefix}{number}"
+        rate = round(rng.uniform(30000, 150000), 2)
+        period = rng.choice(RATE_INCREASE_PERIODS)
+        promoted = end - timedelta(
+            days=rng.randrange(period) + period * (salaries_per_user - 1),
+            seconds=rng.randrange(86400)
+        )
+        salaries = []
+        for _ in range(salaries_per_user):
+            salaries.append((rate, period, promoted))
+            rate = round(rate * rng.uniform(1.02, 1.15), 2)
+            promoted += timedelta(days=period)
+        users.append((username, f"{username}@example.com", salaries))
+    return users
+
+
+async def seed_chunk(
+    connection: asyncpg.Connection,
+    users: list[tuple],
+    hashed_password: str
+) -> int:
+    """
+    Загружает пачку пользователей и зарплат командой COPY.
+
+    Notes:
+    - Идентификаторы пользователей и номера `change_seq` заранее
+    выбираются из последовательностей, поэтому загрузка не мешает
+    обычным вставкам. `change_xid` заполняется значением по умолчанию -
+    транзакцией загрузки.
+    - Транзакцией управляет вызывающий код.
+
+    Args:
+    - `connection`: Соединение asyncpg.
+    - `users`: Пачка из `generate_chunk()`.
+    - `hashed_password`: Общий хэш пароля пользователей.
+
+    Returns:
+    - Количество загруженных записей о зарплате.
+    """
+    salaries_count = sum(len(salaries) for _, _, salaries in users)
+    reserved = await connection.fetch(
+        "SELECT nextval(pg_get_serial_sequence('users', 'id')) AS id, "
+        "nextval('change_seq') AS seq FROM generate_series(1, $1)",
+        len(users)
+    )
+    sequence = await connection.fetch(
+        "SELECT nextval('change_seq') FROM generate_series(1, $1)",
+        salaries_count
+    )
+    await connection.copy_records_to_table(
+        "users",
+        columns=USER_COLUMNS,
+        records=[
+            (row["id"], username, email, hashed_password, True, False,
+             row["seq"])
+            for row, (username, email, _) in zip(reserved, users)
+        ],
+    )
+    change_seq = (row[0] for row in sequence)
+    await connection.copy_records_to_table(
+        "salaries",
+        columns=SALARY_COLUMNS,
+        records=[
+            (row["id"], rate, period, promoted, next(change_seq))
+            for row, (_, _, salaries) in zip(reserved, users)
+            for rate, period, promoted in salaries
+        ],
+    )
+    return salaries_count
+
+
+async def seed_database(
+    users: int,
+    salaries_per_user: int,
+    seed: int = 0,
+    workers: int = 4,
+    chunk_size: int = 10000,
+    end: date = None,
+    prefix: str = "seed",
+    password: str = "password"
+):
+    """
+    Заполняет базу синтетическими пользователями и зарплатами.
+
+    Args:
+    - `users`: Количество пользователей.
+    - `salaries_per_user`: Количество записей о зарплате на пользователя.
+    - `seed`: Начальное значение генератора.
+    - `workers`: Количество параллельных соединений.
+    - `chunk_size`: Количество пользователей в пачке.
+    - `end`: Дата, к которой заканчиваются истории (по умолчанию сегодня).
+    - `prefix`: Префикс имён пользователей.
+    - `password`: Пароль всех пользователей.
+    """
+    end = end or date.today()
+    hashed_password = get_password_context().hash(password)
+    chunks = iter(range(0, users, chunk_size))
+    done = {"users": 0, "salaries": 0}
+    started = time.monotonic()
+
+    async def worker():
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            connection = raw.driver_connection
+            for start in chunks:
+                size = min(chunk_size, users - start)
+                batch = generate_chunk(
+                    seed, start, size, salaries_per_user, end, prefix
+                )
+                async with connection.transaction():
+                    salaries = await seed_chunk(
+                        connection, batch, hashed_password
+                    )
+                done["users"] += size
+                done["salaries"] += salaries
+                elapsed = time.monotonic() - started
+                logger.info(
+                    "Seeded users %d/%d, salaries %d, %.0f rows/s",
+                    done["users"], users, done["salaries"],
+                    (done["users"] + done["salaries"]) / elapsed
+                )
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Заполняет базу синтетическими пользователями и "
+                    "зарплатами."
+    )
+    parser.add_argument("--users", type=int, required=True)
+    parser.add_argument("--salaries-per-user", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--end", type=date.fromisoformat, default=None)
+    parser.add_argument("--prefix", default="seed")
+    parser.add_argument("--password", default="password")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(seed_database(
+        args.users,
+        args.salaries_per_user,
+        args.seed,
+        args.workers,
+        args.chunk_size,
+        args.end,
+        args.prefix,
+        args.password,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,68 @@
 import asyncio
+import os
+from datetime import timedelta
 from typing import AsyncGenerator
 
 import pytest
-from fastapi.testclient import TestClient
 from httpx import AsyncClient
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import StaticPool
 
+from ..src.auth import crud as user_crud
+from ..src.auth import schemas as user_schemas
+from ..src.auth.middleware import create_access_token
 from ..src.config import settings
-from ..src.database import Base, get_async_session
+from ..src.database import Base, get_async_session, instrument
+from ..src.jobs.runner import job_runner
 from ..src.main import app
+from ..src.ops.queries import violations
 
-DATABASE_URL = settings.database_url
-engine_test = create_async_engine(DATABASE_URL, poolclass=NullPool)
+# postgres (по умолчанию) или sqlite - встроенная база в памяти для тестов,
+# не помеченных `postgres`.
+TEST_DATABASE = os.getenv("TEST_DATABASE", "postgres")
 
-SessionLocal = sessionmaker(
-    engine_test, class_=AsyncSession, expire_on_commit=False
-)
+# У каждого воркера pytest-xdist своя схема, поэтому воркеры не мешают
+# друг другу.
+SCHEMA = f"test_{os.getenv('PYTEST_XDIST_WORKER', 'main')}"
 
-client = TestClient(app)
 
-
-@pytest.fixture(scope="session")
-def client():
-    with TestClient(app) as client:
-        yield client
+def pytest_collection_modifyitems(config, items):
+    if TEST_DATABASE != "sqlite":
+        return
+    skip_postgres = pytest.mark.skip(reason="requires PostgreSQL")
+    for item in items:
+        if "postgres" in item.keywords:
+            item.add_marker(skip_postgres)
 
 
-@pytest.fixture(scope="session")
-def session():
-    session = SessionLocal()
-    yield session
-    session.close()
+def enable_sqlite_savepoints(sync_engine):
+    # pysqlite сам управляет транзакциями и ломает SAVEPOINT.
+    @event.listens_for(sync_engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
 
+    @event.listens_for(sync_engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
 
-async def override_get_async_session() -> AsyncGenerator[AsyncSession, None]:
-    async with SessionLocal() as session:
-        yield session
 
-app.dependency_overrides[get_async_session] = override_get_async_session
+def create_test_engine():
+    if TEST_DATABASE != "sqlite":
+        return create_async_engine(
+            settings.test_database_url,
+            connect_args={"server_settings": {"search_path": SCHEMA}},
+        )
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    enable_sqlite_savepoints(engine.sync_engine)
+    return engine
 
 
-@pytest.fixture(autouse=True, scope='session')
-async def prepare_database():
-    async with engine_test.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    yield
-    async with engine_test.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-
-
-@pytest.fixture(scope='session')
+@pytest.fixture(scope="session")
 def event_loop(request):
     loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
@@ -59,6 +70,100 @@ def event_loop(request):
 
 
 @pytest.fixture(scope="session")
-async def ac() -> AsyncGenerator[AsyncClient, None]:
+async def engine():
+    engine = create_test_engine()
+    instrument(engine.sync_engine)
+    if engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(f'DROP SCHEMA IF EXISTS "{SCHEMA}" CASCADE')
+            )
+            await conn.execute(text(f'CREATE SCHEMA "{SCHEMA}"'))
+        await engine.dispose()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    if engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            await conn.execute(text(f'DROP SCHEMA "{SCHEMA}" CASCADE'))
+    await engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def query_budgets():
+    """
+    Проверяет, что запросы к приложению уложились в бюджеты маршрутов
+    (`@query_budget`) и не повторяли один и тот же SQL (N+1).
+    """
+    violations.clear()
+    yield
+    assert not violations, "\n".join(violations)
+
+
+@pytest.fixture
+async def session(engine) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия внутри транзакции, которая откатывается после теста.
+
+    Запросы к приложению и фоновые задачи получают свои сессии на том же
+    соединении, как и в рабочем режиме. `commit()` в коде приложения
+    фиксирует только SAVEPOINT.
+    """
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+
+        def make_session():
+            return AsyncSession(
+                bind=conn,
+                expire_on_commit=False,
+                join_transaction_mode="create_savepoint",
+            )
+
+        session = make_session()
+
+        async def override_get_async_session():
+            async with make_session() as request_session:
+                yield request_session
+
+        app.dependency_overrides[get_async_session] = (
+            override_get_async_session
+        )
+        sessions, job_runner.sessions = job_runner.sessions, make_session
+        yield session
+        job_runner.sessions = sessions
+        app.dependency_overrides.pop(get_async_session, None)
+        await session.close()
+        await transaction.rollback()
+
+
+@pytest.fixture
+async def ac(session) -> AsyncGenerator[AsyncClient, None]:
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
+
+
+async def create_test_user(session, username, is_staff=False):
+    user = user_schemas.UserCreate(username=username, password="testpassword")
+    db_user = await user_crud.create_user(session, user=user)
+    if is_staff:
+        db_user.is_staff = True
+        await session.commit()
+    return db_user
+
+
+def auth_headers(db_user) -> dict:
+    access_token = create_access_token(
+        {"id": db_user.id, "username": db_user.username},
+        timedelta(minutes=5)
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture
+async def user(session):
+    return await create_test_user(session, "testuser")
+
+
+@pytest.fixture
+async def staff_user(session):
+    return await create_test_user(session, "teststaff", is_staff=True)
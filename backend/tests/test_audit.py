@@ -0,0 +1,97 @@
+import json
+
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from ..src.api.models import Salary
+from ..src.audit.log import AuditLog, audit_log
+from ..src.audit.models import AuditEvent
+from .conftest import auth_headers
+
+
+class TestAudit:
+
+    async def test_read_is_audited(self, ac: AsyncClient, session, user):
+        while not audit_log.queue.empty():
+            audit_log.queue.get_nowait()
+
+        await ac.get("/salary/next-pay-raise/", headers=auth_headers(user))
+        assert audit_log.queue.qsize() == 1
+        assert await audit_log.flush(session) == 1
+
+        result = await session.execute(
+            select(AuditEvent).where(AuditEvent.actor == user.username)
+        )
+        assert result.scalars().one().action == "salary.read"
+
+    async def test_adjust_rates_is_audited(
+        self, ac: AsyncClient, session, user, staff_user
+    ):
+        session.add(Salary(employee_id=user.id, current_rate=100))
+        await session.commit()
+        while not audit_log.queue.empty():
+            audit_log.queue.get_nowait()
+
+        await ac.patch(
+            "/salary/adjust-rates/",
+            json={"employee_ids": [user.id, staff_user.id], "percent": 10},
+            headers=auth_headers(staff_user)
+        )
+        await audit_log.flush(session)
+        result = await session.execute(
+            select(AuditEvent).where(
+                AuditEvent.action == "salary.adjust_rates"
+            )
+        )
+        event = result.scalars().one()
+        assert (event.actor, event.employee_id) == (
+            staff_user.username, user.id
+        )
+        assert json.loads(event.details) == {"percent": 10}
+
+    async def test_set_rate_is_audited(
+        self, ac: AsyncClient, session, user, staff_user
+    ):
+        while not audit_log.queue.empty():
+            audit_log.queue.get_nowait()
+
+        await ac.post(
+            "/salary/set-rate/",
+            json={
+                "employee_id": user.id,
+                "current_rate": 500,
+                "rate_increase_period": 30
+            },
+            headers=auth_headers(staff_user)
+        )
+        await audit_log.flush(session)
+        result = await session.execute(
+            select(AuditEvent).where(AuditEvent.action == "salary.set_rate")
+        )
+        event = result.scalars().one()
+        assert event.employee_id == user.id
+        assert json.loads(event.details) == {
+            "current_rate": 500, "rate_increase_period": 30
+        }
+
+    async def test_queue_overflow(self, session):
+        log = AuditLog(maxsize=2, batch_size=1)
+        for _ in range(3):
+            log.record("actor", "salary.read")
+        assert log.stats() == {"queued": 2, "written": 0, "dropped": 1}
+
+        assert await log.flush(session) == 1
+        assert await log.flush(session) == 1
+        assert await log.flush(session) == 0
+        assert log.stats() == {"queued": 0, "written": 2, "dropped": 1}
+
+    async def test_flush_recovers_after_failure(self, session):
+        log = AuditLog(maxsize=10, batch_size=1)
+        log.record("actor", "salary.read")
+        event = log.queue.get_nowait()
+        log.queue.put_nowait({**event, "action": None})
+        log.record("actor", "salary.read")
+
+        assert await log.flush(session) == 0
+        assert await log.flush(session) == 1
+        assert log.stats() == {"queued": 0, "written": 1, "dropped": 1}
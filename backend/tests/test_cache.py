@@ -0,0 +1,202 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+
+from ..src.cache import (CacheBackend, MemoryBackend, RedisBackend,
+                         ResponseCache, response_cache)
+from .conftest import auth_headers
+
+
+class RespStandIn:
+    """
+    Сервер с протоколом Redis в памяти: `GET`, `MGET`, `SET` (`PX`, `NX`)
+    и `DEL`.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                command = await RedisBackend.read_reply(reader)
+                writer.write(self.execute(*command))
+                await writer.drain()
+        except EOFError:
+            writer.close()
+
+    def lookup(self, key):
+        if self.expires.get(key, float("inf")) < time.monotonic():
+            self.data.pop(key, None)
+        return self.data.get(key)
+
+    @staticmethod
+    def bulk(value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%b\r\n" % (len(value), value)
+
+    def execute(self, command, *args):
+        command = command.upper()
+        if command == b"GET":
+            return self.bulk(self.lookup(args[0]))
+        if command == b"MGET":
+            return b"*%d\r\n" % len(args) + b"".join(
+                self.bulk(self.lookup(key)) for key in args
+            )
+        if command == b"SET":
+            key, value, *options = args
+            options = [option.upper() for option in options]
+            if b"NX" in options and self.lookup(key) is not None:
+                return b"$-1\r\n"
+            self.data[key] = value
+            self.expires.pop(key, None)
+            if b"PX" in options:
+                ttl = int(options[options.index(b"PX") + 1]) / 1000
+                self.expires[key] = time.monotonic() + ttl
+            return b"+OK\r\n"
+        if command == b"DEL":
+            deleted = sum(self.data.pop(key, None) is not None for key in args)
+            return b":%d\r\n" % deleted
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+async def redis_url():
+    stand_in = RespStandIn()
+    server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    yield f"redis://127.0.0.1:{port}/0"
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.fixture
+def memory_cache():
+    backend, enabled = response_cache.backend, response_cache.enabled
+    response_cache.backend = MemoryBackend(100)
+    response_cache.enabled = True
+    response_cache.hits.clear()
+    response_cache.misses.clear()
+    response_cache.invalidations = 0
+    yield response_cache
+    response_cache.backend, response_cache.enabled = backend, enabled
+
+
+async def test_shared_backend(redis_url):
+    # Два экземпляра приложения с общим хранилищем.
+    first = ResponseCache(RedisBackend(redis_url, 1), 300, True)
+    second = ResponseCache(RedisBackend(redis_url, 1), 300, True)
+
+    slot = await first.slot("next_pay_raise", 1)
+    assert slot.hit is None
+    response = await slot.store(
+        {"current rate": 100}, expires=datetime.now() + timedelta(hours=1)
+    )
+    assert response.headers["X-Cache"] == "miss"
+
+    slot = await second.slot("next_pay_raise", 1)
+    assert slot.hit.body == b'{"current rate":100}'
+    assert slot.hit.headers["X-Cache"] == "hit"
+    assert (await second.slot("next_pay_raise", 2)).hit is None
+
+    await second.invalidate(1)
+    assert (await first.slot("next_pay_raise", 1)).hit is None
+    await (await first.slot("next_pay_raise", 1)).store({"current rate": 110})
+    await first.invalidate()
+    assert (await second.slot("next_pay_raise", 1)).hit is None
+
+    slot = await first.slot("next_pay_raise", 3)
+    await slot.store({}, expires=datetime.now() + timedelta(seconds=0.05))
+    await asyncio.sleep(0.1)
+    assert (await first.slot("next_pay_raise", 3)).hit is None
+
+    stats = second.stats()
+    assert stats["backend"] == "redis"
+    assert stats["responses"]["next_pay_raise"] == {
+        "hits": 1, "misses": 2, "hit_ratio": 0.3333
+    }
+    await first.close()
+    await second.close()
+
+
+def test_backend_interface():
+    class ReadOnlyBackend(CacheBackend):
+        async def get_many(self, keys):
+            return [None] * len(keys)
+
+    with pytest.raises(TypeError):
+        ReadOnlyBackend()
+
+
+async def test_backend_failure():
+    cache = ResponseCache(RedisBackend("redis://127.0.0.1:1", 1), 300, True)
+    slot = await cache.slot("users_me", 1)
+    assert slot.hit is None
+    response = await slot.store({"id": 1})
+    assert response.body == b'{"id":1}'
+    assert cache.stats()["errors"] == 1
+
+
+async def test_response_cache(
+    ac: AsyncClient, memory_cache, user, staff_user
+):
+    salary = {
+        "employee_id": user.id,
+        "current_rate": 50000,
+        "rate_increase_period": 90
+    }
+    await ac.post(
+        "/salary/set-rate/", json=salary, headers=auth_headers(staff_user)
+    )
+    for state in ("miss", "hit"):
+        response = await ac.get(
+            "/salary/next-pay-raise/", headers=auth_headers(user)
+        )
+        assert response.headers["X-Cache"] == state
+        assert response.json()["current rate"] == 50000
+
+    await ac.post(
+        "/salary/set-rate/",
+        json={**salary, "current_rate": 60000},
+        headers=auth_headers(staff_user)
+    )
+    response = await ac.get(
+        "/salary/next-pay-raise/", headers=auth_headers(user)
+    )
+    assert response.headers["X-Cache"] == "miss"
+    assert response.json()["current rate"] == 60000
+
+    await ac.patch(
+        "/salary/adjust-rates/",
+        json={"employee_ids": [user.id], "amount": 1000},
+        headers=auth_headers(staff_user)
+    )
+    response = await ac.get(
+        "/salary/next-pay-raise/", headers=auth_headers(user)
+    )
+    assert response.json()["current rate"] == 61000
+
+    for state in ("miss", "hit"):
+        response = await ac.get("/auth/users/me/", headers=auth_headers(user))
+        assert response.headers["X-Cache"] == state
+        assert response.json() == {
+            "username": user.username, "id": user.id, "is_active": True
+        }
+    await ac.patch(
+        "/auth/users/get-staff-status/",
+        json={"code": "надо"},
+        headers=auth_headers(user)
+    )
+    response = await ac.get("/auth/users/me/", headers=auth_headers(user))
+    assert response.headers["X-Cache"] == "miss"
+
+    response = await ac.get("/ops/cache/", headers=auth_headers(staff_user))
+    stats = response.json()
+    assert stats["backend"] == "memory"
+    assert (stats["hits"], stats["misses"]) == (2, 5)
+    assert stats["invalidations"] == 4
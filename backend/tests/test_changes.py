@@ -0,0 +1,111 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..src.api import crud, schemas
+from ..src.auth.models import User
+from ..src.changes.crud import get_changes
+from .conftest import auth_headers
+
+
+async def read_all(ac: AsyncClient, headers: dict, since="0:0", limit=2):
+    changes = []
+    while True:
+        response = await ac.get(
+            f"/changes/?since={since}&limit={limit}", headers=headers
+        )
+        assert response.status_code == 200
+        page = response.json()
+        changes += page["changes"]
+        since = page["next"]
+        if not page["more"]:
+            return changes, since
+
+
+async def test_change_feed(ac: AsyncClient, session, user, staff_user):
+    headers = auth_headers(staff_user)
+    response = await ac.post(
+        "/salary/set-rate/",
+        json={
+            "employee_id": user.id,
+            "current_rate": 50000,
+            "rate_increase_period": 90
+        },
+        headers=headers
+    )
+    assert response.status_code == 201
+    salary_id = response.json()["id"]
+
+    changes, cursor = await read_all(ac, headers)
+    assert [(c["table"], c["row"]["id"]) for c in changes] == [
+        ("users", user.id), ("users", staff_user.id), ("salaries", salary_id)
+    ]
+    assert "hashed_password" not in changes[0]["row"]
+    cursors = [(c["xid"], c["seq"]) for c in changes]
+    assert cursors == sorted(cursors)
+    assert cursor == "{}:{}".format(*cursors[-1])
+
+    response = await ac.post(
+        "/auth/login/",
+        json={"username": "testuser", "password": "testpassword"}
+    )
+    assert response.status_code == 200
+    changes, _ = await read_all(ac, headers, since=cursor)
+    assert changes == []
+
+    await crud.adjust_rates(session, schemas.RateAdjustment(percent=10))
+    response = await ac.patch(
+        "/auth/users/get-staff-status/",
+        json={"code": "надо"},
+        headers=auth_headers(user)
+    )
+    assert response.status_code == 200
+
+    changes, _ = await read_all(ac, headers, since=cursor)
+    assert [(c["table"], c["row"]["id"]) for c in changes] == [
+        ("salaries", salary_id), ("users", user.id)
+    ]
+    assert changes[0]["row"]["current_rate"] == pytest.approx(55000)
+    assert changes[1]["row"]["is_staff"]
+
+    response = await ac.get("/changes/", headers=auth_headers(staff_user))
+    assert len(response.json()["changes"]) == 3
+
+    response = await ac.get("/changes/?since=0", headers=headers)
+    assert response.status_code == 422
+
+    response = await ac.get("/changes/?since=0:0", headers={})
+    assert response.status_code == 401
+
+
+@pytest.mark.postgres
+async def test_change_feed_waits_for_transactions(engine):
+    async def usernames(since):
+        async with AsyncSession(engine) as session:
+            changes = await get_changes(session, since=since, limit=100)
+        return [c["row"]["username"] for c in changes], changes
+
+    async with engine.connect() as slow, engine.connect() as fast:
+        try:
+            await slow.execute(insert(User).values(
+                username="slow_writer", hashed_password="-"
+            ))
+            await fast.execute(insert(User).values(
+                username="fast_writer", hashed_password="-"
+            ))
+            await fast.commit()
+
+            assert (await usernames((0, 0)))[0] == []
+
+            await slow.commit()
+            names, changes = await usernames((0, 0))
+            assert names == ["slow_writer", "fast_writer"]
+            last = changes[0]["xid"], changes[0]["seq"]
+            assert (await usernames(last))[0] == ["fast_writer"]
+        finally:
+            await slow.rollback()
+            await fast.execute(delete(User).where(
+                User.username.in_(["slow_writer", "fast_writer"])
+            ))
+            await fast.commit()
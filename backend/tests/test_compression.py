@@ -0,0 +1,49 @@
+from httpx import AsyncClient
+
+from ..src.auth import models as user_models
+from ..src.ops.compression import choose_encoding, compressor
+from .conftest import auth_headers
+
+
+def test_choose_encoding():
+    encodings = ["zstd", "br", "gzip"]
+    assert choose_encoding("gzip, br", encodings) == "br"
+    assert choose_encoding("gzip;q=1, br;q=0.5", encodings) == "gzip"
+    assert choose_encoding("br;q=0, *", encodings) == "zstd"
+    assert choose_encoding("deflate", encodings) is None
+    assert choose_encoding("", encodings) is None
+
+
+async def test_compression(ac: AsyncClient, session, staff_user, monkeypatch):
+    session.add_all(
+        user_models.User(username=f"user{index:03d}", hashed_password="-")
+        for index in range(30)
+    )
+    await session.commit()
+    headers = {**auth_headers(staff_user), "Accept-Encoding": "gzip"}
+
+    hits = compressor.cache.hits
+    for _ in range(2):
+        response = await ac.get("/auth/users/?limit=30", headers=headers)
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert len(response.json()) == 30
+        assert int(response.headers["Content-Length"]) < len(
+            response.content
+        )
+    assert compressor.cache.hits == hits + 1
+
+    response = await ac.get("/auth/users/?limit=1", headers=headers)
+    assert "Content-Encoding" not in response.headers
+
+    response = await ac.get(
+        "/auth/users/?limit=30",
+        headers={**headers, "Accept-Encoding": "identity"}
+    )
+    assert "Content-Encoding" not in response.headers
+
+    monkeypatch.setattr(compressor, "offload_size", 0)
+    offloaded = compressor.offloaded
+    response = await ac.get("/auth/users/?limit=20", headers=headers)
+    assert compressor.offloaded == offloaded + 1
+    assert len(response.json()) == 20
@@ -0,0 +1,94 @@
+import io
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+
+from ..src.api.models import Salary, SalaryArchive
+from ..src.config import settings
+from .conftest import auth_headers
+
+pyarrow = pytest.importorskip("pyarrow")
+pytest.importorskip("pyarrow.parquet")
+
+
+@pytest.fixture
+async def history(session, user, staff_user):
+    for employee, rate, promoted in (
+        (user, 100, datetime(2023, 1, 1)),
+        (user, 110, datetime(2023, 4, 1)),
+        (staff_user, 200, datetime(2023, 2, 1)),
+    ):
+        session.add(Salary(
+            employee_id=employee.id,
+            current_rate=rate,
+            rate_increase_period=90,
+            last_promotion_date=promoted
+        ))
+    await session.commit()
+
+
+async def test_export_parquet(
+    ac: AsyncClient, history, staff_user, monkeypatch
+):
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+    response = await ac.get(
+        "/salary/export/", headers=auth_headers(staff_user)
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+
+    parquet = pyarrow.parquet.ParquetFile(io.BytesIO(response.content))
+    assert parquet.metadata.num_row_groups == 2
+    table = parquet.read()
+    assert table.num_rows == 3
+    assert "hashed_password" not in table.column_names
+    assert table.column("current_rate").to_pylist() == [100, 110, 200]
+
+
+async def test_export_arrow_projection(
+    ac: AsyncClient, history, user, staff_user
+):
+    response = await ac.get(
+        "/salary/export/?format=arrow&columns=username&columns=current_rate"
+        "&promoted_from=2023-02-01&promoted_to=2023-04-01",
+        headers=auth_headers(staff_user)
+    )
+    assert response.status_code == 200
+    table = pyarrow.ipc.open_stream(response.content).read_all()
+    assert table.to_pydict() == {
+        "username": ["teststaff"], "current_rate": [200.0]
+    }
+
+    response = await ac.get(
+        "/salary/export/?columns=hashed_password",
+        headers=auth_headers(staff_user)
+    )
+    assert response.status_code == 422
+
+    response = await ac.get("/salary/export/", headers=auth_headers(user))
+    assert response.status_code == 403
+
+
+async def test_export_includes_archive(
+    ac: AsyncClient, session, history, user, staff_user
+):
+    session.add(SalaryArchive(
+        id=1000,
+        employee_id=user.id,
+        current_rate=90,
+        rate_increase_period=90,
+        last_promotion_date=datetime(2022, 10, 1)
+    ))
+    await session.commit()
+
+    url = "/salary/export/?format=arrow&columns=salary_id&columns=current_rate"
+    response = await ac.get(url, headers=auth_headers(staff_user))
+    table = pyarrow.ipc.open_stream(response.content).read_all()
+    assert table.column("current_rate").to_pylist() == [100, 110, 90, 200]
+
+    response = await ac.get(
+        f"{url}&include_archive=false", headers=auth_headers(staff_user)
+    )
+    table = pyarrow.ipc.open_stream(response.content).read_all()
+    assert table.column("current_rate").to_pylist() == [100, 110, 200]
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+
+from ..src.api.models import Salary
+from ..src.jobs.runner import JobQueueFullError, JobRunner, job_runner
+from .conftest import auth_headers
+
+
+async def test_runner():
+    runner = JobRunner(workers=1, queue_size=1, retention=0, history=10)
+    release = asyncio.Event()
+
+    async def blocked(job):
+        job.report(1, 2)
+        await release.wait()
+        return {"ok": True}
+
+    async def failing(job):
+        raise ValueError("boom")
+
+    first = runner.submit("blocked", blocked)
+    await asyncio.sleep(0)
+    assert (first.status, first.done, first.total) == ("running", 1, 2)
+    second = runner.submit("failing", failing)
+    assert second.status == "pending"
+    with pytest.raises(JobQueueFullError):
+        runner.submit("blocked", blocked)
+
+    runner.cancel(second.id)
+    release.set()
+    await asyncio.gather(first.task, second.task, return_exceptions=True)
+    assert (first.status, first.result) == ("succeeded", {"ok": True})
+    assert second.status == "cancelled"
+
+    third = runner.submit("failing", failing)
+    await third.task
+    assert (third.status, third.error) == ("failed", "boom")
+    assert runner.get(first.id) is None
+
+
+@pytest.mark.postgres
+async def test_due_raises_job(ac: AsyncClient, session, user, staff_user):
+    salary = Salary(
+        employee_id=user.id, current_rate=100, rate_increase_period=30
+    )
+    session.add(salary)
+    await session.flush()
+    salary.last_promotion_date = datetime.now() - timedelta(days=100)
+    await session.commit()
+
+    response = await ac.post(
+        "/jobs/due-raises/",
+        json={"percent": 10},
+        headers=auth_headers(user)
+    )
+    assert response.status_code == 403
+    response = await ac.post(
+        "/jobs/due-raises/",
+        json={"percent": 10},
+        headers=auth_headers(staff_user)
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "pending"
+
+    await job_runner.jobs[job["id"]].task
+    response = await ac.get(
+        f"/jobs/{job['id']}/", headers=auth_headers(staff_user)
+    )
+    job = response.json()
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"updated": 1}
+    assert job["done"] == job["total"] == 1
+    await session.refresh(salary)
+    assert salary.current_rate == pytest.approx(110)
+
+    response = await ac.delete(
+        f"/jobs/{job['id']}/", headers=auth_headers(staff_user)
+    )
+    assert response.status_code == 204
+    response = await ac.get("/jobs/missing/", headers=auth_headers(staff_user))
+    assert response.status_code == 404
@@ -0,0 +1,271 @@
+import asyncio
+import io
+import json
+import logging
+
+from fastapi.routing import APIRoute
+from httpx import AsyncClient
+
+from ..src.config import settings
+from ..src.database import get_async_session
+from ..src.main import app
+from ..src.ops import access_log, admission
+from ..src.ops.admission import AdmissionController, Lane
+from ..src.ops.profiling import profiles
+from ..src.ops.queries import RequestQueries, statement_shape, violations
+from .conftest import auth_headers
+
+
+class TestProfiling:
+
+    async def test_profile_header(self, ac: AsyncClient, user, staff_user):
+        profiles.clear()
+        await ac.get(
+            "/auth/users/me/",
+            headers={**auth_headers(user), "X-Profile": "1"}
+        )
+        assert len(profiles) == 0
+
+        await ac.get(
+            "/auth/users/me/",
+            headers={**auth_headers(staff_user), "X-Profile": "1"}
+        )
+        response = await ac.get(
+            "/ops/profiles/", headers=auth_headers(staff_user)
+        )
+        assert response.status_code == 200
+        profile = response.json()[-1]
+        assert profile["path"] == "/auth/users/me/"
+        assert profile["status"] == 200
+        assert any("users" in q["statement"] for q in profile["queries"])
+
+        response = await ac.get("/ops/profiles/", headers=auth_headers(user))
+        assert response.status_code == 403
+
+    async def test_slow_query_log(
+        self, ac: AsyncClient, user, monkeypatch, caplog
+    ):
+        monkeypatch.setattr(settings, "slow_query_threshold_ms", 1e-9)
+        with caplog.at_level(logging.WARNING, logger="src.database"):
+            await ac.get("/auth/users/me/", headers=auth_headers(user))
+        assert "Slow query" in caplog.text
+
+
+def make_controller(limit=1, queue_size=10, timeout=1.0, auth_limit=1):
+    return AdmissionController(limit, queue_size, timeout, [
+        Lane("read", ("/salary/next-pay-raise/",), 0, limit),
+        Lane("auth", ("/auth/login/",), 2, auth_limit),
+    ])
+
+
+class TestAdmission:
+
+    def test_lane_for(self):
+        controller = AdmissionController.from_settings()
+        for path, lane in (
+            ("/salary/next-pay-raise/", "read"),
+            ("/auth/login/", "auth"),
+            ("/salary/export/", "bulk"),
+            ("/changes/", "bulk"),
+            ("/jobs/adjust-rates/", "bulk"),
+            ("/jobs/1/", "bulk"),
+        ):
+            assert controller.lane_for(path).name == lane
+        assert controller.lane_for("/ops/admission/") is None
+
+    async def test_priority(self):
+        controller = make_controller()
+        read, auth = controller.lanes
+        assert await controller.acquire(controller.default)
+
+        order = []
+
+        async def request(lane):
+            assert await controller.acquire(lane)
+            order.append(lane.name)
+            controller.release(lane)
+
+        tasks = [asyncio.create_task(request(auth))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request(read)))
+        await asyncio.sleep(0)
+        assert (auth.waiting, read.waiting) == (1, 1)
+
+        controller.release(controller.default)
+        await asyncio.gather(*tasks)
+        assert order == ["read", "auth"]
+        assert controller.active == 0
+
+    async def test_lane_limit(self):
+        controller = make_controller(limit=2)
+        read, auth = controller.lanes
+        assert await controller.acquire(auth)
+        waiting = asyncio.create_task(controller.acquire(auth))
+        await asyncio.sleep(0)
+        assert await controller.acquire(read)
+        assert auth.waiting == 1
+
+        controller.release(read)
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        controller.release(auth)
+        assert await waiting
+
+    async def test_shed(self):
+        controller = make_controller(queue_size=1, timeout=0.01)
+        read, auth = controller.lanes
+        assert await controller.acquire(read)
+        waiting = asyncio.create_task(controller.acquire(auth))
+        await asyncio.sleep(0)
+        assert not await controller.acquire(auth)
+        assert not await waiting
+        assert (auth.shed, auth.waiting) == (2, 0)
+        assert controller.stats()["lanes"]["auth"]["shed"] == 2
+
+    async def test_middleware(
+        self, ac: AsyncClient, staff_user, monkeypatch
+    ):
+        controller = make_controller(queue_size=0)
+        monkeypatch.setattr(admission, "admission", controller)
+        assert await controller.acquire(controller.default)
+
+        response = await ac.post(
+            "/auth/login/",
+            json={"username": "teststaff", "password": "testpassword"}
+        )
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == str(
+            settings.admission_retry_after
+        )
+
+        response = await ac.get(
+            "/ops/admission/", headers=auth_headers(staff_user)
+        )
+        assert response.status_code == 200
+        assert response.json()["lanes"]["auth"]["shed"] == 1
+
+        controller.release(controller.default)
+        response = await ac.post(
+            "/auth/login/",
+            json={"username": "teststaff", "password": "testpassword"}
+        )
+        assert response.status_code == 200
+        assert controller.active == 0
+
+
+class TestQueryBudget:
+
+    def test_every_route_has_budget(self):
+        missing = [
+            route.path for route in app.routes
+            if isinstance(route, APIRoute)
+            and not hasattr(route.endpoint, "query_budget")
+        ]
+        assert not missing
+
+    def test_repeated_statements(self):
+        assert statement_shape(
+            "SELECT x FROM t WHERE id IN ($1::INTEGER, $2::INTEGER)"
+        ) == statement_shape("SELECT x FROM t WHERE id IN ($1::INTEGER)")
+
+        queries = RequestQueries()
+        for _ in range(settings.query_repeat_limit + 1):
+            queries.record("SELECT x FROM t WHERE id = $1::INTEGER", 0.001)
+        queries.record("SELECT y FROM t", 0.001)
+        problems = queries.problems(budget=3)
+        assert problems[0] == f"{queries.count} queries, budget 3"
+        assert problems[1].startswith(
+            f"possible N+1, {settings.query_repeat_limit + 1} x SELECT x"
+        )
+        assert len(problems) == 2
+
+    async def test_budget_violation(self, ac: AsyncClient, user, monkeypatch):
+        endpoint = next(
+            route.endpoint for route in app.routes
+            if getattr(route, "path", None) == "/auth/users/me/"
+        )
+        monkeypatch.setattr(endpoint, "query_budget", 0)
+        response = await ac.get("/auth/users/me/", headers=auth_headers(user))
+        assert response.status_code == 200
+        assert violations.pop() == (
+            "GET /auth/users/me/: 1 queries, budget 0"
+        )
+
+    async def test_query_stats(self, ac: AsyncClient, staff_user):
+        await ac.get("/auth/users/me/", headers=auth_headers(staff_user))
+        response = await ac.get(
+            "/ops/queries/", headers=auth_headers(staff_user)
+        )
+        assert response.status_code == 200
+        stats = response.json()["routes"]["GET /auth/users/me/"]
+        assert stats["queries_max"] == 1
+
+
+class TestSessionRelease:
+
+    async def test_released_before_response(
+        self, ac: AsyncClient, staff_user
+    ):
+        override = app.dependency_overrides[get_async_session]
+        in_transaction = []
+
+        async def tracked_session():
+            async for request_session in override():
+                yield request_session
+                in_transaction.append(request_session.in_transaction())
+
+        app.dependency_overrides[get_async_session] = tracked_session
+        response = await ac.get(
+            "/auth/users/", headers=auth_headers(staff_user)
+        )
+        app.dependency_overrides[get_async_session] = override
+        assert response.status_code == 200
+        assert in_transaction == [False]
+
+        response = await ac.get(
+            "/ops/queries/", headers=auth_headers(staff_user)
+        )
+        stats = response.json()["routes"]["GET /auth/users/"]
+        assert stats["hold_ms_max"] > 0
+
+
+class TestAccessLog:
+
+    async def test_access_record(self, ac: AsyncClient, user, caplog):
+        with caplog.at_level(logging.INFO, logger=access_log.logger.name):
+            await ac.get("/auth/users/me/", headers=auth_headers(user))
+        fields = caplog.records[-1].fields
+        assert fields["route"] == "GET /auth/users/me/"
+        assert fields["status"] == 200
+        assert fields["user_id"] == user.id
+        assert fields["db_ms"] > 0
+
+    async def test_sampling(self, ac: AsyncClient, user, monkeypatch, caplog):
+        monkeypatch.setattr(settings, "access_log_sample_rate", 0)
+        sampled_out = access_log.log_pipeline.sampled_out
+        with caplog.at_level(logging.INFO, logger=access_log.logger.name):
+            await ac.get("/auth/users/me/", headers=auth_headers(user))
+            await ac.get("/auth/users/me/")
+        assert access_log.log_pipeline.sampled_out == sampled_out + 1
+        assert [record.fields["status"] for record in caplog.records] == [
+            401
+        ]
+
+    def test_pipeline(self):
+        pipeline = access_log.LogPipeline(queue_size=2)
+        log = logging.getLogger("test_pipeline")
+        for number in range(3):
+            pipeline.handler.handle(log.makeRecord(
+                log.name, logging.INFO, __file__, 0, "record %d", (number,),
+                None, extra={"fields": {"number": number}}
+            ))
+        assert pipeline.stats()["dropped"] == 1
+
+        stream = io.StringIO()
+        level = logging.getLogger().level
+        pipeline.start(stream)
+        pipeline.stop()
+        logging.getLogger().setLevel(level)
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [line["message"] for line in lines] == ["record 0", "record 1"]
+        assert lines[1]["number"] == 1
@@ -0,0 +1,49 @@
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+
+from ..src.api.models import Salary, SalaryArchive
+from ..src.api.partitions import archive_salaries
+from ..src.auth.models import User
+
+
+@pytest.mark.postgres
+async def test_archive_keeps_current_salary(session):
+    user = User(username="archive_user", hashed_password="-")
+    session.add(user)
+    await session.flush()
+    past = datetime.now() - timedelta(days=400)
+    salaries = [
+        Salary(employee_id=user.id, current_rate=rate, rate_increase_period=30)
+        for rate in (100, 200, 300)
+    ]
+    session.add_all(salaries)
+    await session.flush()
+    for salary in salaries:
+        salary.last_promotion_date = past
+    await session.commit()
+
+    before = datetime.now() - timedelta(days=1)
+    assert await archive_salaries(session, before, chunk_size=1) == 2
+
+    result = await session.execute(
+        select(Salary.current_rate).where(Salary.employee_id == user.id)
+    )
+    assert result.scalars().all() == [300]
+    result = await session.execute(
+        select(SalaryArchive.current_rate)
+        .where(SalaryArchive.employee_id == user.id)
+        .order_by(SalaryArchive.id)
+    )
+    assert result.scalars().all() == [100, 200]
+
+
+@pytest.mark.postgres
+async def test_employee_lookup_reads_one_partition(session):
+    result = await session.execute(
+        text("EXPLAIN SELECT * FROM salaries WHERE employee_id = 1")
+    )
+    plan = "\n".join(result.scalars().all())
+    assert len(set(re.findall(r"salaries_p\d+", plan))) == 1
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient
+
+from ..src.api import routers
+from ..src.api.models import Salary
+from ..src.api.notifications import PING, RaiseNotifier
+from ..src.config import settings
+from .conftest import auth_headers
+
+
+def parse(message):
+    event, data = message.strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data[len("data: "):])
+
+
+def test_fire_due():
+    notifier = RaiseNotifier(queue_size=4, keepalive=15)
+    queue = asyncio.Queue(maxsize=4)
+    notifier.subscribers[1] = {queue}
+    promoted = datetime.now() - timedelta(days=10)
+    notifier.salaries[1] = (100.0, 11, promoted)
+    notifier.schedule(1)
+    deadline = notifier.deadlines[1]
+
+    notifier.salaries[1] = (100.0, 12, promoted)
+    notifier.schedule(1)
+    assert len(notifier.heap) == 2
+    assert notifier.fire_due(deadline) == 0
+
+    assert notifier.fire_due(time.time() + 3 * 86400) == 1
+    assert parse(queue.get_nowait()) == ("raise", {
+        "current rate": 100.0,
+        "next raise date": (promoted + timedelta(days=12)).strftime(
+            "%d.%m.%Y"
+        ),
+    })
+    assert not notifier.heap and not notifier.deadlines
+
+    notifier.ping()
+    assert queue.get_nowait() == PING
+
+
+async def test_timer_wakes_on_schedule():
+    notifier = RaiseNotifier(queue_size=4, keepalive=15)
+    queue = asyncio.Queue(maxsize=4)
+    notifier.subscribers[1] = {queue}
+    timer = asyncio.create_task(notifier.run_timer())
+    await asyncio.sleep(0)
+    notifier.salaries[1] = (
+        100.0, 1, datetime.now() - timedelta(days=1, seconds=-0.05)
+    )
+    notifier.schedule(1)
+    try:
+        event, _ = parse(await asyncio.wait_for(queue.get(), 1))
+    finally:
+        timer.cancel()
+    assert event == "raise"
+
+
+async def test_raise_events_stream(session, user, monkeypatch):
+    monkeypatch.setattr(settings, "raise_events", True)
+    notifier = RaiseNotifier(queue_size=4, keepalive=15)
+    monkeypatch.setattr(routers, "raise_notifier", notifier)
+    session.add(Salary(
+        employee_id=user.id,
+        current_rate=100,
+        rate_increase_period=30,
+        last_promotion_date=datetime(2023, 1, 1)
+    ))
+    await session.commit()
+
+    response = await routers.get_raise_events(
+        session, {"id": user.id, "username": user.username}
+    )
+    stream = response.body_iterator
+    assert parse(await stream.__anext__()) == ("state", {
+        "current rate": 100.0, "next raise date": "31.01.2023"
+    })
+
+    session.add(
+        Salary(employee_id=user.id, current_rate=150, rate_increase_period=30)
+    )
+    await session.commit()
+    notifier.on_notify(None, 0, "salary_changes", str(user.id))
+    await notifier.refresh(session, notifier.pending)
+    event, data = parse(await stream.__anext__())
+    assert (event, data["current rate"]) == ("change", 150.0)
+    assert notifier.stats()["scheduled"] == 1
+
+    await stream.aclose()
+    assert notifier.stats()["connections"] == 0
+
+
+async def test_raise_events_disabled(ac: AsyncClient, user):
+    response = await ac.get(
+        "/salary/raise-events/", headers=auth_headers(user)
+    )
+    assert response.status_code == 404
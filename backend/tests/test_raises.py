@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from ..src.api.models import Salary
+from ..src.api.raises import apply_due_raises
+from ..src.auth.models import User
+
+
+@pytest.mark.postgres
+async def test_apply_due_raises(session):
+    user = User(username="raise_user", hashed_password="-")
+    session.add(user)
+    await session.flush()
+    past = datetime.now() - timedelta(days=100)
+    old = Salary(
+        employee_id=user.id, current_rate=100, rate_increase_period=30
+    )
+    current = Salary(
+        employee_id=user.id, current_rate=200, rate_increase_period=30
+    )
+    session.add_all([old, current])
+    await session.flush()
+    old.last_promotion_date = current.last_promotion_date = past
+    await session.commit()
+
+    assert await apply_due_raises(session, percent=10, chunk_size=1) >= 1
+
+    await session.refresh(old)
+    await session.refresh(current)
+    assert old.current_rate == 100
+    assert current.current_rate == pytest.approx(220)
+    assert current.last_promotion_date > past
+    assert await apply_due_raises(session, percent=10) == 0
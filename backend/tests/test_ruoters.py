@@ -1,89 +1,335 @@
-import time
+from datetime import timedelta
 
 import pytest
-from fastapi.testclient import TestClient
+from httpx import AsyncClient
+
+from ..src.auth.crud import active_users_cache, search_cache
+from ..src.auth.middleware import create_access_token
+from ..src.auth.passwords import (MIN_ROUNDS, calibrate, get_password_context,
+                                  make_context)
+from ..src.config import settings
+from .conftest import auth_headers, create_test_user
 
 
 class TestBlog:
     USER = {
-        "username": f"testuser{int(time.time())}",
+        "username": "testuser_register",
         "password": "testpassword"
     }
     USER_EMPLOYEE = {
-        "username": f"testuser_employee{int(time.time())}",
+        "username": "testuser_employee",
         "password": "testpassword_employee"
     }
 
-    def get_auth_client(self, client: TestClient) -> TestClient:
-        response = client.post("/auth/login/", json=self.USER)
-        access_token = response.json()["access_token"]
-        return TestClient(
-            client.app, headers={"Authorization": f"Bearer {access_token}"}
-        )
-
-    def get_auth_client_employee(self, client: TestClient) -> TestClient:
-        response = client.post("/auth/login/", json=self.USER_EMPLOYEE)
-        access_token = response.json()["access_token"]
-        return TestClient(
-            client.app, headers={"Authorization": f"Bearer {access_token}"}
-        )
-
-    def test_register(self, client: TestClient, session):
+    async def test_register(self, ac: AsyncClient):
         for user in [self.USER, self.USER_EMPLOYEE]:
-            response = client.post("/auth/register/", json=user)
+            response = await ac.post("/auth/register/", json=user)
             assert response.status_code == 201
             assert response.json()["username"] == user.get("username")
 
-    def test_login(self, client: TestClient) -> TestClient:
-        response = client.post("/auth/login/", json=self.USER_EMPLOYEE)
+        response = await ac.post("/auth/register/", json=self.USER)
+        assert response.status_code == 400
+
+    async def test_login(self, ac: AsyncClient, user):
+        response = await ac.post(
+            "/auth/login/",
+            json={"username": user.username, "password": "testpassword"}
+        )
         assert response.status_code == 200
         assert "access_token" in response.json()
         assert response.json()["token_type"] == "Bearer"
+        assert response.json()["refresh_token"]
 
-    def test_get_staff(self, client: TestClient, session):
+        response = await ac.post(
+            "/auth/login/",
+            json={"username": user.username, "password": "wrong"}
+        )
+        assert response.status_code == 401
+
+    async def test_refresh_token_rotation(self, ac: AsyncClient, user):
+        response = await ac.post(
+            "/auth/login/",
+            json={"username": user.username, "password": "testpassword"}
+        )
+        first = response.json()["refresh_token"]
+
+        response = await ac.post(
+            "/auth/refresh/", json={"refresh_token": first}
+        )
+        assert response.status_code == 200
+        tokens = response.json()
+        assert tokens["refresh_token"] != first
+        response = await ac.get(
+            "/auth/users/me/",
+            headers={"Authorization": f"Bearer {tokens['access_token']}"}
+        )
+        assert response.status_code == 200
+
+        response = await ac.post(
+            "/auth/refresh/", json={"refresh_token": first}
+        )
+        assert response.status_code == 401
+        response = await ac.post(
+            "/auth/refresh/", json={"refresh_token": tokens["refresh_token"]}
+        )
+        assert response.status_code == 401
+
+    async def test_get_staff(self, ac: AsyncClient, user):
         code = {"code": "надо"}
-        response = self.get_auth_client(client).patch(
-            "/auth/users/get-staff-status/", json=code
+        response = await ac.patch(
+            "/auth/users/get-staff-status/",
+            json=code,
+            headers=auth_headers(user)
         )
         assert response.status_code == 200
         assert response.json()["Status Staff"] is True
 
     @pytest.mark.parametrize("skip, limit", [(0, 20), (0, 1)])
-    def test_read_users(self, client: TestClient, session, skip, limit):
-        response = self.get_auth_client(client).get(
-            f"/auth/users/?skip={skip}&limit={limit}"
+    async def test_read_users(
+        self, ac: AsyncClient, user, staff_user, skip, limit
+    ):
+        response = await ac.get(
+            f"/auth/users/?skip={skip}&limit={limit}",
+            headers=auth_headers(staff_user)
         )
         assert response.status_code == 200
         users = response.json()
-        assert len(users) <= limit
+        assert len(users) == min(limit, 2)
+
+        response = await ac.get("/auth/users/", headers=auth_headers(user))
+        assert response.status_code == 403
+
+    async def test_search_users(self, ac: AsyncClient, session, staff_user):
+        for username in ("testuser", "testzeta", "other"):
+            await create_test_user(session, username)
+        headers = auth_headers(staff_user)
+
+        pages, after = [], ""
+        while True:
+            response = await ac.get(
+                f"/auth/users/search/?q=TEST&limit=2&after={after}",
+                headers=headers
+            )
+            assert response.status_code == 200
+            page = [user["username"] for user in response.json()]
+            if not page:
+                break
+            pages.append(page)
+            after = page[-1]
+        assert pages == [["teststaff", "testuser"], ["testzeta"]]
+
+        hits = search_cache.hits
+        for _ in range(2):
+            response = await ac.get(
+                "/auth/users/search/?q=tes&limit=5", headers=headers
+            )
+            assert len(response.json()) == 3
+        assert search_cache.hits == hits + 1
+
+        await create_test_user(session, "testnew")
+        response = await ac.get(
+            "/auth/users/search/?q=tes&limit=5", headers=headers
+        )
+        assert len(response.json()) == 4
+
+        response = await ac.get("/auth/users/search/?q=testn", headers=headers)
+        assert response.json()[0]["last_login"] is None
+        await ac.post(
+            "/auth/login/",
+            json={"username": "testnew", "password": "testpassword"}
+        )
+        response = await ac.get("/auth/users/search/?q=testn", headers=headers)
+        assert response.json()[0]["last_login"] is None
+        search_cache.clear()
+        response = await ac.get("/auth/users/search/?q=testn", headers=headers)
+        assert response.json()[0]["last_login"] is not None
+
+        response = await ac.get(
+            "/auth/users/search/?q=her&contains=true", headers=headers
+        )
+        assert [user["username"] for user in response.json()] == ["other"]
+
+        response = await ac.get(
+            "/auth/users/search/?q=test",
+            headers=auth_headers(await create_test_user(session, "plain"))
+        )
+        assert response.status_code == 403
 
-    def test_read_user(self, client: TestClient, session):
-        response = self.get_auth_client(client).get("/auth/users/me/")
+    async def test_read_user(self, ac: AsyncClient, user):
+        response = await ac.get("/auth/users/me/", headers=auth_headers(user))
         assert response.status_code == 200
-        response = client.get("/auth/users/me/")
+        assert response.json()["username"] == user.username
+        response = await ac.get("/auth/users/me/")
         assert response.status_code == 401
 
-    def test_set_rate(self, client: TestClient, session):
+    async def test_set_rate(self, ac: AsyncClient, user, staff_user):
         salary = {
-            "employee_id": 2,
+            "employee_id": user.id,
             "current_rate": 50000,
             "rate_increase_period": 90
         }
-        response = self.get_auth_client(client).post(
-            "/salary/set-rate/", json=salary
+        response = await ac.post(
+            "/salary/set-rate/", json=salary, headers=auth_headers(staff_user)
         )
         assert response.status_code == 201
         assert float(response.json()['current_rate'])
         assert response.json()['current_rate'] == 50000.0
-        assert response.json()['employee_id'] == 2
+        assert response.json()['employee_id'] == user.id
+
+        response = await ac.post("/salary/set-rate/", json=salary)
+        assert response.status_code == 401
 
-        response = client.post(
-            "/salary/set-rate/", json=salary
+    async def test_adjust_rates(self, ac: AsyncClient, user, staff_user):
+        salary = {
+            "employee_id": user.id,
+            "current_rate": 50000,
+            "rate_increase_period": 90
+        }
+        await ac.post(
+            "/salary/set-rate/", json=salary, headers=auth_headers(staff_user)
+        )
+        adjustment = {"employee_ids": [user.id], "percent": 10}
+        response = await ac.patch(
+            "/salary/adjust-rates/",
+            json=adjustment,
+            headers=auth_headers(staff_user)
         )
+        assert response.status_code == 200
+        assert response.json()["updated"] == 1
+
+        response = await ac.get(
+            "/salary/next-pay-raise/", headers=auth_headers(user)
+        )
+        assert response.json()["current rate"] == pytest.approx(55000)
+
+        response = await ac.patch(
+            "/salary/adjust-rates/",
+            json={"percent": 10, "amount": 100},
+            headers=auth_headers(staff_user)
+        )
+        assert response.status_code == 422
+
+        response = await ac.patch("/salary/adjust-rates/", json=adjustment)
         assert response.status_code == 401
 
-    def test_next_pay_raise(self, client: TestClient, session):
-        response = self.get_auth_client_employee(client).get(
-            "/next-pay-raise"
+    async def test_next_pay_raise(self, ac: AsyncClient, user, staff_user):
+        response = await ac.get(
+            "/salary/next-pay-raise/", headers=auth_headers(user)
+        )
+        assert response.status_code == 404
+
+        salary = {
+            "employee_id": user.id,
+            "current_rate": 50000,
+            "rate_increase_period": 90
+        }
+        await ac.post(
+            "/salary/set-rate/", json=salary, headers=auth_headers(staff_user)
+        )
+        response = await ac.get(
+            "/salary/next-pay-raise/", headers=auth_headers(user)
+        )
+        assert response.status_code == 200
+        assert response.json()["current rate"] == 50000.0
+
+    async def test_read_salaries_batch(
+        self, ac: AsyncClient, user, staff_user
+    ):
+        for rate in (40000, 50000):
+            salary = {
+                "employee_id": user.id,
+                "current_rate": rate,
+                "rate_increase_period": 90
+            }
+            await ac.post(
+                "/salary/set-rate/",
+                json=salary,
+                headers=auth_headers(staff_user)
+            )
+        batch = {
+            "employee_ids": [user.id, 0],
+            "usernames": [staff_user.username]
+        }
+        response = await ac.post(
+            "/salary/batch/", json=batch, headers=auth_headers(staff_user)
+        )
+        assert response.status_code == 200
+        items = {item["username"]: item for item in response.json()}
+        assert len(items) == 2
+        assert items[user.username]["current_rate"] == 50000.0
+        assert items[staff_user.username]["current_rate"] is None
+
+        response = await ac.post(
+            "/salary/batch/", json=batch, headers=auth_headers(user)
+        )
+        assert response.status_code == 403
+
+        response = await ac.post(
+            "/salary/batch/",
+            json={"employee_ids": list(range(2000))},
+            headers=auth_headers(staff_user)
+        )
+        assert response.status_code == 422
+
+    async def test_introspect(
+        self, ac: AsyncClient, session, user, monkeypatch
+    ):
+        url = "/auth/introspect/"
+        token = auth_headers(user)["Authorization"].split()[1]
+        expired = create_access_token(
+            {"id": user.id, "username": user.username}, timedelta(minutes=-1)
         )
+        gone = create_access_token(
+            {"id": user.id + 1000, "username": "gone"}, timedelta(minutes=5)
+        )
+        data = {"tokens": [token, expired, "garbage", gone, token]}
+
+        response = await ac.post(url, json=data)
         assert response.status_code == 404
+
+        monkeypatch.setattr(settings, "introspection_key", "secret")
+        response = await ac.post(
+            url, json=data, headers={"X-Introspection-Key": "wrong"}
+        )
+        assert response.status_code == 401
+
+        headers = {"X-Introspection-Key": "secret"}
+        response = await ac.post(url, json=data, headers=headers)
+        assert response.status_code == 200
+        result = response.json()
+        assert [item["status"] for item in result] == [
+            "active", "expired", "invalid", "active", "active"
+        ]
+        assert result[0]["active"] is True
+        assert result[0]["claims"]["username"] == user.username
+        assert result[1]["claims"] is None
+
+        active_users_cache.clear()
+        response = await ac.post(
+            url, json={**data, "check_revoked": True}, headers=headers
+        )
+        assert [item["status"] for item in response.json()] == [
+            "active", "expired", "invalid", "revoked", "active"
+        ]
+        assert active_users_cache.get(user.id) is True
+
+    async def test_login_rehash(self, ac: AsyncClient, session, user):
+        user.hashed_password = make_context(4).hash("testpassword")
+        await session.commit()
+        assert get_password_context().needs_update(user.hashed_password)
+
+        response = await ac.post(
+            "/auth/login/",
+            json={"username": user.username, "password": "testpassword"}
+        )
+        assert response.status_code == 200
+        await session.refresh(user)
+        assert not get_password_context().needs_update(
+            user.hashed_password
+        )
+        assert user.check_password("testpassword")
+
+    def test_calibrate(self):
+        rounds, timings = calibrate(target_ms=0, samples=1)
+        assert rounds == MIN_ROUNDS
+        assert list(timings) == [MIN_ROUNDS]
@@ -0,0 +1,51 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+
+from ..src.auth.passwords import get_password_context
+from ..src.seed import generate_chunk, seed_chunk
+
+END = date(2024, 6, 1)
+
+
+def test_generate_chunk_is_deterministic():
+    users = generate_chunk(7, 0, 4, 3, END, "seed")
+    assert users == (
+        generate_chunk(7, 0, 1, 3, END, "seed")
+        + generate_chunk(7, 1, 3, 3, END, "seed")
+    )
+    assert users != generate_chunk(8, 0, 4, 3, END, "seed")
+    assert [username for username, _, _ in users] == [
+        "seed0", "seed1", "seed2", "seed3"
+    ]
+    end = datetime.combine(END, datetime.min.time())
+    for _, _, salaries in users:
+        assert len(salaries) == 3
+        rates = [rate for rate, _, _ in salaries]
+        assert rates == sorted(rates)
+        _, period, promoted = salaries[-1]
+        assert end - timedelta(days=period) < promoted <= end
+
+
+@pytest.mark.postgres
+async def test_seed_chunk(ac: AsyncClient, session):
+    users = generate_chunk(1, 0, 3, 2, date.today(), "seeded")
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    assert await seed_chunk(
+        raw.driver_connection, users, get_password_context().hash("secret")
+    ) == 6
+
+    response = await ac.post(
+        "/auth/login/", json={"username": "seeded2", "password": "secret"}
+    )
+    assert response.status_code == 200
+    response = await ac.get(
+        "/salary/next-pay-raise/",
+        headers={
+            "Authorization": f"Bearer {response.json()['access_token']}"
+        }
+    )
+    assert response.status_code == 200
+    assert response.json()["current rate"] == users[2][2][-1][0]
@@ -0,0 +1,123 @@
+from datetime import datetime
+
+from httpx import AsyncClient
+
+from ..src.api import routers
+from ..src.api.models import Salary
+from ..src.api.snapshot import REFRESH_CHUNK, SalarySnapshot
+from ..src.cache import MemoryBackend, response_cache
+from .conftest import auth_headers
+
+
+def test_put_get_remove():
+    snapshot = SalarySnapshot()
+    promoted = datetime(2023, 1, 1, 12, 30)
+    for employee_id in (5, 1, 3):
+        snapshot.put(employee_id, employee_id * 100.0, 30, promoted)
+    snapshot.put(3, 350.0, 60, None)
+
+    assert list(snapshot.employee_ids) == [1, 3, 5]
+    assert snapshot.get(1) == (100.0, 30, promoted)
+    assert snapshot.get(3) == (350.0, 60, None)
+    assert snapshot.get(2) is None
+
+    snapshot.remove(3)
+    assert snapshot.get(3) is None
+    assert len(snapshot) == 2
+
+
+async def test_load_and_refresh(session, user):
+    session.add(
+        Salary(employee_id=user.id, current_rate=100, rate_increase_period=30)
+    )
+    await session.commit()
+    snapshot = SalarySnapshot()
+    await snapshot.load(session)
+    assert snapshot.loaded
+    assert snapshot.get(user.id)[0] == 100
+
+    session.add(
+        Salary(employee_id=user.id, current_rate=150, rate_increase_period=30)
+    )
+    await session.commit()
+    snapshot.on_notify(None, 0, "salary_changes", str(user.id))
+    await snapshot.refresh(session, snapshot.pending)
+    assert snapshot.get(user.id)[0] == 150
+
+
+async def test_refresh_in_chunks(session, user, staff_user):
+    # Больше пачек и больше предела asyncpg в 32767 параметров.
+    missing = range(-8 * REFRESH_CHUNK, 0)
+    session.add_all(
+        Salary(employee_id=employee.id, current_rate=rate)
+        for employee, rate in ((user, 100), (staff_user, 200))
+    )
+    await session.commit()
+    snapshot = SalarySnapshot()
+    snapshot.put(-1, 1.0, 1, None)
+
+    await snapshot.refresh(session, [*missing, user.id, staff_user.id])
+    assert list(snapshot.employee_ids) == sorted([user.id, staff_user.id])
+    assert snapshot.get(staff_user.id)[0] == 200
+
+
+async def test_next_pay_raise_from_snapshot(
+    ac: AsyncClient, user, monkeypatch
+):
+    snapshot = SalarySnapshot()
+    snapshot.put(user.id, 70000.0, 10, datetime(2023, 1, 1))
+    snapshot.loaded = True
+    monkeypatch.setattr(routers, "salary_snapshot", snapshot)
+
+    response = await ac.get(
+        "/salary/next-pay-raise/", headers=auth_headers(user)
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "current rate": 70000.0, "next raise date": "11.01.2023"
+    }
+
+    snapshot.remove(user.id)
+    response = await ac.get(
+        "/salary/next-pay-raise/", headers=auth_headers(user)
+    )
+    assert response.status_code == 404
+
+
+async def test_snapshot_with_response_cache(
+    ac: AsyncClient, session, user, staff_user, monkeypatch
+):
+    monkeypatch.setattr(response_cache, "backend", MemoryBackend(100))
+    monkeypatch.setattr(response_cache, "enabled", True)
+    salary = {
+        "employee_id": user.id,
+        "current_rate": 50000,
+        "rate_increase_period": 90
+    }
+    await ac.post(
+        "/salary/set-rate/", json=salary, headers=auth_headers(staff_user)
+    )
+    snapshot = SalarySnapshot()
+    await snapshot.load(session)
+    monkeypatch.setattr(routers, "salary_snapshot", snapshot)
+
+    async def read():
+        response = await ac.get(
+            "/salary/next-pay-raise/", headers=auth_headers(user)
+        )
+        return response.headers["X-Cache"], response.json()["current rate"]
+
+    assert await read() == ("miss", 50000)
+    assert await read() == ("hit", 50000)
+
+    # Запись сбросила кэш, но снимок ещё не обновлён.
+    await ac.post(
+        "/salary/set-rate/",
+        json={**salary, "current_rate": 60000},
+        headers=auth_headers(staff_user)
+    )
+    assert await read() == ("miss", 50000)
+
+    await snapshot.refresh(session, [user.id])
+    assert await read() == ("miss", 60000)
+    assert await read() == ("hit", 60000)
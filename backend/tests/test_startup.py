@@ -0,0 +1,7 @@
+from ..src.importtime import BUDGET_MS, benchmark
+
+
+def test_import_time():
+    result = benchmark(runs=3)
+    assert result["eager"] == []
+    assert result["median_ms"] < BUDGET_MS